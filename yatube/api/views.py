@@ -0,0 +1,124 @@
+"""JSON-API лент постов только для чтения.
+
+Мобильные клиенты постоянно опрашивают ленты, поэтому каждый ответ
+несёт сильный ETag. Он считается одним запросом по индексу — самой
+свежей записи ленты (created, id) — и версии лент, которую сигналы
+сдвигают при правке и удалении постов. Если ETag совпал с
+If-None-Match, ответ 304 уходит до выборки и сериализации страницы.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+
+from posts.cards import FEEDS, current_version
+from posts.models import Group, Post
+from posts.paginator import CursorPaginator
+from posts.timeline import timeline_posts
+
+User = get_user_model()
+
+FIELDS = (
+    'id', 'text', 'created', 'author__username', 'group__slug',
+    'image', 'image_thumbnail',
+)
+
+
+def serialize(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        # оригинал — только очищенный от EXIF, когда готовы карточки
+        'image': row['image_thumbnail'] and settings.MEDIA_URL + row['image'],
+        'thumbnail': row['image_thumbnail'] or None,
+    }
+
+
+def feed_etag(queryset, request):
+    newest = queryset.order_by('-created', '-pk').values_list(
+        'created', 'pk'
+    ).first()
+    raw = '|'.join(str(part) for part in (
+        newest, current_version(FEEDS), request.user.pk,
+        request.GET.get('after'), request.GET.get('before'),
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def feed_response(queryset, request):
+    paginator = CursorPaginator(
+        queryset.values(*FIELDS), settings.API_PAGE_SIZE,
+        after=request.GET.get('after'), before=request.GET.get('before'),
+    )
+    page = paginator.page()
+    next_cursor = page.next_cursor
+    previous_cursor = page.previous_cursor
+    return JsonResponse({
+        'results': [serialize(row) for row in page.object_list],
+        'next': next_cursor and f'{request.path}?after={next_cursor}',
+        'previous': (
+            previous_cursor and f'{request.path}?before={previous_cursor}'
+        ),
+    })
+
+
+def api_login_required(view):
+    """Как login_required, но вместо редиректа на форму входа — 401."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Требуется авторизация'}, status=401
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+# поиск объекта — до проверки ETag: несуществующей группе или автору
+# If-None-Match с подходящим тегом должен дать 404, а не 304
+def group_feed(slug):
+    group = get_object_or_404(Group, slug=slug)
+    return Post.objects.filter(group=group)
+
+
+def profile_feed(username):
+    author = get_object_or_404(User, username=username)
+    return Post.objects.filter(author=author)
+
+
+@require_GET
+@condition(etag_func=lambda request: feed_etag(Post.objects.all(), request))
+def posts(request):
+    return feed_response(Post.objects.all(), request)
+
+
+@require_GET
+@condition(
+    etag_func=lambda request, slug: feed_etag(group_feed(slug), request)
+)
+def group_posts(request, slug):
+    return feed_response(group_feed(slug), request)
+
+
+@require_GET
+@condition(etag_func=lambda request, username: feed_etag(
+    profile_feed(username), request
+))
+def profile_posts(request, username):
+    return feed_response(profile_feed(username), request)
+
+
+@require_GET
+@api_login_required
+@condition(etag_func=lambda request: feed_etag(
+    timeline_posts(request.user), request
+))
+def follow_posts(request):
+    return feed_response(timeline_posts(request.user), request)
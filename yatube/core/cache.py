@@ -0,0 +1,231 @@
+"""Кэш в файле SQLite, общий для всех воркеров на одной машине.
+
+LocMemCache у каждого процесса gunicorn/uwsgi свой: воркеры греют кэш
+по отдельности, а сброс ключа в одном не виден остальным. Этот бэкенд
+хранит записи в одной SQLite-базе в режиме WAL, поэтому воркеры видят
+общие данные без внешнего сервиса. Размер ограничен числом записей
+(MAX_ENTRIES) и объёмом значений в байтах (MAX_SIZE); при переполнении
+вытесняются давно не читанные записи (LRU).
+"""
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' size INTEGER NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+)
+
+
+class SQLiteCache(BaseCache):
+    # чтение сдвигает отметку LRU не чаще, чем раз в столько секунд,
+    # чтобы горячие ключи не превращали каждый get в запись
+    touch_interval = 1.0
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self.cull_every = int(options.get('CULL_EVERY', 100))
+        self.busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self.hits = 0
+        self.misses = 0
+        # экземпляр общий для потоков: += на счётчиках не атомарен
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(
+                self.location, timeout=self.busy_timeout,
+                isolation_level=None, check_same_thread=False,
+            )
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db = db
+            self._local.writes = 0
+        return db
+
+    def _get_row(self, key, now):
+        row = self._db.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            self._db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, now)
+            )
+            return None
+        if now - accessed > self.touch_interval:
+            self._db.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key)
+            )
+        return value
+
+    def _count(self, hits, misses):
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+
+    def _write(self, key, value, timeout, replace=True):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        if not replace:
+            self._db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, now)
+            )
+        cursor = self._db.execute(
+            f'{verb} INTO cache (key, value, size, expires, accessed) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key, data, len(data), self.get_backend_timeout(timeout), now)
+        )
+        self._maybe_cull()
+        return cursor.rowcount > 0
+
+    def _maybe_cull(self):
+        self._local.writes += 1
+        if self._local.writes % self.cull_every == 0:
+            self.cull()
+
+    def cull(self):
+        """Удаляет просроченные записи и вытесняет самые старые по LRU."""
+        now = time.time()
+        db = self._db
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        entries, size = db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache'
+        ).fetchone()
+        if entries <= self._max_entries and size <= self.max_size:
+            return
+        # вытесняем с запасом, чтобы не чистить на каждой записи
+        keep_entries = int(self._max_entries * (1 - 1 / self._cull_frequency))
+        keep_size = int(self.max_size * (1 - 1 / self._cull_frequency))
+        db.execute(
+            'DELETE FROM cache WHERE key IN ('
+            ' SELECT key FROM ('
+            '  SELECT key, SUM(size) OVER ('
+            '   ORDER BY accessed DESC'
+            '   ROWS UNBOUNDED PRECEDING) AS total,'
+            '  ROW_NUMBER() OVER (ORDER BY accessed DESC) AS position'
+            '  FROM cache)'
+            ' WHERE position > ? OR total > ?)',
+            (keep_entries, keep_size)
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._write(key, value, timeout, replace=False)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        data = self._get_row(key, time.time())
+        if data is None:
+            self._count(0, 1)
+            return default
+        self._count(1, 0)
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._write(key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ?',
+            (self.get_backend_timeout(timeout), key)
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def get_many(self, keys, version=None):
+        made = {self.make_key(key, version=version): key for key in keys}
+        for key in made:
+            self.validate_key(key)
+        if not made:
+            return {}
+        now = time.time()
+        rows = self._db.execute(
+            'SELECT key, value, accessed FROM cache WHERE key IN ({}) '
+            'AND (expires IS NULL OR expires > ?)'.format(
+                ', '.join('?' * len(made))
+            ),
+            (*made, now)
+        ).fetchall()
+        # отметка LRU, как в get: иначе ключи, которые читают только
+        # пачками, выглядели бы самыми старыми и вытеснялись первыми
+        stale = [
+            key for key, _, accessed in rows
+            if now - accessed > self.touch_interval
+        ]
+        if stale:
+            self._db.execute(
+                'UPDATE cache SET accessed = ? WHERE key IN ({})'.format(
+                    ', '.join('?' * len(stale))
+                ),
+                (now, *stale)
+            )
+        self._count(len(rows), len(made) - len(rows))
+        return {made[key]: pickle.loads(value) for key, value, _ in rows}
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._get_row(key, time.time()) is not None
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно для всех процессов: чтение и запись в одной транзакции."""
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            data = self._get_row(key, time.time())
+            if data is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(data) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            db.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (data, len(data), key)
+            )
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return value
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # соединение живёт весь процесс: открывать SQLite на каждый
+        # запрос дороже, чем держать его
+        pass
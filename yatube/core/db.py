@@ -0,0 +1,16 @@
+"""Настройка новых соединений с базой, см. yatube/databases.py."""
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Выполняет PRAGMA из настроек соединения SQLite.
+
+    journal_mode=WAL хранится в самом файле базы, остальные действуют
+    только на это соединение; с CONN_MAX_AGE они выполняются раз на
+    соединение, а не на каждый запрос.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS') or {}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
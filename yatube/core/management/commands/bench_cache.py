@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from yatube.caches import LOCMEM, SQLITE
+
+
+def run_worker(backend, location, url, requests, results):
+    """Воркер в отдельном процессе: свой Django, общий только кэш."""
+    os.environ['YATUBE_CACHE'] = backend
+    if location:
+        os.environ['YATUBE_CACHE_LOCATION'] = location
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test import Client
+
+    post_queries = []
+
+    def count_post_queries(execute, sql, params, many, context):
+        if 'posts_post' in sql:
+            post_queries.append(sql)
+        return execute(sql, params, many, context)
+
+    # не 127.0.0.1, чтобы не включался debug toolbar
+    client = Client(REMOTE_ADDR='10.0.0.1')
+    latencies = []
+    hits = 0
+    with connection.execute_wrapper(count_post_queries):
+        for _ in range(requests):
+            post_queries.clear()
+            started = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - started)
+            # страница из кэша не трогает таблицу постов
+            hits += not post_queries
+    results.put((hits, latencies))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает кэш-бэкенды: N процессов-воркеров параллельно '
+        'запрашивают страницу, считаются доля попаданий и задержки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--url', default='/')
+        parser.add_argument(
+            '--backends', default=f'{LOCMEM},{SQLITE}',
+            help='Бэкенды через запятую, см. yatube/caches.py'
+        )
+        parser.add_argument(
+            '--location', default='',
+            help='LOCATION для файловых бэкендов'
+        )
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('spawn')
+        for backend in options['backends'].split(','):
+            results = context.Queue()
+            workers = [
+                context.Process(target=run_worker, args=(
+                    backend, options['location'], options['url'],
+                    options['requests'], results,
+                ))
+                for _ in range(options['workers'])
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            collected = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+            hits = sum(hits for hits, _ in collected)
+            latencies = sorted(
+                latency for _, chunk in collected for latency in chunk
+            )
+            self.stdout.write(
+                f'{backend:>10}: hit rate {hits / len(latencies):.1%}, '
+                f'p50 {statistics.median(latencies) * 1000:.2f} ms, '
+                f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.2f} ms, '
+                f'{len(latencies) / elapsed:.0f} req/s'
+            )
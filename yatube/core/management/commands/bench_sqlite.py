@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+
+from yatube.databases import PLAIN, TUNED, build_databases
+
+# по этому тексту записи бенчмарка удаляются после прогона
+MARKER = 'bench-sqlite'
+
+
+def run_worker(profile, role, user_id, post_id, urls, barrier, seconds,
+               results):
+    """Воркер в отдельном процессе: свой Django, общий только файл базы.
+
+    Читатель по кругу открывает `urls`, писатель попеременно создаёт
+    пост и комментирует пост `post_id`.
+    """
+    os.environ['YATUBE_DB'] = profile
+    import django
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    User = get_user_model()
+
+    # не 127.0.0.1, чтобы не включался debug toolbar
+    client = Client(REMOTE_ADDR='10.0.0.1')
+    if role == 'writer':
+        client.force_login(User.objects.get(pk=user_id))
+        requests = [
+            (reverse('posts:post_create'), {'text': f'{MARKER}: пост'}),
+            (
+                reverse('posts:add_comment', args=[post_id]),
+                {'text': f'{MARKER}: комментарий'},
+            ),
+        ]
+    else:
+        requests = [(url, None) for url in urls]
+    latencies = []
+    errors = 0
+    barrier.wait()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        url, data = requests[len(latencies) % len(requests)]
+        started = time.perf_counter()
+        try:
+            if data is None:
+                status = client.get(url).status_code
+            else:
+                status = client.post(url, data).status_code
+        except Exception:
+            # в журнале отката это обычно «database is locked»
+            status = 500
+        latencies.append(time.perf_counter() - started)
+        errors += status >= 500
+    results.put((role, errors, latencies))
+
+
+# модули с моделями импортируются внутри функций: воркер загружает этот
+# файл до django.setup()
+class Command(BaseCommand):
+    help = (
+        'Сравнивает профили SQLite (yatube/databases.py): читатели '
+        'открывают страницы, пока писатели создают посты и комментарии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument(
+            '--profiles', default=f'{PLAIN},{TUNED}',
+            help='Профили через запятую, см. yatube/databases.py'
+        )
+
+    def handle(self, *args, **options):
+        from django.contrib.auth import get_user_model
+
+        from posts.management.commands.seed_bench import PREFIX
+        from posts.models import Post
+
+        User = get_user_model()
+        name = settings.DATABASES['default']['NAME']
+        writers = list(User.objects.filter(
+            username__startswith=PREFIX
+        ).order_by('pk').values_list('pk', flat=True)[:options['writers']])
+        post = Post.objects.filter(
+            author__username__startswith=PREFIX
+        ).select_related('author').order_by('-pk').first()
+        if not writers or post is None:
+            raise CommandError('Нет данных: сначала запустите seed_bench')
+        urls = [
+            reverse('posts:post_detail', args=[post.pk]),
+            reverse('posts:profile', args=[post.author.username]),
+        ]
+        try:
+            for profile in options['profiles'].split(','):
+                self.run(profile, name, writers, post.pk, urls, options)
+        finally:
+            self.cleanup()
+
+    def run(self, profile, name, writers, post, urls, options):
+        pragmas = build_databases(
+            settings.BASE_DIR, profile, name
+        )['default'].get('PRAGMAS', {})
+        # режим журнала хранится в файле: переключаем, пока никто
+        # другой базу не держит
+        connection.close()
+        db = sqlite3.connect(name)
+        db.execute(
+            f'PRAGMA journal_mode={pragmas.get("journal_mode", "DELETE")}'
+        )
+        db.close()
+        context = multiprocessing.get_context('spawn')
+        roles = (
+            [('reader', None)] * options['readers']
+            + [('writer', pk) for pk in writers]
+        )
+        barrier = context.Barrier(len(roles))
+        results = context.Queue()
+        workers = [
+            context.Process(target=run_worker, args=(
+                profile, role, user_id, post, urls, barrier,
+                options['seconds'], results,
+            ))
+            for role, user_id in roles
+        ]
+        for worker in workers:
+            worker.start()
+        # упавший при запуске воркер не должен подвесить замер
+        collected = [
+            results.get(timeout=options['seconds'] + 120) for _ in workers
+        ]
+        for worker in workers:
+            worker.join()
+        for role in ('reader', 'writer'):
+            latencies = sorted(
+                latency for kind, _, chunk in collected if kind == role
+                for latency in chunk
+            )
+            if not latencies:
+                continue
+            errors = sum(
+                errors for kind, errors, _ in collected if kind == role
+            )
+            self.stdout.write(
+                f'{profile:>6} {role}: '
+                f'{len(latencies) / options["seconds"]:.0f} req/s, '
+                f'p50 {statistics.median(latencies) * 1000:.2f} ms, '
+                f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.2f} ms, '
+                f'ошибок {errors}'
+            )
+
+    def cleanup(self):
+        from posts.models import Comment, Post
+
+        Comment.objects.filter(text__startswith=MARKER).delete()
+        Post.objects.filter(text__startswith=MARKER).delete()
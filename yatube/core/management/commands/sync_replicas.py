@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.replicas import copy_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Заменяет репликацию при локальной проверке: копирует основную '
+        'базу SQLite в файлы реплик (DATABASE_REPLICAS).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые N секунд (отставание реплик); '
+                 '0 — скопировать один раз'
+        )
+
+    def handle(self, *args, **options):
+        aliases = settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError(
+                'Реплик нет: задайте файлы в YATUBE_DB_REPLICAS'
+            )
+        source = settings.DATABASES['default']['NAME']
+        try:
+            while True:
+                started = time.perf_counter()
+                for alias in aliases:
+                    copy_database(source, settings.DATABASES[alias]['NAME'])
+                self.stdout.write(
+                    f'Реплик обновлено: {len(aliases)} за '
+                    f'{(time.perf_counter() - started) * 1000:.0f} ms'
+                )
+                if not options['interval']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,63 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import perf, replicas
+
+
+class PerfMiddleware:
+    """Замеряет долю запросов и пишет итоги в core.perf.registry."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.PERF_SAMPLE_RATE
+        if not rate or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+        perf.install()
+        stats = perf.RequestStats()
+        token = perf.current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            perf.current.reset(token)
+        wall_ms = (time.perf_counter() - started) * 1000
+        match = getattr(request, 'resolver_match', None)
+        perf.registry.record(
+            match.view_name if match else 'unresolved',
+            {
+                'wall_ms': wall_ms,
+                'db_ms': stats.db_ms,
+                'db_queries': stats.db_queries,
+                'template_ms': stats.template_ms,
+                'cache_hits': stats.cache_hits,
+                'cache_misses': stats.cache_misses,
+            },
+        )
+        response['Server-Timing'] = stats.server_timing(wall_ms)
+        return response
+
+
+class PinPrimaryMiddleware:
+    """После успешной записи читаем из основной базы, см. core.replicas."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.DATABASE_REPLICAS
+            and replicas.needs_pin(request)
+            and response.status_code < 400
+        ):
+            replicas.pin_primary(response)
+        return response
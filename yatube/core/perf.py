@@ -0,0 +1,234 @@
+"""Замеры производительности запросов для продакшена.
+
+Middleware PerfMiddleware на выбранной доле запросов (PERF_SAMPLE_RATE)
+собирает: общее время, число и время SQL-запросов (через
+connection.execute_wrapper), время рендеринга шаблонов и попадания в
+кэш. Итоги уходят в заголовок Server-Timing и в скользящие гистограммы
+по имени view, которые отдаёт `/metrics`. Гистограммы живут в памяти
+процесса: у каждого воркера свои.
+
+Шаблоны и кэш инструментируются подменой методов один раз при первом
+замере. Вне замеряемого запроса обёртки сразу зовут оригинал, так что
+при PERF_SAMPLE_RATE = 0 накладные расходы — одна проверка contextvar.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+# границы корзин в миллисекундах: от 0.05 мс до ~70 с с шагом 25%
+BOUNDS = tuple(0.05 * 1.25 ** i for i in range(64))
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+METRICS = (
+    'wall_ms', 'db_ms', 'db_queries', 'template_ms',
+    'cache_hits', 'cache_misses',
+)
+
+current = ContextVar('perf_stats', default=None)
+MISSING = object()
+
+
+class RequestStats:
+    __slots__ = (
+        'db_queries', 'db_ms', 'template_ms', 'cache_hits',
+        'cache_misses', 'template_depth', 'cache_depth',
+    )
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_depth = 0
+        self.cache_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+    def server_timing(self, wall_ms):
+        return ', '.join((
+            f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'cache;desc="hits={self.cache_hits} '
+            f'misses={self.cache_misses}"',
+            f'total;dur={wall_ms:.1f}',
+        ))
+
+
+class RollingHistogram:
+    """Гистограмма за последние `window * windows` секунд.
+
+    Значения раскладываются по логарифмическим корзинам BOUNDS, окна
+    по `window` секунд вытесняются целиком, так что память постоянна,
+    а квантиль считается с точностью до ширины корзины.
+    """
+
+    def __init__(self, window, windows):
+        self.window = window
+        self.slots = deque(maxlen=windows)
+
+    def add(self, value, now):
+        start = now - now % self.window
+        if not self.slots or self.slots[-1][0] != start:
+            self.slots.append((start, [0] * (len(BOUNDS) + 1)))
+        self.slots[-1][1][bisect_left(BOUNDS, value)] += 1
+
+    def merged(self, now):
+        oldest = now - self.window * self.slots.maxlen
+        counts = [0] * (len(BOUNDS) + 1)
+        for start, slot in self.slots:
+            if start > oldest:
+                for i, count in enumerate(slot):
+                    counts[i] += count
+        return counts
+
+    def quantiles(self, now, quantiles=QUANTILES):
+        counts = self.merged(now)
+        total = sum(counts)
+        result = {}
+        for quantile in quantiles:
+            if not total:
+                result[quantile] = 0.0
+                continue
+            rank = quantile * total
+            seen = 0
+            for i, count in enumerate(counts):
+                seen += count
+                if seen >= rank:
+                    break
+            result[quantile] = BOUNDS[min(i, len(BOUNDS) - 1)]
+        return result, total
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, values, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            histograms = self.views.get(view_name)
+            if histograms is None:
+                histograms = self.views[view_name] = {
+                    metric: RollingHistogram(
+                        settings.PERF_WINDOW, settings.PERF_WINDOWS
+                    )
+                    for metric in METRICS
+                }
+            for metric, value in values.items():
+                histograms[metric].add(value, now)
+
+    def render(self, now=None):
+        """Метрики в текстовом формате Prometheus."""
+        now = time.time() if now is None else now
+        lines = []
+        with self.lock:
+            for view_name, histograms in sorted(self.views.items()):
+                for metric, histogram in histograms.items():
+                    values, total = histogram.quantiles(now)
+                    name = f'yatube_{metric}'
+                    for quantile, value in values.items():
+                        lines.append(
+                            f'{name}{{view="{view_name}",'
+                            f'quantile="{quantile}"}} {value:.3f}'
+                        )
+                    if metric == 'wall_ms':
+                        lines.append(
+                            f'yatube_requests{{view="{view_name}"}} {total}'
+                        )
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = Registry()
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def instrument_template_render():
+    original = Template.render
+
+    def render(self, context):
+        stats = current.get()
+        if stats is None:
+            return original(self, context)
+        # include и extends рендерят вложенные шаблоны — считаем
+        # только внешний, чтобы время не складывалось дважды
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_ms += (time.perf_counter() - started) * 1000
+
+    Template.render = render
+
+
+def instrument_cache(backend_class):
+    original_get = backend_class.get
+    original_get_many = backend_class.get_many
+
+    def get(self, key, default=None, version=None):
+        stats = current.get()
+        if stats is None or stats.cache_depth:
+            return original_get(self, key, default, version)
+        stats.cache_depth += 1
+        try:
+            value = original_get(self, key, MISSING, version)
+        finally:
+            stats.cache_depth -= 1
+        if value is MISSING:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        stats = current.get()
+        if stats is None or stats.cache_depth:
+            return original_get_many(self, keys, version)
+        keys = list(keys)
+        # BaseCache.get_many может звать get — не считаем ключи дважды
+        stats.cache_depth += 1
+        try:
+            found = original_get_many(self, keys, version)
+        finally:
+            stats.cache_depth -= 1
+        stats.cache_hits += len(found)
+        stats.cache_misses += len(keys) - len(found)
+        return found
+
+    backend_class.get = get
+    backend_class.get_many = get_many
+
+
+def install():
+    """Подменяет методы шаблонов и кэшей; повторный вызов ничего не делает."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        instrument_template_render()
+        backends = {type(caches[alias]) for alias in settings.CACHES}
+        for backend_class in backends:
+            instrument_cache(backend_class)
+        _installed = True
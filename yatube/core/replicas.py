@@ -0,0 +1,111 @@
+"""Чтение лент с реплик базы.
+
+Реплики — алиасы settings.DATABASE_REPLICAS (см. yatube/databases.py).
+Запись всегда идёт в основную базу (`default`). Чтение уходит на
+реплику только внутри view, помеченного `replica_reads`, и только для
+GET/HEAD: ленты и страница поста переживут отставание реплики на
+несколько секунд.
+
+Свои изменения пользователь должен видеть сразу, поэтому после
+успешного POST `PinPrimaryMiddleware` ставит cookie, и следующие
+REPLICA_PIN_SECONDS секунд его запросы читают из основной базы. View,
+которые пишут по GET (подписка и отписка), просят о том же явно через
+`mark_written`. Cookie,
+а не сессия: закрепить нужно и гостя, а запись в сессию сама была бы
+лишним запросом к основной базе.
+
+Локально репликацию заменяет `copy_database` (команда sync_replicas):
+снимок основного файла SQLite копируется в файлы реплик.
+"""
+import random
+import sqlite3
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+# сессии и так пишутся в основную базу, и читать их надо оттуда же:
+# на реплике только что созданной сессии ещё может не быть
+PRIMARY_APPS = {'sessions'}
+
+# алиас реплики, выбранной для текущего запроса, или None
+current = ContextVar('replica', default=None)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return current.get()
+
+    def db_for_write(self, model, **hints):
+        # и для объектов, прочитанных с реплики
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # схема реплик приходит с репликацией
+        return db not in settings.DATABASE_REPLICAS
+
+
+def is_pinned(request):
+    return PIN_COOKIE in request.COOKIES
+
+
+def replica_reads(view):
+    """Чтение внутри view — с реплики, если пользователь не закреплён."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas or request.method not in SAFE_METHODS
+            or is_pinned(request)
+        ):
+            return view(request, *args, **kwargs)
+        token = current.set(random.choice(replicas))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            current.reset(token)
+    return wrapper
+
+
+def mark_written(request):
+    """Закрепить пользователя за основной базой, хотя запрос — GET."""
+    request.wrote_primary = True
+
+
+def needs_pin(request):
+    return (
+        request.method not in SAFE_METHODS
+        or getattr(request, 'wrote_primary', False)
+    )
+
+
+def pin_primary(response):
+    response.set_cookie(
+        PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+        httponly=True, samesite='Lax',
+    )
+
+
+def copy_database(source, target):
+    """Копирует SQLite-базу `source` в `target` целиком.
+
+    Backup API даёт согласованный снимок даже под записью; открытые
+    соединения с `target` видят новые данные со следующего запроса.
+    """
+    primary = sqlite3.connect(source)
+    replica = sqlite3.connect(target)
+    try:
+        primary.backup(replica)
+    finally:
+        replica.close()
+        primary.close()
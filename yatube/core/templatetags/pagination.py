@@ -0,0 +1,43 @@
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj, on_each_side=None, on_ends=None):
+    """Номера страниц вокруг текущей; None — пропуск («…»).
+
+    Для пагинатора с неточным числом страниц (`count_is_exact` ложно)
+    хвост не показывается: после окна идёт пропуск.
+    """
+    if on_each_side is None:
+        on_each_side = settings.PAGINATION_WINDOW
+    if on_ends is None:
+        on_ends = settings.PAGINATION_ENDS
+    number = page_obj.number
+    last = page_obj.paginator.num_pages
+    exact = getattr(page_obj.paginator, 'count_is_exact', True)
+    window = []
+    if number > on_ends + on_each_side + 2:
+        window.extend(range(1, on_ends + 1))
+        window.append(None)
+        window.extend(range(number - on_each_side, number))
+    else:
+        window.extend(range(1, number))
+    if not exact:
+        # оценка могла занизить число страниц: текущая и следующая
+        # показываются всегда
+        upper = max(
+            min(number + on_each_side, last), number + int(page_obj.has_next())
+        )
+        window.extend(range(number, upper + 1))
+        if page_obj.has_next():
+            window.append(None)
+    elif number < last - on_ends - on_each_side - 1:
+        window.extend(range(number, number + on_each_side + 1))
+        window.append(None)
+        window.extend(range(last - on_ends + 1, last + 1))
+    else:
+        window.extend(range(number, last + 1))
+    return window
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache
+
+TEMP_CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def make_cache(self, **options):
+        location = os.path.join(TEMP_CACHE_DIR, f'{self.id()}.sqlite3')
+        return SQLiteCache(location, {'OPTIONS': options})
+
+    def test_set_get_delete(self):
+        cache = self.make_cache()
+        cache.set('key', {'value': 1})
+        self.assertEqual(cache.get('key'), {'value': 1})
+        self.assertEqual(cache.get_many(['key', 'missing']), {
+            'key': {'value': 1}
+        })
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+
+    def test_expired_entries_are_misses(self):
+        cache = self.make_cache()
+        cache.set('key', 'value', timeout=0)
+        self.assertIsNone(cache.get('key'))
+        self.assertTrue(cache.add('key', 'new'))
+        self.assertFalse(cache.add('key', 'newer'))
+        self.assertEqual(cache.get('key'), 'new')
+
+    def test_entries_are_shared_between_connections(self):
+        """Два экземпляра (как два воркера) видят общие данные."""
+        first = self.make_cache()
+        second = self.make_cache()
+        first.set('counter', 1)
+        second.incr('counter')
+        self.assertEqual(first.get('counter'), 2)
+        with self.assertRaises(ValueError):
+            first.incr('missing')
+
+    def test_lru_eviction_by_entries(self):
+        cache = self.make_cache(MAX_ENTRIES=4, CULL_FREQUENCY=2)
+        cache.touch_interval = 0
+        for i in range(4):
+            cache.set(f'key{i}', i)
+        cache.get('key0')
+        cache.set('key4', 4)
+        cache.cull()
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertEqual(cache.get('key4'), 4)
+        self.assertIsNone(cache.get('key1'))
+
+    def test_get_many_refreshes_lru(self):
+        cache = self.make_cache(MAX_ENTRIES=4, CULL_FREQUENCY=2)
+        cache.touch_interval = 0
+        for i in range(4):
+            cache.set(f'key{i}', i)
+        cache.get_many(['key0'])
+        cache.set('key4', 4)
+        cache.cull()
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertIsNone(cache.get('key1'))
+
+    def test_hit_counters_are_thread_safe(self):
+        cache = self.make_cache()
+        cache.set('key', 1)
+
+        def read():
+            for _ in range(200):
+                cache.get('key')
+                cache.get_many(['key', 'missing'])
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((cache.hits, cache.misses), (1600, 800))
+
+    def test_eviction_by_size(self):
+        cache = self.make_cache(MAX_SIZE=3000, CULL_FREQUENCY=2)
+        for i in range(5):
+            cache.set(f'key{i}', 'x' * 1000)
+        cache.cull()
+        self.assertIsNone(cache.get('key0'))
+        self.assertIsNotNone(cache.get('key4'))
@@ -0,0 +1,48 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from yatube.databases import PLAIN, TUNED, build_databases
+
+TEMP_DB_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DB_DIR, ignore_errors=True)
+
+    def connect(self, profile):
+        databases = build_databases(TEMP_DB_DIR, profile)
+        connection = ConnectionHandler(databases)['default']
+        self.addCleanup(connection.close)
+        return connection
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_plain_profile_keeps_defaults(self):
+        database = build_databases(TEMP_DB_DIR, PLAIN)['default']
+        self.assertNotIn('PRAGMAS', database)
+        self.assertNotIn('CONN_MAX_AGE', database)
+
+    def test_tuned_profile_applies_pragmas(self):
+        connection = self.connect(TUNED)
+        self.assertGreater(connection.settings_dict['CONN_MAX_AGE'], 0)
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+        # NORMAL = 1, MEMORY = 2
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)
+        self.assertEqual(self.pragma(connection, 'temp_store'), 2)
+        self.assertEqual(self.pragma(connection, 'cache_size'), -64 * 1024)
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 20000)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            build_databases(TEMP_DB_DIR, 'postgres')
@@ -0,0 +1,32 @@
+from django.core.paginator import Paginator
+from django.test import SimpleTestCase
+
+from core.templatetags.pagination import page_window
+
+
+class PageWindowTests(SimpleTestCase):
+
+    def window(self, number, pages=30, **kwargs):
+        page = Paginator(range(pages), 1).page(number)
+        return page_window(page, on_each_side=2, on_ends=1, **kwargs)
+
+    def test_elided_on_both_sides(self):
+        self.assertEqual(
+            self.window(15), [1, None, 13, 14, 15, 16, 17, None, 30]
+        )
+
+    def test_no_elision_near_ends(self):
+        self.assertEqual(self.window(1), [1, 2, 3, None, 30])
+        self.assertEqual(self.window(4), [1, 2, 3, 4, 5, 6, None, 30])
+        self.assertEqual(self.window(30), [1, None, 28, 29, 30])
+
+    def test_few_pages(self):
+        self.assertEqual(self.window(3, pages=5), [1, 2, 3, 4, 5])
+
+    def test_inexact_count_has_no_tail(self):
+        page = Paginator(range(30), 1).page(15)
+        page.paginator.count_is_exact = False
+        self.assertEqual(
+            page_window(page, on_each_side=2, on_ends=1),
+            [1, None, 13, 14, 15, 16, 17, None],
+        )
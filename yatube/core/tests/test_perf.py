@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import perf
+from posts.models import Post
+
+User = get_user_model()
+
+
+class RollingHistogramTests(SimpleTestCase):
+
+    def test_quantiles_within_bucket(self):
+        histogram = perf.RollingHistogram(window=60, windows=5)
+        for value in range(1, 101):
+            histogram.add(value, now=1000)
+        quantiles, total = histogram.quantiles(now=1000)
+        self.assertEqual(total, 100)
+        self.assertAlmostEqual(quantiles[0.5], 50, delta=50 * 0.25)
+        self.assertAlmostEqual(quantiles[0.99], 99, delta=99 * 0.25)
+
+    def test_old_windows_roll_off(self):
+        histogram = perf.RollingHistogram(window=60, windows=2)
+        histogram.add(5, now=0)
+        histogram.add(5, now=60)
+        self.assertEqual(histogram.quantiles(now=90)[1], 2)
+        self.assertEqual(histogram.quantiles(now=150)[1], 1)
+
+
+class PerfMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        perf.registry.clear()
+        self.guest_client = Client()
+
+    @override_settings(PERF_SAMPLE_RATE=1)
+    def test_server_timing_and_metrics(self):
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'auth'})
+        )
+        timing = response['Server-Timing']
+        for part in ('db;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            with self.subTest(part=part):
+                self.assertIn(part, timing)
+        stats = perf.registry.views['posts:profile']
+        self.assertGreater(stats['db_queries'].quantiles(
+            now=perf.time.time()
+        )[0][0.5], 0)
+        self.assertGreater(sum(stats['cache_misses'].merged(
+            now=perf.time.time()
+        )), 0)
+        metrics = self.guest_client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_requests{view="posts:profile"} 1', metrics
+        )
+        self.assertIn(
+            'yatube_template_ms{view="posts:profile",quantile="0.95"}',
+            metrics
+        )
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(perf.registry.views, {})
+
+    def test_metrics_hidden_from_outside(self):
+        response = Client(REMOTE_ADDR='10.0.0.1').get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,188 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.cards import card_cache
+from posts.models import AuthorStats, Group, Post
+from posts.stats import recount_author, recount_site_posts
+from yatube.caches import NO_CACHE
+
+from ..replicas import (PIN_COOKIE, ReplicaRouter, copy_database, current,
+                        replica_reads)
+
+User = get_user_model()
+
+TEMP_DB_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+        @replica_reads
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Post) or 'default')
+
+        self.view = view
+        self.factory = RequestFactory()
+
+    def test_feed_reads_go_to_replica(self):
+        response = self.view(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica1')
+        # вне помеченного view — основная база
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_writes_and_sessions_use_primary(self):
+        token = current.set('replica1')
+        try:
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertEqual(self.router.db_for_read(Session), 'default')
+        finally:
+            current.reset(token)
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+    def test_post_and_pinned_requests_use_primary(self):
+        self.assertEqual(
+            self.view(self.factory.post('/')).content, b'default'
+        )
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.view(request).content, b'default')
+
+
+# единственная «реплика» — сама default: запросы работают, а по
+# current видно, куда бы их отправил роутер
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaViewsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def routed(self, method, url, data=None):
+        aliases = []
+
+        def remember(execute, sql, params, many, context):
+            if '"posts_post"' in sql and sql.startswith('SELECT'):
+                aliases.append(current.get())
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(remember):
+            getattr(self.client, method)(url, data)
+        return set(aliases)
+
+    def test_feed_views_read_from_replica(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.routed('get', url), {'default'})
+        self.assertEqual(
+            self.routed(
+                'get', reverse('posts:post_edit', args=[self.post.pk])
+            ),
+            {None},
+        )
+
+    def test_write_pins_session_to_primary(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+        self.assertEqual(
+            response.cookies[PIN_COOKIE]['max-age'],
+            settings.REPLICA_PIN_SECONDS,
+        )
+        self.assertEqual(self.routed('get', url), {None})
+        self.client.cookies.pop(PIN_COOKIE)
+        self.assertEqual(self.routed('get', url), {'default'})
+
+    def test_follow_pins_session_to_primary(self):
+        author = User.objects.create_user(username='author')
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            with self.subTest(name=name):
+                response = self.client.get(
+                    reverse(name, args=[author.username]),
+                    HTTP_REFERER='/',
+                )
+                self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_replica_pages_skip_card_cache(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.client.get(url)
+        # правка мимо сигналов: версия карточки та же
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        self.client.cookies[PIN_COOKIE] = '1'
+        self.assertContains(self.client.get(url), 'Новый текст')
+        self.assertEqual(card_cache(), 'default')
+        token = current.set('default')
+        try:
+            self.assertEqual(card_cache(), NO_CACHE)
+        finally:
+            current.reset(token)
+
+    def test_recounts_read_primary(self):
+        # несуществующая реплика: любое чтение через роутер упадёт
+        token = current.set('missing')
+        try:
+            recount_author(self.user.pk)
+            self.assertEqual(recount_site_posts(), 1)
+        finally:
+            current.reset(token)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 1
+        )
+
+
+class CopyDatabaseTests(SimpleTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DB_DIR, ignore_errors=True)
+
+    def test_replica_gets_snapshot(self):
+        primary = os.path.join(TEMP_DB_DIR, 'primary.sqlite3')
+        replica = os.path.join(TEMP_DB_DIR, 'replica.sqlite3')
+        with sqlite3.connect(primary) as db:
+            db.execute('CREATE TABLE posts (text TEXT)')
+            db.execute("INSERT INTO posts VALUES ('первый')")
+        db.close()
+        reader = sqlite3.connect(replica)
+        self.addCleanup(reader.close)
+        copy_database(primary, replica)
+        self.assertEqual(
+            reader.execute('SELECT text FROM posts').fetchall(),
+            [('первый',)],
+        )
@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from tasks.metrics import metrics as task_metrics
+
+from . import perf
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +21,19 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Гистограммы core.perf и счётчики фоновых задач.
+
+    Видны только с INTERNAL_IPS и персоналу.
+    """
+    if (
+        request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS
+        and not request.user.is_staff
+    ):
+        raise Http404
+    return HttpResponse(
+        perf.registry.render() + task_metrics.render(),
+        content_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Notification
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'kind', 'actor', 'count', 'unread',
+                    'updated')
+    list_filter = ('kind', 'unread')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Notification, NotificationAdmin)
@@ -0,0 +1,171 @@
+"""Доставка уведомлений пачками со свёрткой в дайджесты.
+
+Уведомление — одна строка на (получатель, тип, предмет). Пока оно не
+прочитано, новые события того же предмета только увеличивают `count`,
+поэтому плодовитый автор даёт подписчику одну строку «N новых постов»,
+а не строку на каждый пост. Пачка получателей обрабатывается
+фиксированным числом запросов: выборка существующих строк, два UPDATE,
+один INSERT через executemany и выборка того, что он вставил.
+
+Непрочитанные считаются в Inbox.unread_count, как счётчики в
+posts.stats: атомарный UPDATE при доставке, а если строки счётчика ещё
+нет, она один раз считается заново при первом чтении.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Inbox, Notification
+
+
+def recount_unread(user_id):
+    inbox = Inbox(
+        user_id=user_id,
+        unread_count=Notification.objects.filter(
+            recipient_id=user_id, unread=True
+        ).count(),
+    )
+    inbox.save()
+    return inbox.unread_count
+
+
+def unread_count(user):
+    count = Inbox.objects.filter(user=user).values_list(
+        'unread_count', flat=True
+    ).first()
+    if count is None:
+        count = recount_unread(user.pk)
+    return count
+
+
+def bump_unread(user_ids, delta):
+    if user_ids:
+        Inbox.objects.filter(user_id__in=user_ids).update(
+            unread_count=F('unread_count') + delta
+        )
+
+
+def insert_notifications(recipient_ids, kind, subject, actor_id, post_id,
+                         now):
+    """Пишет новые уведомления одним executemany.
+
+    На сотнях тысяч получателей bulk_create тратит больше времени на
+    подготовку объектов моделей, чем база — на вставку. Строку, которую
+    успела вставить параллельная доставка того же предмета, пропускаем.
+    """
+    if not recipient_ids:
+        return
+    meta = Notification._meta
+    ops = connection.ops
+    columns = ', '.join(
+        ops.quote_name(meta.get_field(name).column) for name in (
+            'recipient', 'kind', 'subject', 'actor', 'post', 'updated',
+            'count', 'unread',
+        )
+    )
+    # общие для всей пачки значения готовим для базы один раз
+    updated = meta.get_field('updated').get_db_prep_save(now, connection)
+    values = (kind, subject, actor_id, post_id, updated)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'{ops.insert_statement(ignore_conflicts=True)} '
+            f'{ops.quote_name(meta.db_table)} ({columns}) '
+            'VALUES (%s, %s, %s, %s, %s, %s, 1, %s)'
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+            [(pk, *values, True) for pk in recipient_ids],
+        )
+
+
+def deliver(kind, subject, actor_id, post_id, recipient_ids, now=None):
+    """Доставляет одно событие пачке получателей.
+
+    Возвращает (новых строк, свёрнутых в непрочитанные, открытых заново).
+    """
+    now = timezone.now() if now is None else now
+    digests = Notification.objects.filter(
+        kind=kind, subject=subject, recipient_id__in=recipient_ids
+    )
+    states = dict(digests.values_list('recipient_id', 'unread'))
+    latest = {'actor_id': actor_id, 'post_id': post_id, 'updated': now}
+    collapsed = digests.filter(unread=True).update(
+        count=F('count') + 1, **latest
+    )
+    reopened = [pk for pk, unread in states.items() if not unread]
+    if reopened:
+        digests.filter(unread=False).update(count=1, unread=True, **latest)
+    fresh = [pk for pk in recipient_ids if pk not in states]
+    insert_notifications(fresh, kind, subject, actor_id, post_id, now)
+    inserted = []
+    if fresh:
+        # свои строки видны по метке `now`; остальные вставила
+        # параллельная доставка того же предмета, пока мы их выбирали
+        inserted = list(digests.filter(
+            recipient_id__in=fresh, updated=now
+        ).values_list('recipient_id', flat=True))
+    raced = set(fresh) - set(inserted)
+    if raced:
+        collapsed += digests.filter(
+            recipient_id__in=raced, unread=True
+        ).update(count=F('count') + 1, **latest)
+    bump_unread(reopened + inserted, 1)
+    return len(inserted), collapsed, len(reopened)
+
+
+def deliver_in_batches(kind, subject, actor_id, post_id, recipient_ids,
+                       batch_size=None):
+    """Доставляет событие всем получателям, по транзакции на пачку."""
+    batch_size = batch_size or settings.NOTIFICATIONS_BATCH_SIZE
+    now = timezone.now()
+    totals = [0, 0, 0]
+    for start in range(0, len(recipient_ids), batch_size):
+        with transaction.atomic():
+            counts = deliver(
+                kind, subject, actor_id, post_id,
+                recipient_ids[start:start + batch_size], now,
+            )
+        totals = [total + count for total, count in zip(totals, counts)]
+    return tuple(totals)
+
+
+def mark_read(user, pks=None):
+    """Отмечает прочитанными уведомления `pks` или, без них, все."""
+    unread = Notification.objects.filter(recipient=user, unread=True)
+    if pks is None:
+        unread.update(unread=False)
+        Inbox.objects.update_or_create(
+            user=user, defaults={'unread_count': 0}
+        )
+        return
+    bump_unread([user.pk], -unread.filter(pk__in=pks).update(unread=False))
+
+
+def forget_unread(unread):
+    """Вычитает из счётчиков `unread` — {получатель: число} удалённых."""
+    by_delta = {}
+    for recipient, count in unread.items():
+        by_delta.setdefault(count, []).append(recipient)
+    for count, recipients in by_delta.items():
+        bump_unread(recipients, -count)
+
+
+def prune(before, batch_size):
+    """Удаляет уведомления старше `before` и поправляет счётчики."""
+    old = Notification.objects.filter(updated__lt=before).order_by('pk')
+    deleted = 0
+    while True:
+        batch = list(old.values_list('pk', 'recipient_id', 'unread')[
+            :batch_size
+        ])
+        if not batch:
+            return deleted
+        with transaction.atomic():
+            Notification.objects.filter(
+                pk__in=[pk for pk, _, _ in batch]
+            ).delete()
+            forget_unread(Counter(
+                recipient for _, recipient, flag in batch if flag
+            ))
+        deleted += len(batch)
@@ -0,0 +1,91 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notifications.inbox import unread_count
+from notifications.models import Notification
+from notifications.tasks import notify_followers
+from posts.bulk import bulk_create_with_pks
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+CHUNK = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет доставку уведомлений о новом посте автору с большим '
+        'числом подписчиков: первая доставка, свёртка в дайджест и '
+        'повторное открытие прочитанных. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--followers', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['followers'], options['batch_size'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, count, batch_size):
+        started = time.perf_counter()
+        author = User.objects.create_user(username='bench-notify')
+        followers = self.seed_followers(author, count)
+        self.stdout.write(
+            f'Подписчиков: {count}, подготовка '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+        posts = bulk_create_with_pks(Post, [
+            Post(text=f'Пост {i}', author=author) for i in range(3)
+        ])
+        self.measure('первый пост', posts[0], count, batch_size)
+        self.measure('второй пост', posts[1], count, batch_size)
+        # половина подписчиков прочитала — для них дайджест начнётся заново
+        readers = [user.pk for user in followers[:count // 2]]
+        for start in range(0, len(readers), CHUNK):
+            Notification.objects.filter(
+                recipient_id__in=readers[start:start + CHUNK]
+            ).update(unread=False)
+        self.measure('после чтения', posts[2], count, batch_size)
+        rows = Notification.objects.filter(subject=author.pk).count()
+        self.stdout.write(
+            f'Строк уведомлений: {rows}, непрочитанных у первого '
+            f'подписчика: {unread_count(followers[0])}'
+        )
+
+    def seed_followers(self, author, count):
+        """Подписчики и подписки напрямую, минуя сигналы."""
+        followers = []
+        for start in range(0, count, CHUNK):
+            batch = bulk_create_with_pks(User, [
+                User(username=f'bench-notify-{i}', password='!')
+                for i in range(start, min(start + CHUNK, count))
+            ])
+            Follow.objects.bulk_create([
+                Follow(user=user, author=author) for user in batch
+            ])
+            followers.extend(batch)
+        return followers
+
+    def measure(self, name, post, count, batch_size):
+        started = time.perf_counter()
+        created, collapsed, reopened = notify_followers(
+            post.pk, batch_size=batch_size
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name:<13} {elapsed:7.2f} с  '
+            f'{count / elapsed:9.0f} получателей/с  '
+            f'новых {created}, свёрнуто {collapsed}, открыто заново {reopened}'
+        )
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications.inbox import prune
+
+
+class Command(BaseCommand):
+    help = 'Удаляет уведомления старше NOTIFICATIONS_TTL_DAYS дней.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.NOTIFICATIONS_TTL_DAYS,
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        deleted = prune(before, options['batch_size'])
+        self.stdout.write(f'Удалено уведомлений: {deleted}')
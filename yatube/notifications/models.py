@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class Notification(models.Model):
+    """Свёрнутое уведомление: одна строка на получателя и предмет.
+
+    Новые посты одного автора (или комментарии к одному посту), пришедшие,
+    пока уведомление не прочитано, только увеличивают `count`.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = (
+        (POST, 'Новые посты автора'),
+        (COMMENT, 'Новые комментарии к посту'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    kind = models.CharField('Тип', max_length=10, choices=KINDS)
+    subject = models.PositiveIntegerField(
+        'Предмет',
+        help_text='id автора для новых постов, id поста для комментариев',
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор последнего события',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True, null=True,
+        verbose_name='Пост',
+    )
+    count = models.PositiveIntegerField('Событий', default=1)
+    unread = models.BooleanField('Не прочитано', default=True)
+    updated = models.DateTimeField('Последнее событие', db_index=True)
+
+    class Meta:
+        ordering = ('-updated',)
+        indexes = [
+            models.Index(
+                fields=['recipient', '-updated'],
+                name='notification_recipient_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'kind', 'subject'],
+                name='unique_notification_digest',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient_id}: {self.kind} {self.subject} x{self.count}'
+
+
+class Inbox(models.Model):
+    """Счётчик непрочитанных уведомлений пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='inbox',
+        verbose_name='Пользователь',
+    )
+    unread_count = models.IntegerField('Непрочитанных', default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread_count}'
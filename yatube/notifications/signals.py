@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from posts.models import Comment, Post
+
+from . import tasks
+from .inbox import forget_unread
+from .models import Inbox, Notification
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    # у нового пользователя ящик пуст: пересчитывать при первом чтении нечего
+    if created and not raw:
+        Inbox.objects.get_or_create(user=instance)
+
+
+@receiver(pre_delete, sender=User)
+def actor_deleted(sender, instance, **kwargs):
+    # уведомления, где он автор последнего события, удалит каскад —
+    # их непрочитанные надо вычесть из счётчиков получателей заранее
+    unread = Notification.objects.filter(
+        actor=instance, unread=True
+    ).exclude(recipient=instance).values('recipient_id').annotate(
+        count=Count('pk')
+    ).order_by().values_list('recipient_id', 'count')
+    forget_unread(dict(unread))
+
+
+@receiver(post_save, sender=Post)
+def post_published(sender, instance, created, **kwargs):
+    if created:
+        tasks.notify_followers.delay(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_published(sender, instance, created, **kwargs):
+    if created:
+        tasks.notify_post_author.delay(instance.pk)
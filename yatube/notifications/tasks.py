@@ -0,0 +1,39 @@
+from posts.models import Comment, Follow, Post
+from tasks.background import task
+
+from .inbox import deliver, deliver_in_batches
+from .models import Notification
+
+
+@task
+def notify_followers(post_id, batch_size=None):
+    """Новый пост: уведомление всем подписчикам автора."""
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    follower_ids = list(
+        Follow.objects.filter(author_id=author_id)
+        .order_by('user_id').values_list('user_id', flat=True)
+    )
+    return deliver_in_batches(
+        Notification.POST, author_id, author_id, post_id, follower_ids,
+        batch_size,
+    )
+
+
+@task
+def notify_post_author(comment_id):
+    """Новый комментарий: уведомление автору поста, если это не он сам."""
+    comment = Comment.objects.filter(pk=comment_id).values_list(
+        'author_id', 'post_id', 'post__author_id'
+    ).first()
+    if comment is None:
+        return None
+    author_id, post_id, recipient_id = comment
+    if author_id == recipient_id:
+        return None
+    return deliver(
+        Notification.COMMENT, post_id, author_id, post_id, [recipient_id]
+    )
@@ -0,0 +1,150 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post
+
+from .. import inbox
+from ..inbox import unread_count
+from ..models import Notification
+
+User = get_user_model()
+
+
+@override_settings(TASKS_MODE='eager', NOTIFICATIONS_BATCH_SIZE=2)
+class NotificationTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'follower{i}')
+            for i in range(5)
+        ]
+        Follow.objects.bulk_create([
+            Follow(user=user, author=cls.author) for user in cls.followers
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.followers[0])
+
+    def test_posts_collapse_into_digest(self):
+        for i in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        digests = Notification.objects.filter(kind=Notification.POST)
+        self.assertEqual(digests.count(), len(self.followers))
+        self.assertEqual(set(digests.values_list('count', flat=True)), {3})
+        for user in self.followers:
+            self.assertEqual(unread_count(user), 1)
+
+    def test_concurrent_delivery_collapses_instead_of_double_count(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Notification.objects.all().delete()
+        racer = self.followers[1]
+        inbox.mark_read(racer)
+        insert = inbox.insert_notifications
+
+        def race(recipient_ids, *args):
+            # другая доставка вставила строку между выборкой и INSERT
+            *event, now = args
+            insert([racer.pk], *event, now - timedelta(seconds=1))
+            inbox.bump_unread([racer.pk], 1)
+            insert(recipient_ids, *args)
+
+        with mock.patch.object(inbox, 'insert_notifications', race):
+            counts = inbox.deliver(
+                Notification.POST, self.author.pk, self.author.pk, post.pk,
+                [racer.pk, self.followers[2].pk],
+            )
+        self.assertEqual(counts, (1, 1, 0))
+        self.assertEqual(racer.notifications.get().count, 2)
+        self.assertEqual(unread_count(racer), 1)
+
+    def test_inbox_marks_read_and_reopens_digest(self):
+        Post.objects.create(author=self.author, text='Первый')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Уведомления (1)')
+        response = self.client.get(reverse('notifications:inbox'))
+        self.assertContains(response, 'опубликовал новую запись')
+        self.assertEqual(unread_count(self.followers[0]), 0)
+        post = Post.objects.create(author=self.author, text='Второй')
+        notification = self.followers[0].notifications.get()
+        self.assertEqual(notification.count, 1)
+        self.assertEqual(notification.post, post)
+        self.assertTrue(notification.unread)
+        self.assertEqual(unread_count(self.followers[0]), 1)
+        self.assertEqual(unread_count(self.followers[1]), 1)
+
+    def test_inbox_marks_only_rendered_page(self):
+        reader = self.followers[0]
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=reader, kind=Notification.POST, subject=subject,
+                actor=self.author, updated=timezone.now(),
+            )
+            for subject in range(settings.TEN + 1)
+        ])
+        self.assertEqual(inbox.recount_unread(reader.pk), settings.TEN + 1)
+        self.client.get(reverse('notifications:inbox'))
+        self.assertEqual(unread_count(reader), 1)
+        self.client.get(reverse('notifications:inbox') + '?page=2')
+        self.assertEqual(unread_count(reader), 0)
+
+    def test_deleted_actor_leaves_counters_consistent(self):
+        commenter = User.objects.create_user(username='commenter')
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=commenter, text='Ответ')
+        self.assertEqual(unread_count(self.author), 1)
+        commenter.delete()
+        self.assertFalse(self.author.notifications.exists())
+        self.assertEqual(unread_count(self.author), 0)
+        self.assertEqual(unread_count(self.followers[2]), 1)
+
+    def test_comment_notifies_post_author(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.author, text='Сам')
+        self.assertEqual(unread_count(self.author), 0)
+        for user in self.followers[:2]:
+            Comment.objects.create(post=post, author=user, text='Ответ')
+        notification = self.author.notifications.get()
+        self.assertEqual(notification.kind, Notification.COMMENT)
+        self.assertEqual(notification.count, 2)
+        self.assertEqual(notification.actor, self.followers[1])
+        self.assertEqual(unread_count(self.author), 1)
+
+    def test_prune_removes_old_and_fixes_counters(self):
+        Post.objects.create(author=self.author, text='Пост')
+        unread_count(self.followers[0])
+        Notification.objects.filter(recipient=self.followers[0]).update(
+            updated=timezone.now() - timedelta(days=60)
+        )
+        output = StringIO()
+        call_command('prune_notifications', days=30, stdout=output)
+        self.assertIn('Удалено уведомлений: 1', output.getvalue())
+        self.assertEqual(unread_count(self.followers[0]), 0)
+        self.assertEqual(
+            Notification.objects.count(), len(self.followers) - 1
+        )
+
+    def test_inbox_requires_login(self):
+        response = Client().get(reverse('notifications:inbox'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_bench_command(self):
+        output = StringIO()
+        call_command('bench_notifications', followers=20, stdout=output)
+        self.assertIn('Строк уведомлений: 20', output.getvalue())
+        self.assertFalse(User.objects.filter(
+            username__startswith='bench-notify'
+        ).exists())
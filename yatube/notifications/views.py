@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.shortcuts import render
+
+from .inbox import mark_read
+
+
+@login_required
+def inbox(request):
+    notifications = request.user.notifications.select_related(
+        'actor', 'post'
+    )
+    paginator = Paginator(notifications, settings.TEN)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    # непрочитанные выделяются на этой странице, поэтому отмечаем
+    # прочитанным уже после выборки — и только то, что на ней показано
+    page_obj.object_list = list(page_obj.object_list)
+    mark_read(request.user, [
+        notification.pk for notification in page_obj.object_list
+        if notification.unread
+    ])
+    return render(request, 'notifications/inbox.html', {
+        'page_obj': page_obj,
+    })
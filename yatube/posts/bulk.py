@@ -0,0 +1,42 @@
+"""Помощники для массовой записи через bulk_create.
+
+bulk_create не вызывает save() и сигналы, поэтому производные данные
+(ленты, счётчики, поисковый индекс) после него строятся отдельно.
+"""
+from contextlib import contextmanager
+
+
+@contextmanager
+def explicit_created(*models):
+    """Даёт bulk_create записать свою дату вместо auto_now_add."""
+    fields = [model._meta.get_field('created') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def bulk_create_with_pks(model, objs):
+    """bulk_create, после которого у объектов проставлены pk.
+
+    SQLite (в отличие от PostgreSQL) не возвращает pk вставленных
+    строк, поэтому они дочитываются по возрастанию pk после последнего
+    существующего. Вызывать внутри транзакции: в SQLite она
+    сериализует записи, и чужие строки в середину не попадут.
+    """
+    if not objs:
+        return objs
+    last = model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+    model.objects.bulk_create(objs)
+    if objs[0].pk is None:
+        pks = model.objects.filter(pk__gt=last).order_by('pk').values_list(
+            'pk', flat=True
+        )
+        for obj, pk in zip(objs, pks):
+            obj.pk = pk
+    return objs
@@ -0,0 +1,78 @@
+"""Поколенческий кэш карточек постов.
+
+Отрендеренная карточка кэшируется тегом `{% cache %}` под ключом из
+версий поста, его автора и группы. Правка поста, новый комментарий,
+переименование группы или смена имени автора увеличивают только свою
+версию, и затронутые карточки просто перестают совпадать по ключу —
+остальные продолжают браться из кэша.
+
+Карточки, отрендеренные по данным реплики, в общий кэш не попадают:
+версия сдвигается сразу, а реплика ещё отдаёт старый текст, и карточка
+закэшировалась бы под новой версией на POST_CARD_TIMEOUT — для всех,
+включая автора правки. Такие запросы рендерят фрагмент через
+заглушку `card_cache()`, не читая и не заполняя кэш.
+"""
+import time
+
+from django.core.cache import cache
+
+from core.replicas import current
+from yatube.caches import NO_CACHE
+
+VERSION_KEY = 'card:{kind}:{pk}'
+# общая версия всех лент: сдвигается, когда меняется уже опубликованное
+FEEDS = 'feeds'
+
+
+def version_key(kind, pk):
+    return VERSION_KEY.format(kind=kind, pk=pk)
+
+
+def new_version():
+    # версия от времени не повторится, даже если счётчик вытеснен из кэша
+    return int(time.time() * 1000)
+
+
+def bump(kind, pk):
+    key = version_key(kind, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), None)
+
+
+def current_version(kind, pk=0):
+    key = version_key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        version = new_version()
+        cache.set(key, version, None)
+    return version
+
+
+def card_cache():
+    """Алиас кэша для `{% cache ... using=card_cache %}`."""
+    return NO_CACHE if current.get() else 'default'
+
+
+def attach_card_keys(posts):
+    """Проставляет постам `card_key` — версию для ключа фрагмента."""
+    keys = set()
+    for post in posts:
+        keys.add(version_key('post', post.pk))
+        keys.add(version_key('author', post.author_id))
+        if post.group_id:
+            keys.add(version_key('group', post.group_id))
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys - versions.keys()}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    for post in posts:
+        post.card_key = '.'.join(str(part) for part in (
+            post.pk,
+            versions[version_key('post', post.pk)],
+            versions[version_key('author', post.author_id)],
+            versions.get(version_key('group', post.group_id), 0),
+        ))
+    return posts
@@ -0,0 +1,94 @@
+"""Ветки комментариев и их постраничная выдача.
+
+Комментарии поста отдаются в порядке пути (см. `Comment.path`): это
+обход дерева в глубину, ответы идут сразу под своим комментарием.
+Страница — keyset по пути: `path > после_последнего` с LIMIT по
+индексу (post, path), без OFFSET и COUNT(*). Следующие страницы
+подгружает фрагмент `posts:comment_list`.
+"""
+import re
+
+from django.conf import settings
+
+from .models import PATH_SEGMENT, Comment, path_segment
+from .paginator import CursorPage
+
+CURSOR_RE = re.compile(rf'(?:[0-9a-z]{{{PATH_SEGMENT}}})+')
+
+
+def parse_cursor(value):
+    """Путь из `?after=`; для мусора — None (тогда с начала)."""
+    if value and len(value) <= 255 and CURSOR_RE.fullmatch(value):
+        return value
+    return None
+
+
+class CommentPage(CursorPage):
+    """Страница комментариев; курсор следующей — путь последнего."""
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return self.object_list[-1].path
+        return None
+
+
+def comment_page(post_id, after=None, root=None, per_page=None):
+    """Страница комментариев поста после пути `after`.
+
+    С `root` — только ветка этого комментария, вместе с ним самим.
+    """
+    per_page = per_page or settings.COMMENTS_PAGE_SIZE
+    comments = Comment.objects.filter(post_id=post_id)
+    if root is not None:
+        comments = comments.subtree(root.path)
+    after = parse_cursor(after)
+    if after:
+        comments = comments.filter(path__gt=after)
+    rows = list(
+        comments.select_related('author').order_by('path')[:per_page + 1]
+    )
+    return CommentPage(
+        rows[:per_page], None,
+        has_next=len(rows) > per_page, has_previous=bool(after),
+    )
+
+
+def reply_parent(post, parent_id):
+    """Комментарий, под которым встанет ответ, или None.
+
+    Ответ глубже COMMENT_MAX_DEPTH цепляется к предку на последнем
+    допустимом уровне: его pk — сегмент в пути родителя, так что
+    лишнего запроса не нужно.
+    """
+    try:
+        parent = Comment.objects.only('pk', 'path').get(
+            pk=int(parent_id), post=post
+        )
+    except (TypeError, ValueError, Comment.DoesNotExist):
+        return None
+    limit = settings.COMMENT_MAX_DEPTH * PATH_SEGMENT
+    if len(parent.path) >= limit:
+        path = parent.path[:limit]
+        parent = Comment(
+            pk=int(path[-PATH_SEGMENT:], 36), post=post, path=path
+        )
+    return parent
+
+
+def assign_paths(comments):
+    """Проставляет пути комментариям после bulk_create_with_pks.
+
+    Родители ищутся среди самих `comments` (они раньше по pk), а
+    остальные дочитываются одним запросом.
+    """
+    comments = sorted(comments, key=lambda comment: comment.pk)
+    paths = dict(Comment.objects.filter(
+        pk__in={comment.parent_id for comment in comments} - {None}
+    ).values_list('pk', 'path'))
+    for comment in comments:
+        prefix = paths.get(comment.parent_id, '') if comment.parent_id else ''
+        comment.path = prefix + path_segment(comment.pk)
+        paths[comment.pk] = comment.path
+    Comment.objects.bulk_update(comments, ['path'])
+    return comments
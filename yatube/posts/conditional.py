@@ -0,0 +1,136 @@
+"""Условные ответы (304 Not Modified) для HTML-страниц постов.
+
+Декоратор `conditional_page` считает для страницы дешёвый валидатор —
+несколько индексных выборок и версий из кэша — и сравнивает ETag с
+If-None-Match до вызова view, то есть до запросов за постами и
+рендеринга шаблона. Страницы гостя и вошедшего пользователя (кнопки
+подписки, ссылки на правку, шапка) различаются, поэтому в ETag входит
+вариант: гость или id пользователя с числом его непрочитанных
+уведомлений.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from notifications.inbox import unread_count
+
+from . import cards, graph
+from .models import Comment, Group, Post
+from .stats import author_stats, group_stats
+from .suggestions import suggested_for_request
+
+User = get_user_model()
+
+
+def conditional_page(validator):
+    """Отвечает 304, если валидатор страницы не изменился.
+
+    `validator(request, *args, **kwargs)` возвращает пару (части ETag,
+    Last-Modified или None) либо None, если объекта нет — тогда view
+    вызывается как есть (и, например, отдаёт 404).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            validators = validator(request, *args, **kwargs)
+            if validators is None:
+                return view(request, *args, **kwargs)
+            parts, last_modified = validators
+            user = request.user
+            # шапка показывает число непрочитанных уведомлений
+            variant = (
+                f'user:{user.pk}:{unread_count(user)}'
+                if user.is_authenticated else 'guest'
+            )
+            raw = repr((variant, request.get_full_path(), parts))
+            etag = f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    response['ETag'] = etag
+                    if last_modified:
+                        response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
+
+
+def newest(queryset):
+    return queryset.order_by('-created', '-pk').values_list(
+        'created', 'pk'
+    ).first()
+
+
+def following(request, author_id):
+    return graph.is_following(request.user, author_id)
+
+
+def followees_version(request):
+    # у карточек ссылка «подписаться» зависит от подписок зрителя
+    if not request.user.is_authenticated:
+        return None
+    return hash(graph.followees(request.user.pk))
+
+
+def group_validator(request, slug):
+    """Группа: её версия, свежий пост, счётчики, подписки зрителя."""
+    group = Group.objects.filter(slug=slug).values_list('pk', flat=True)
+    group_id = group.first()
+    if group_id is None:
+        return None
+    stats = group_stats(group_id)
+    return (
+        newest(Post.objects.filter(group_id=group_id)),
+        stats.posts_count, stats.comments_count,
+        cards.current_version('group', group_id),
+        cards.current_version(cards.FEEDS),
+        followees_version(request),
+    ), None
+
+
+def profile_validator(request, username):
+    """Профиль: свежий пост, счётчики автора, подписка и «Кого почитать»."""
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    stats = author_stats(author_id)
+    return (
+        newest(Post.objects.filter(author_id=author_id)),
+        stats.posts_count, stats.followers_count, stats.following_count,
+        following(request, author_id),
+        cards.current_version(cards.FEEDS),
+        [row.candidate_id for row in suggested_for_request(request)],
+    ), None
+
+
+def detail_validator(request, post_id):
+    """Пост: время правки, число и свежесть комментариев."""
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'updated'
+    ).first()
+    if post is None:
+        return None
+    author_id, updated = post
+    comments = Comment.objects.filter(post_id=post_id).order_by().aggregate(
+        count=Count('pk'), newest=Max('created')
+    )
+    last_modified = max(filter(None, (updated, comments['newest'])))
+    return (
+        updated, comments['count'],
+        author_stats(author_id).posts_count,
+        following(request, author_id),
+        cards.current_version('post', post_id),
+        cards.current_version(cards.FEEDS),
+    ), int(last_modified.timestamp())
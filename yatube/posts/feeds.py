@@ -0,0 +1,126 @@
+"""Atom- и RSS-ленты постов, которые отдаются потоком.
+
+django.contrib.syndication собирает весь документ в памяти. Здесь
+генераторы feedgenerator пишут XML кусками: заголовок ленты, затем
+записи по мере чтения из `.iterator()`, затем закрывающие теги. Готовый
+документ, если он не слишком велик, заодно кладётся в кэш под ключом из
+самого свежего поста ленты, так что повторные запросы к той же группе
+или автору отдаются из кэша, пока не выйдет новый пост.
+"""
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from . import cards
+
+FEED_KEY = 'feed:{origin}:{feed_type}:{scope}:{newest}:{version}'
+
+
+class StreamingFeedMixin:
+    newest = None
+    item_element = None
+
+    def latest_post_date(self):
+        # элементы не копятся в self.items — дату берём из запроса
+        return self.newest or super().latest_post_date()
+
+    def stream(self, items, chunk_items=20):
+        buffer = StringIO()
+        handler = SimplerXMLGenerator(buffer, 'utf-8')
+        handler.startDocument()
+        self.open_document(handler)
+        for number, item in enumerate(items, 1):
+            handler.startElement(
+                self.item_element, self.item_attributes(item)
+            )
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            if number % chunk_items == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        self.close_document(handler)
+        yield buffer.getvalue()
+
+    def make_item(self, **kwargs):
+        """Словарь записи со значениями по умолчанию, как в add_item."""
+        self.add_item(**kwargs)
+        return self.items.pop()
+
+
+class StreamingAtomFeed(StreamingFeedMixin, Atom1Feed):
+    item_element = 'entry'
+
+    def open_document(self, handler):
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def close_document(self, handler):
+        handler.endElement('feed')
+
+
+class StreamingRssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    item_element = 'item'
+
+    def open_document(self, handler):
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def close_document(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+FEED_TYPES = {'atom': StreamingAtomFeed, 'rss': StreamingRssFeed}
+
+
+def newest_created(queryset):
+    return queryset.order_by('-created', '-pk').values_list(
+        'created', flat=True
+    ).first()
+
+
+def feed_cache_key(request, feed_type, scope, newest):
+    # в документе абсолютные ссылки: у каждого хоста и схемы своя копия
+    return FEED_KEY.format(
+        origin=f'{request.scheme}://{request.get_host()}',
+        feed_type=feed_type, scope=scope,
+        newest=newest.timestamp() if newest else 0,
+        version=cards.current_version(cards.FEEDS),
+    )
+
+
+def post_items(feed, queryset, absolute_url):
+    posts = queryset.order_by('-created', '-pk')[:settings.FEED_ITEMS]
+    for post in posts.iterator(chunk_size=settings.FEED_ITEMS):
+        link = absolute_url(reverse('posts:post_detail', args=[post.pk]))
+        yield feed.make_item(
+            title=post.text[:settings.FEED_TITLE_LENGTH],
+            link=link,
+            unique_id=link,
+            description=post.text,
+            author_name=post.author.get_full_name() or post.author.username,
+            pubdate=post.created,
+            categories=[post.group.title] if post.group_id else None,
+        )
+
+
+def cache_stream(chunks, key):
+    """Отдаёт куски дальше и кэширует документ, если он не велик."""
+    collected = []
+    size = 0
+    for chunk in chunks:
+        if collected is not None:
+            size += len(chunk)
+            if size > settings.FEED_CACHE_MAX_SIZE:
+                collected = None
+            else:
+                collected.append(chunk)
+        yield chunk
+    if collected is not None:
+        cache.set(key, ''.join(collected), settings.FEED_CACHE_TIMEOUT)
@@ -1,6 +1,7 @@
 from django import forms
 
-from .models import Comment, Post
+from .images import validate_image
+from .models import Comment, Group, Post
 
 
 class PostForm(forms.ModelForm):
@@ -16,6 +17,13 @@ class PostForm(forms.ModelForm):
             'group': 'Группа поста',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # новая загрузка; у сохранённой картинки нет content_type
+        if image and hasattr(image, 'content_type'):
+            validate_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -27,3 +35,14 @@ class CommentForm(forms.ModelForm):
         labels = {
             'text': 'Текст комментарии',
         }
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Поиск', max_length=200)
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        to_field_name='slug',
+        required=False,
+        label='Группа',
+    )
+    author = forms.CharField(label='Автор', max_length=150, required=False)
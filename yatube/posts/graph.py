@@ -0,0 +1,122 @@
+"""Граф подписок в кэше.
+
+Для каждого пользователя кэшируются два множества id: на кого он
+подписан (followees) и кто подписан на него (followers). Множество
+читается из таблицы Follow при первом обращении. Проверка «подписан
+ли» — поиск в множестве, а страница ленты обходится одним `get_many`
+на всех авторов.
+
+Сигналы подписки и отписки не правят множества на месте, а сбрасывают
+оба затронутых (`edge_changed`): сразу и ещё раз после коммита.
+Правка «прочитать — изменить — записать» теряла ребро, когда один
+пользователь подписывался в двух вкладках, и оставляла в кэше ребро
+откатившейся транзакции. Перечитать множество — один запрос по
+индексу. Массовые загрузки (bulk_create) сигналов не шлют и сбрасывают
+затронутых пользователей через `forget`.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Follow
+
+FOLLOWEES = 'graph:followees:{}'
+FOLLOWERS = 'graph:followers:{}'
+
+
+def load(template, ids, field, other):
+    """Множества по ключам `template` для всех `ids`: кэш, затем база."""
+    keys = {template.format(pk): pk for pk in ids}
+    found = cache.get_many(keys)
+    sets = {keys[key]: value for key, value in found.items()}
+    missing = [pk for pk in ids if pk not in sets]
+    if missing:
+        loaded = {pk: set() for pk in missing}
+        # кэш общий для всех: читаем из основной базы, а не с
+        # отстающей реплики (core.replicas)
+        rows = Follow.objects.using(DEFAULT_DB_ALIAS).filter(
+            **{f'{field}__in': missing}
+        ).values_list(field, other)
+        for pk, neighbour in rows:
+            loaded[pk].add(neighbour)
+        cache.set_many(
+            {template.format(pk): frozenset(value)
+             for pk, value in loaded.items()},
+            settings.FOLLOW_GRAPH_TIMEOUT,
+        )
+        sets.update(
+            (pk, frozenset(value)) for pk, value in loaded.items()
+        )
+    return sets
+
+
+def followees_many(user_ids):
+    return load(FOLLOWEES, set(user_ids), 'user_id', 'author_id')
+
+
+def followers_many(author_ids):
+    return load(FOLLOWERS, set(author_ids), 'author_id', 'user_id')
+
+
+def followees(user_id):
+    """id авторов, на которых подписан пользователь."""
+    return followees_many([user_id])[user_id]
+
+
+def followers(author_id):
+    """id подписчиков автора."""
+    return followers_many([author_id])[author_id]
+
+
+def is_following(user, author_id):
+    return user.is_authenticated and author_id in followees(user.pk)
+
+
+def followed_among(user, author_ids):
+    """Кто из `author_ids` в подписках пользователя — для целой ленты."""
+    if not user.is_authenticated:
+        return set()
+    return followees(user.pk) & set(author_ids)
+
+
+def mutual(user_id):
+    """Взаимные подписки: он подписан, и на него подписаны."""
+    return followees(user_id) & followers(user_id)
+
+
+def suggestions(user_id, limit=10):
+    """На кого подписаны те, на кого подписан пользователь.
+
+    Кандидаты упорядочены по числу таких «общих знакомых»; сам
+    пользователь и уже отслеживаемые авторы исключены.
+    """
+    own = followees(user_id)
+    counts = Counter()
+    for neighbours in followees_many(own).values():
+        counts.update(neighbours)
+    for pk in own | {user_id}:
+        counts.pop(pk, None)
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [pk for pk, _ in ranked[:limit]]
+
+
+def edge_changed(user_id, author_id):
+    """Сбрасывает множества концов ребра после подписки или отписки.
+
+    Сброс после коммита убирает то, что успели перечитать из базы до
+    него; немедленный — нужен самой транзакции (и тестам, где коммита
+    нет). После отката в кэше просто не окажется ни одного из множеств.
+    """
+    keys = [FOLLOWEES.format(user_id), FOLLOWERS.format(author_id)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget(user_ids):
+    """Сбрасывает множества пользователей после массовой правки Follow."""
+    cache.delete_many([
+        template.format(pk)
+        for pk in user_ids for template in (FOLLOWEES, FOLLOWERS)
+    ])
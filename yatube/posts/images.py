@@ -0,0 +1,164 @@
+"""Проверка и обработка картинок постов.
+
+Загрузка больше FILE_UPLOAD_MAX_MEMORY_SIZE пишется Django во временный
+файл кусками, так что форма проверяет размер, формат и число пикселей,
+не держа файл в памяти целиком (PIL при проверке читает только
+заголовок). Всё тяжёлое делает фоновая задача после коммита:
+
+- оригинал перекодируется без EXIF (там бывают координаты съёмки) и
+  уменьшается до POST_IMAGE_MAX_SIDE по большей стороне;
+- карточка режется под пропорции POST_THUMBNAIL_GEOMETRY в ширинах
+  POST_IMAGE_WIDTHS, в JPEG и, если PIL собран с её поддержкой, в WebP;
+- готовые `srcset` записываются в пост, и шаблону остаётся их вывести.
+"""
+import hashlib
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps, features
+
+# форматы, в которых бывают EXIF и другие метаданные; GIF не трогаем,
+# чтобы не потерять анимацию
+REENCODE = {'JPEG': {'quality': 85, 'optimize': True},
+            'PNG': {'optimize': True},
+            'WEBP': {'quality': 85}}
+JPEG_OPTIONS = {'quality': 80, 'optimize': True, 'progressive': True}
+WEBP_OPTIONS = {'quality': 75, 'method': 4}
+VARIANTS_DIR = 'posts/variants'
+
+
+def validate_image(image):
+    """Проверяет загруженную картинку: размер файла, формат и пиксели.
+
+    `image` — файл, уже прошедший ImageField: у него есть `.image`
+    с открытым (но не декодированным) изображением PIL.
+    """
+    if image.size > settings.POST_IMAGE_MAX_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            params={'limit': filesizeformat(settings.POST_IMAGE_MAX_SIZE)},
+            code='file_too_large',
+        )
+    picture = getattr(image, 'image', None)
+    if picture is None:
+        return
+    if picture.format not in settings.POST_IMAGE_FORMATS:
+        raise ValidationError(
+            'Поддерживаются только %(formats)s.',
+            params={'formats': ', '.join(settings.POST_IMAGE_FORMATS)},
+            code='invalid_format',
+        )
+    width, height = picture.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение картинки.', code='too_many_pixels'
+        )
+
+
+def base_size():
+    """Ширина и высота карточки из POST_THUMBNAIL_GEOMETRY ('960x339')."""
+    width, height = settings.POST_THUMBNAIL_GEOMETRY.split('x')
+    return int(width), int(height)
+
+
+def card_size(width):
+    base_width, base_height = base_size()
+    return width, round(width * base_height / base_width)
+
+
+def encode(picture, image_format, **options):
+    buffer = BytesIO()
+    picture.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def flatten(picture):
+    """RGB без альфа-канала: JPEG прозрачность не хранит."""
+    if picture.mode in ('RGBA', 'LA', 'P'):
+        picture = picture.convert('RGBA')
+        background = Image.new('RGB', picture.size, (255, 255, 255))
+        background.paste(picture, mask=picture.getchannel('A'))
+        return background
+    return picture.convert('RGB')
+
+
+def has_metadata(picture):
+    return bool(picture.info.get('exif') or picture.getexif())
+
+
+def strip_original(name, picture):
+    """Сохраняет оригинал без метаданных; возвращает имя чистой копии.
+
+    Копия пишется рядом под новым именем, а старый файл удаляет
+    вызывающий, когда пост уже ссылается на копию: файла по ссылке из
+    базы не бывает «нет» ни на миг. Чистый оригинал в допустимых
+    размерах не трогаем: повторная обработка (generate_thumbnails
+    --all) не должна каждый раз пережимать JPEG.
+    """
+    options = REENCODE.get(picture.format)
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    if options is None or (
+        not has_metadata(picture) and max(picture.size) <= max_side
+    ):
+        return name
+    image_format = picture.format
+    clean = ImageOps.exif_transpose(picture)
+    clean.thumbnail((max_side, max_side), Image.LANCZOS)
+    if image_format == 'JPEG':
+        clean = flatten(clean)
+    content = encode(clean, image_format, **options)
+    return default_storage.save(name, content)
+
+
+def build_variants(post_id, name, picture):
+    """Режет карточки во всех ширинах.
+
+    Возвращает (URL карточки базовой ширины, srcset JPEG, srcset WebP).
+    """
+    picture = flatten(ImageOps.exif_transpose(picture))
+    base_width = base_size()[0]
+    # карточка базовой ширины нужна всегда, даже растянутая из маленькой
+    widths = sorted({
+        width for width in settings.POST_IMAGE_WIDTHS
+        if width <= picture.width or width == base_width
+    })
+    # имя файла зависит от оригинала: новая картинка — новые URL
+    stem = hashlib.md5(name.encode()).hexdigest()[:12]
+    folder = posixpath.join(VARIANTS_DIR, str(post_id))
+    formats = [('jpg', 'JPEG', JPEG_OPTIONS)]
+    if features.check('webp'):
+        formats.append(('webp', 'WEBP', WEBP_OPTIONS))
+    srcsets = {extension: [] for extension, _, _ in formats}
+    saved = set()
+    src = ''
+    for width in widths:
+        card = ImageOps.fit(
+            picture, card_size(width), Image.LANCZOS, centering=(0.5, 0.5)
+        )
+        for extension, image_format, options in formats:
+            variant = posixpath.join(folder, f'{stem}-{width}.{extension}')
+            if default_storage.exists(variant):
+                default_storage.delete(variant)
+            variant = default_storage.save(
+                variant, encode(card, image_format, **options)
+            )
+            saved.add(posixpath.basename(variant))
+            url = default_storage.url(variant)
+            srcsets[extension].append(f'{url} {width}w')
+            if width == base_width and extension == 'jpg':
+                src = url
+    remove_stale_variants(folder, saved)
+    return src, ', '.join(srcsets['jpg']), ', '.join(srcsets.get('webp', []))
+
+
+def remove_stale_variants(folder, keep):
+    if not default_storage.exists(folder):
+        return
+    for filename in default_storage.listdir(folder)[1]:
+        if filename not in keep:
+            default_storage.delete(posixpath.join(folder, filename))
@@ -0,0 +1,90 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.bulk import bulk_create_with_pks
+from posts.models import Group, Post
+from posts.search import insert_postings, post_postings, search_posts
+
+User = get_user_model()
+
+VOCABULARY = [f'слово{i}' for i in range(5000)]
+QUERIES = {
+    'редкое слово': 'иголка',
+    'два слова': 'иголка стог',
+    'частое слово': 'слово1',
+}
+NEEDLES = 20
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку поиска на синтетических постах разного объёма. '
+        'Данные создаются в транзакции и откатываются после замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10000,100000',
+            help='Число постов через запятую, например 10000,100000,1000000'
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        try:
+            with transaction.atomic():
+                self.run(sizes, options['repeat'], options['batch_size'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, repeat, batch_size):
+        author = User.objects.create_user(username='bench-search')
+        group = Group.objects.create(
+            title='bench-search', slug='bench-search', description=''
+        )
+        rng = random.Random(0)
+        total = 0
+        for size in sizes:
+            self.seed(author, group, rng, size - total, batch_size)
+            total = size
+            for name, query in QUERIES.items():
+                latencies = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    page = search_posts(query, 10, group=group)
+                    latencies.append(time.perf_counter() - started)
+                quantiles = statistics.quantiles(latencies, n=100)
+                self.stdout.write(
+                    f'{size:>9} постов  {name:<13} '
+                    f'найдено {len(page.object_list):>2}  '
+                    f'p50 {quantiles[49] * 1000:7.2f} мс  '
+                    f'p95 {quantiles[94] * 1000:7.2f} мс'
+                )
+
+    def seed(self, author, group, rng, count, batch_size):
+        """Добавляет посты и их термы напрямую, минуя сигналы."""
+        needles = set(rng.sample(range(count), min(NEEDLES, count)))
+        for start in range(0, count, batch_size):
+            texts = []
+            for i in range(start, min(start + batch_size, count)):
+                words = rng.choices(VOCABULARY, k=30)
+                if i in needles:
+                    words += ['иголка', 'стог']
+                texts.append(' '.join(words))
+            posts = bulk_create_with_pks(Post, [
+                Post(text=text, author=author, group=group) for text in texts
+            ])
+            insert_postings([
+                posting for post in posts for posting in post_postings(post)
+            ])
@@ -0,0 +1,284 @@
+import io
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.urls import reverse
+
+from posts.comments import comment_page
+from posts.models import Follow, Group, Post
+from posts.urls import urlpatterns
+
+from .seed_bench import PREFIX
+
+User = get_user_model()
+
+CSRF_SECRET = 'b' * 32
+
+
+class Target:
+    def __init__(self, url, method='GET', user=None, data=None):
+        self.url = url
+        self.method = method
+        self.user = user
+        self.data = data
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет все маршруты posts/urls.py через WSGI-приложение '
+        'в несколько потоков и считает p50/p95/p99, запросы к БД и '
+        'пропускную способность. Данные — из seed_bench.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на маршрут'
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--routes', default='',
+            help='Только эти маршруты, через запятую (по имени из urls.py)'
+        )
+        parser.add_argument('--output', help='Сохранить результат в JSON')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения'
+        )
+
+    def handle(self, *args, **options):
+        # statistics.quantiles нужны хотя бы две точки
+        if options['requests'] < 2:
+            raise CommandError('--requests должен быть не меньше 2')
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency должен быть больше нуля')
+        targets = self.targets()
+        if options['routes']:
+            wanted = set(options['routes'].split(','))
+            targets = {
+                name: target for name, target in targets.items()
+                if name in wanted
+            }
+        self.application = get_wsgi_application()
+        self.cookies = {}
+        results = {}
+        for name, target in targets.items():
+            results[name] = self.run(
+                target, options['requests'], options['concurrency']
+            )
+            self.report(name, results[name])
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'requests': options['requests'],
+                    'concurrency': options['concurrency'],
+                    'routes': results,
+                }, output, indent=2, ensure_ascii=False)
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                self.compare(json.load(baseline)['routes'], results)
+
+    def targets(self):
+        """По цели на каждый маршрут posts/urls.py."""
+        reader = User.objects.filter(
+            username__startswith=PREFIX, follower__isnull=False
+        ).first()
+        post = Post.objects.filter(
+            author__username__startswith=PREFIX
+        ).order_by('-pk').first()
+        group = Group.objects.filter(slug__startswith=PREFIX).first()
+        if not (reader and post and group):
+            raise CommandError('Нет данных: сначала запустите seed_bench')
+        author = post.author
+        # автор, на которого reader ещё не подписан: follow/unfollow
+        # по кругу не меняют итоговый граф
+        stranger = User.objects.filter(
+            username__startswith=PREFIX
+        ).exclude(
+            pk__in=Follow.objects.filter(user=reader).values('author')
+        ).exclude(pk=reader.pk).first()
+        targets = {
+            'index': Target(reverse('posts:index')),
+            'group_list': Target(
+                reverse('posts:group_list', args=[group.slug])
+            ),
+            'profile': Target(
+                reverse('posts:profile', args=[author.username])
+            ),
+            'post_detail': Target(
+                reverse('posts:post_detail', args=[post.pk])
+            ),
+            'post_edit': Target(
+                reverse('posts:post_edit', args=[post.pk]), user=author
+            ),
+            'post_create': Target(reverse('posts:post_create'), user=reader),
+            'add_comment': Target(
+                reverse('posts:add_comment', args=[post.pk]), 'POST',
+                user=reader, data={'text': 'Комментарий из бенчмарка'},
+            ),
+            # вторая страница комментариев — фрагментом
+            'comment_list': Target(
+                reverse('posts:comment_list', args=[post.pk]) + '?'
+                + urlencode({'after': comment_page(post.pk).next_cursor or ''})
+            ),
+            'follow_index': Target(
+                reverse('posts:follow_index'), user=reader
+            ),
+            'search': Target(
+                reverse('posts:search') + '?' + urlencode({'q': 'кошка'})
+            ),
+            'index_feed': Target(reverse('posts:index_feed', args=['rss'])),
+            'group_feed': Target(
+                reverse('posts:group_feed', args=[group.slug, 'atom'])
+            ),
+            'profile_feed': Target(
+                reverse('posts:profile_feed', args=[author.username, 'rss'])
+            ),
+            'profile_follow': Target(
+                reverse('posts:profile_follow', args=[stranger.username]),
+                user=reader,
+            ),
+            'profile_unfollow': Target(
+                reverse('posts:profile_unfollow', args=[stranger.username]),
+                user=reader,
+            ),
+        }
+        missing = {
+            pattern.name for pattern in urlpatterns
+        } - targets.keys()
+        if missing:
+            raise CommandError(
+                f'Нет цели для маршрутов: {", ".join(sorted(missing))}'
+            )
+        return targets
+
+    def cookie(self, user):
+        """Сессия и CSRF-cookie, как после входа через форму."""
+        if user is None:
+            return ''
+        if user.pk not in self.cookies:
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            self.cookies[user.pk] = (
+                f'{settings.SESSION_COOKIE_NAME}={session.session_key}; '
+                f'{settings.CSRF_COOKIE_NAME}={CSRF_SECRET}'
+            )
+        return self.cookies[user.pk]
+
+    def environ(self, target):
+        path, _, query = target.url.partition('?')
+        body = b''
+        if target.method == 'POST':
+            body = urlencode(
+                {**target.data, 'csrfmiddlewaretoken': CSRF_SECRET}
+            ).encode()
+        return {
+            'REQUEST_METHOD': target.method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            # не 127.0.0.1, чтобы не включался debug toolbar
+            'REMOTE_ADDR': '10.0.0.1',
+            'HTTP_HOST': 'testserver',
+            'HTTP_REFERER': 'http://testserver/',
+            'HTTP_COOKIE': self.cookie(target.user),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': io.StringIO(),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+            'wsgi.version': (1, 0),
+        }
+
+    def request(self, target):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        statuses = []
+        environ = self.environ(target)
+        started = time.perf_counter()
+        # соединения у каждого потока свои — обёртка ставится в потоке
+        with connection.execute_wrapper(count):
+            response = self.application(
+                environ, lambda status, headers: statuses.append(status)
+            )
+            for _ in response:
+                pass
+            response.close()
+        return time.perf_counter() - started, queries, statuses[0]
+
+    def run(self, target, requests, concurrency):
+        def worker(_):
+            return self.request(target)
+
+        # прогрев: ленивые счётчики, кэши шаблонов и т.п.
+        self.request(target)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            samples = list(pool.map(worker, range(requests)))
+        elapsed = time.perf_counter() - started
+        latencies = [latency for latency, _, _ in samples]
+        quantiles = statistics.quantiles(latencies, n=100)
+        errors = sum(
+            1 for _, _, status in samples if int(status.split()[0]) >= 400
+        )
+        return {
+            'url': target.url,
+            'method': target.method,
+            'p50_ms': round(quantiles[49] * 1000, 2),
+            'p95_ms': round(quantiles[94] * 1000, 2),
+            'p99_ms': round(quantiles[98] * 1000, 2),
+            'queries': statistics.mean(q for _, q, _ in samples),
+            'rps': round(requests / elapsed, 1),
+            'errors': errors,
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<17} p50 {result["p50_ms"]:8.2f} мс  '
+            f'p95 {result["p95_ms"]:8.2f} мс  '
+            f'p99 {result["p99_ms"]:8.2f} мс  '
+            f'запросов {result["queries"]:6.1f}  '
+            f'{result["rps"]:8.1f} rps'
+            + (f'  ошибок {result["errors"]}' if result['errors'] else '')
+        )
+
+    def compare(self, baseline, results):
+        self.stdout.write('\nИзменение относительно базового прогона:')
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            self.stdout.write(
+                f'{name:<17} '
+                + '  '.join(
+                    f'{metric} {self.delta(before[metric], result[metric])}'
+                    for metric in ('p50_ms', 'p95_ms', 'queries', 'rps')
+                )
+            )
+
+    def delta(self, before, after):
+        if not before:
+            return f'{after}'
+        return f'{(after - before) / before * 100:+.0f}%'
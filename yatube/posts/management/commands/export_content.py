@@ -0,0 +1,48 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в каталог: по файлу NDJSON или CSV на таблицу и картинки в media/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default=transfer.NDJSON
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз'
+        )
+        parser.add_argument(
+            '--no-media', action='store_true',
+            help='Не копировать картинки постов'
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        os.makedirs(directory, exist_ok=True)
+        for table, model, fields in transfer.TABLES:
+            started = time.perf_counter()
+            count = transfer.export_table(
+                directory, options['format'], table, model, fields,
+                chunk_size=options['chunk_size'],
+            )
+            self.report(table, count, time.perf_counter() - started)
+        if not options['no_media']:
+            self.stdout.write(
+                f'Картинок скопировано: {transfer.export_media(directory)}'
+            )
+
+    def report(self, table, count, elapsed):
+        self.stdout.write(
+            f'{table}: {count} строк за {elapsed:.2f} с '
+            f'({count / elapsed if elapsed else 0:.0f} строк/с)'
+        )
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnail
+
+
+def generate_and_close(post_id):
+    try:
+        return generate_thumbnail(post_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Готовит миниатюры для уже загруженных картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать миниатюры и для постов, где они уже есть'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.POST_THUMBNAIL_WORKERS,
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(image_thumbnail='')
+        post_ids = list(posts.values_list('pk', flat=True))
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = [
+                    pool.submit(generate_and_close, pk) for pk in post_ids
+                ]
+                self.report([future.exception() for future in results])
+        else:
+            self.report([self.generate(pk) for pk in post_ids])
+
+    def generate(self, post_id):
+        try:
+            generate_thumbnail(post_id)
+        except Exception as error:
+            return error
+        return None
+
+    def report(self, errors):
+        failed = [error for error in errors if error is not None]
+        for error in failed:
+            self.stderr.write(f'Ошибка: {error}')
+        self.stdout.write(
+            f'Миниатюр готово: {len(errors) - len(failed)}, '
+            f'с ошибками: {len(failed)}'
+        )
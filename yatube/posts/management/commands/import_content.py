@@ -0,0 +1,56 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_content через bulk_create: id '
+        'переназначаются, картинки копируются в хранилище. Миниатюры '
+        'потом готовит generate_thumbnails.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default=transfer.NDJSON
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Строк в одном bulk_create и одной транзакции'
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересчитывать счётчики и не пересобирать ленты'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        importer = transfer.Importer(
+            options['directory'], options['format'], options['batch_size']
+        )
+        total = 0
+        started = time.perf_counter()
+        for table, model, _ in transfer.TABLES:
+            table_started = time.perf_counter()
+            count = importer.load(table, model)
+            self.report(table, count, time.perf_counter() - table_started)
+            total += count
+        self.report('всего', total, time.perf_counter() - started)
+        if not options['skip_derived']:
+            # bulk_create не шлёт сигналы — счётчики и ленты строим сами
+            call_command('recount_stats', stdout=self.stdout)
+            call_command('rebuild_timelines', stdout=self.stdout)
+        self.stdout.write(
+            'Миниатюры картинок: python manage.py generate_thumbnails'
+        )
+
+    def report(self, table, count, elapsed):
+        self.stdout.write(
+            f'{table}: {count} строк за {elapsed:.2f} с '
+            f'({count / elapsed if elapsed else 0:.0f} строк/с)'
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Comment, Post, SearchPosting
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс постов и комментариев, например '
+        'после массового импорта через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        SearchPosting.objects.all().delete()
+        posts = self.reindex(Post.objects.all(), batch_size, search.index_post)
+        comments = self.reindex(
+            Comment.objects.all(), batch_size, search.index_comment
+        )
+        self.stdout.write(
+            f'Проиндексировано постов: {posts}, комментариев: {comments}'
+        )
+
+    def reindex(self, queryset, batch_size, index):
+        total = 0
+        last_id = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_id).order_by('pk')[:batch_size]
+            )
+            if not batch:
+                return total
+            with transaction.atomic():
+                for obj in batch:
+                    index(obj)
+            total += len(batch)
+            last_id = batch[-1].pk
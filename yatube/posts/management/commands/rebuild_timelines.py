@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает материализованные ленты подписок, например после '
+        'массового импорта постов или правки таблицы Follow.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пользователи, чьи ленты нужно пересобрать (по умолчанию все)'
+        )
+
+    def handle(self, *args, **options):
+        timeline.refresh_heavy_authors()
+        # и те, у кого подписок не осталось, а лента ещё есть
+        user_ids = Follow.objects.order_by().values_list(
+            'user_id', flat=True
+        ).union(
+            TimelineEntry.objects.order_by().values_list('user_id', flat=True)
+        )
+        if options['usernames']:
+            user_ids = User.objects.filter(
+                username__in=options['usernames']
+            ).values_list('pk', flat=True)
+        rebuilt = 0
+        for user_id in set(user_ids):
+            with transaction.atomic():
+                timeline.rebuild_timeline(user_id)
+            rebuilt += 1
+        self.stdout.write(f'Пересобрано лент: {rebuilt}')
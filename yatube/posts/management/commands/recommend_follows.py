@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+from posts.models import SuggestionQueue
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «Кого почитать» по графу подписок и '
+        'общим группам. По умолчанию — только для пользователей из '
+        'очереди (SuggestionQueue), с --all — для всех.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать всех, а не только изменившихся'
+        )
+        parser.add_argument(
+            '--top-k', type=int, default=None,
+            help='Сколько рекомендаций хранить (SUGGESTIONS_TOP_K)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Пользователей в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if not options['all']:
+            user_ids = set(
+                SuggestionQueue.objects.values_list('user_id', flat=True)
+            )
+        started = time.perf_counter()
+        done, written = suggestions.rebuild(
+            user_ids, top_k=options['top_k'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(
+            f'Пересчитано пользователей: {done}, рекомендаций: {written} '
+            f'за {(time.perf_counter() - started) * 1000:.0f} ms'
+        )
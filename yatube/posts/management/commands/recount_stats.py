@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import AuthorStats, Comment, Follow, Group, GroupStats, Post
+from posts.stats import recount_site_posts
+
+User = get_user_model()
+
+
+def count_by(queryset, field, ids):
+    return dict(
+        queryset.filter(**{f'{field}__in': ids})
+        .order_by()
+        .values_list(field)
+        .annotate(total=Count('pk'))
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счётчики авторов и групп '
+        'и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько авторов или групп пересчитывать за одну транзакцию'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        authors = self.recount(
+            User.objects.order_by('pk').values_list('pk', flat=True),
+            batch_size, self.recount_authors,
+        )
+        groups = self.recount(
+            Group.objects.order_by('pk').values_list('pk', flat=True),
+            batch_size, self.recount_groups,
+        )
+        posts = recount_site_posts()
+        self.stdout.write(
+            f'Пересчитано авторов: {authors}, групп: {groups}, '
+            f'постов всего: {posts}'
+        )
+
+    def recount(self, ids, batch_size, recount_batch):
+        total = 0
+        last_id = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                return total
+            with transaction.atomic():
+                recount_batch(batch)
+            total += len(batch)
+            last_id = batch[-1]
+
+    def recount_authors(self, ids):
+        posts = count_by(Post.objects, 'author_id', ids)
+        comments = count_by(Comment.objects, 'author_id', ids)
+        followers = count_by(Follow.objects, 'author_id', ids)
+        following = count_by(Follow.objects, 'user_id', ids)
+        AuthorStats.objects.filter(author_id__in=ids).delete()
+        AuthorStats.objects.bulk_create([
+            AuthorStats(
+                author_id=pk,
+                posts_count=posts.get(pk, 0),
+                comments_count=comments.get(pk, 0),
+                followers_count=followers.get(pk, 0),
+                following_count=following.get(pk, 0),
+            ) for pk in ids
+        ])
+
+    def recount_groups(self, ids):
+        posts = count_by(Post.objects, 'group_id', ids)
+        comments = count_by(Comment.objects, 'post__group_id', ids)
+        GroupStats.objects.filter(group_id__in=ids).delete()
+        GroupStats.objects.bulk_create([
+            GroupStats(
+                group_id=pk,
+                posts_count=posts.get(pk, 0),
+                comments_count=comments.get(pk, 0),
+            ) for pk in ids
+        ])
@@ -0,0 +1,191 @@
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from posts.bulk import bulk_create_with_pks, explicit_created
+from posts.comments import assign_paths
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+PREFIX = 'bench'
+PASSWORD = 'bench-password'
+WORDS = (
+    'пост', 'лента', 'группа', 'автор', 'подписка', 'комментарий', 'кошка',
+    'город', 'утро', 'поезд', 'книга', 'музыка', 'кофе', 'море', 'код',
+    'python', 'django', 'yatube', 'новости', 'погода', 'фото', 'прогулка',
+)
+
+
+def power_law_weights(count, alpha):
+    """Вес i-го элемента ∝ 1 / (i + 1) ** alpha — как у популярности."""
+    return [1 / (rank + 1) ** alpha for rank in range(count)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу данными для нагрузочных замеров: пользователи, '
+        'группы, посты с картинками, комментарии и граф подписок со '
+        'степенным распределением популярности авторов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок на пользователя'
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.2,
+            help='Доля постов с картинкой'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Показатель степенного закона популярности авторов'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересобирать ленты, счётчики и поисковый индекс'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        with transaction.atomic(), explicit_created(Post, Comment):
+            users = self.seed_users(options['users'])
+            groups = self.seed_groups(options['groups'])
+            weights = power_law_weights(len(users), options['alpha'])
+            posts = self.seed_posts(
+                users, groups, weights, options['posts'], options['images']
+            )
+            self.seed_comments(users, posts, options['comments'])
+            self.seed_follows(users, weights, options['follows'])
+        if not options['skip_derived']:
+            # bulk_create не шлёт сигналы — производные данные строим сами
+            for command in (
+                'recount_stats', 'rebuild_timelines', 'rebuild_search_index'
+            ):
+                call_command(command, stdout=self.stdout)
+        self.stdout.write(
+            f'Создано: пользователей {len(users)}, групп {len(groups)}, '
+            f'постов {len(posts)}. Пароль пользователей: {PASSWORD}'
+        )
+
+    def seed_users(self, count):
+        start = User.objects.filter(username__startswith=PREFIX).count()
+        password = make_password(PASSWORD)
+        User.objects.bulk_create([
+            User(username=f'{PREFIX}{i}', password=password)
+            for i in range(start, start + count)
+        ])
+        # самые популярные авторы — первые в списке
+        return list(
+            User.objects.filter(username__startswith=PREFIX)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def seed_groups(self, count):
+        start = Group.objects.filter(slug__startswith=PREFIX).count()
+        Group.objects.bulk_create([
+            Group(
+                title=f'Группа {i}', slug=f'{PREFIX}-{i}',
+                description=self.text(20),
+            )
+            for i in range(start, start + count)
+        ])
+        return list(
+            Group.objects.filter(slug__startswith=PREFIX)
+            .values_list('pk', flat=True)
+        )
+
+    def seed_images(self, count=8):
+        names = []
+        for i in range(count):
+            buffer = io.BytesIO()
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{PREFIX}-{i}.jpg', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def seed_posts(self, users, groups, weights, count, image_share):
+        images = self.seed_images() if image_share else []
+        now = timezone.now()
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            authors = self.rng.choices(users, weights, k=size)
+            Post.objects.bulk_create([
+                Post(
+                    author_id=author,
+                    group_id=(
+                        self.rng.choice(groups)
+                        if groups and self.rng.random() < 0.7 else None
+                    ),
+                    text=self.text(self.rng.randint(5, 80)),
+                    image=(
+                        self.rng.choice(images)
+                        if images and self.rng.random() < image_share
+                        else ''
+                    ),
+                    created=now - timedelta(
+                        seconds=self.rng.randrange(365 * 24 * 3600)
+                    ),
+                )
+                for author in authors
+            ])
+        return list(
+            Post.objects.filter(author_id__in=users)
+            .values_list('pk', flat=True)
+        )
+
+    def seed_comments(self, users, posts, count):
+        if not posts:
+            return
+        now = timezone.now()
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            assign_paths(bulk_create_with_pks(Comment, [
+                Comment(
+                    post_id=self.rng.choice(posts),
+                    author_id=self.rng.choice(users),
+                    text=self.text(self.rng.randint(3, 30)),
+                    created=now - timedelta(
+                        seconds=self.rng.randrange(365 * 24 * 3600)
+                    ),
+                )
+                for _ in range(size)
+            ]))
+
+    def seed_follows(self, users, weights, mean):
+        follows = []
+        for user in users:
+            # у большинства мало подписок, у немногих — много
+            wanted = min(
+                int(self.rng.expovariate(1 / mean)) if mean else 0,
+                len(users) - 1,
+            )
+            authors = set(self.rng.choices(users, weights, k=wanted))
+            authors.discard(user)
+            follows.extend(
+                Follow(user_id=user, author_id=author) for author in authors
+            )
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize()
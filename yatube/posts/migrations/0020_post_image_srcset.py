@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_srcset',
+            field=models.TextField(blank=True, editable=False, help_text='Готовый srcset карточек в JPEG', verbose_name='Ширины картинки (JPEG)'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_webp_srcset',
+            field=models.TextField(blank=True, editable=False, help_text='Готовый srcset карточек в WebP', verbose_name='Ширины картинки (WebP)'),
+        ),
+    ]
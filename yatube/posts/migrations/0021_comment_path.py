@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def segment(pk):
+    digits = ''
+    while pk:
+        pk, digit = divmod(pk, 36)
+        digits = DIGITS[digit] + digits
+    return digits.rjust(8, '0')
+
+
+def fill_paths(apps, schema_editor):
+    """Все прежние комментарии — ответы на пост: путь из одного pk."""
+    Comment = apps.get_model('posts', 'Comment')
+    comments = Comment.objects.filter(path='').only('pk').order_by('pk')
+    while True:
+        chunk = list(comments[:2000])
+        if not chunk:
+            return
+        for comment in chunk:
+            comment.path = segment(comment.pk)
+        Comment.objects.bulk_update(chunk, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_post_image_srcset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:24
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_heavy_authors(apps, schema_editor):
+    # до этой миграции «тяжёлые» авторы считались на лету
+    Follow = apps.get_model('posts', 'Follow')
+    HeavyAuthor = apps.get_model('posts', 'HeavyAuthor')
+    authors = (
+        Follow.objects.order_by().values('author')
+        .annotate(followers=Count('id'))
+        .filter(followers__gt=settings.TIMELINE_FANOUT_LIMIT)
+        .values_list('author', flat=True)
+    )
+    HeavyAuthor.objects.bulk_create(
+        HeavyAuthor(author_id=pk) for pk in authors
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0022_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeavyAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('since', models.DateTimeField(null=True, verbose_name='С какого момента')),
+            ],
+        ),
+        migrations.RunPython(fill_heavy_authors, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 
 User = get_user_model()
 
@@ -26,6 +28,14 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """Профили выборки постов под шаблоны, без запросов на каждый пост."""
+
+    def for_feed(self):
+        """Лента: карточка поста читает автора и группу."""
+        return self.select_related('author', 'group')
+
+
 class Post(AbstractModel):
     text = models.TextField(
         'Текст поста',
@@ -50,14 +60,74 @@ class Post(AbstractModel):
         upload_to='posts/',
         blank=True
     )
+    image_thumbnail = models.CharField(
+        'Миниатюра картинки',
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text='URL заранее подготовленной миниатюры',
+    )
+    image_srcset = models.TextField(
+        'Ширины картинки (JPEG)',
+        blank=True,
+        editable=False,
+        help_text='Готовый srcset карточек в JPEG',
+    )
+    image_webp_srcset = models.TextField(
+        'Ширины картинки (WebP)',
+        blank=True,
+        editable=False,
+        help_text='Готовый srcset карточек в WebP',
+    )
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['author', '-created'],
+                name='post_author_created_idx',
+            ),
+            models.Index(
+                fields=['group', '-created'],
+                name='post_group_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
+# Путь комментария в ветке — pk всех предков и его собственный, каждый
+# в base36 ровно на PATH_SEGMENT знаков. Такие строки сортируются как
+# обход дерева в глубину, а ветка целиком — диапазон по индексу.
+# 8 знаков хватает на 36**8 ≈ 2.8·10¹² комментариев.
+PATH_SEGMENT = 8
+PATH_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+# больше любой цифры пути: верхняя граница диапазона ветки
+PATH_END = '~'
+
+
+def path_segment(pk):
+    digits = ''
+    while pk:
+        pk, digit = divmod(pk, len(PATH_DIGITS))
+        digits = PATH_DIGITS[digit] + digits
+    return digits.rjust(PATH_SEGMENT, '0')
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def subtree(self, path):
+        """Комментарий с путём `path` и все ответы на него.
+
+        Диапазон, а не LIKE 'path%': так SQLite идёт по индексу.
+        """
+        return self.filter(path__gte=path, path__lt=path + PATH_END)
+
+
 class Comment(AbstractModel):
     post = models.ForeignKey(
         Post,
@@ -76,10 +146,83 @@ class Comment(AbstractModel):
         'Комментарий поста',
         help_text='Введите комментарий поста',
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на',
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('created',)
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx',
+            ),
+            models.Index(
+                fields=['post', 'path'],
+                name='comment_post_path_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
+    @property
+    def depth(self):
+        """Уровень вложенности: 0 у комментария к посту."""
+        return max(len(self.path) // PATH_SEGMENT - 1, 0)
+
+    def save(self, *args, **kwargs):
+        # вставка и запись пути — вместе: комментарий без пути
+        # сортировался бы раньше всех веток
+        with transaction.atomic():
+            update_fields = kwargs.get('update_fields')
+            if not self._state.adding and (
+                update_fields is None or 'parent' in update_fields
+            ):
+                self.move_subtree()
+            super().save(*args, **kwargs)
+
+    def _save_table(self, *args, **kwargs):
+        # путь пишем здесь, а не после save(): post_save уже видит его
+        updated = super()._save_table(*args, **kwargs)
+        if not self.path:
+            # pk известен только после вставки
+            prefix = self.parent.path if self.parent_id else ''
+            self.path = prefix + path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+        return updated
+
+    def move_subtree(self):
+        """Переписывает пути ветки, если комментарию сменили родителя."""
+        stored = Comment.objects.filter(pk=self.pk).values_list(
+            'parent_id', 'path'
+        ).first()
+        if stored is None or stored[0] == self.parent_id:
+            return
+        old_path = stored[1]
+        prefix = self.parent.path if self.parent_id else ''
+        if prefix.startswith(old_path):
+            raise ValueError('Комментарий не может отвечать на свой ответ')
+        self.path = prefix + path_segment(self.pk)
+        Comment.objects.filter(post_id=self.post_id).subtree(
+            old_path
+        ).update(path=Concat(
+            Value(self.path), Substr('path', len(old_path) + 1)
+        ))
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -95,5 +238,177 @@ class Follow(models.Model):
         verbose_name='Автор',
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow',
+            ),
+        ]
+
     def __str__(self):
         return self.user
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    created = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['user', '-created'],
+                name='timeline_user_created_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} <- {self.post_id}'
+
+
+class HeavyAuthor(models.Model):
+    """Автор, чьи посты подмешиваются в ленты при чтении (posts.timeline)."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    # None — неизвестно (пересчёт с нуля): при выходе из таблицы
+    # дораскладываются просто последние посты автора
+    since = models.DateTimeField('С какого момента', null=True)
+
+    def __str__(self):
+        return str(self.author_id)
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики автора, обновляются сигналами."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.IntegerField('Постов', default=0)
+    comments_count = models.IntegerField('Комментариев', default=0)
+    followers_count = models.IntegerField('Подписчиков', default=0)
+    following_count = models.IntegerField('Подписок', default=0)
+
+    def __str__(self):
+        return str(self.author)
+
+
+class GroupStats(models.Model):
+    """Денормализованные счётчики группы, обновляются сигналами."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа',
+    )
+    posts_count = models.IntegerField('Постов', default=0)
+    comments_count = models.IntegerField('Комментариев', default=0)
+
+    def __str__(self):
+        return str(self.group)
+
+
+class SearchPosting(models.Model):
+    """Элемент обратного индекса: терм встречается в посте или комментарии."""
+    term = models.CharField('Терм', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_postings',
+        verbose_name='Пост',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='search_postings',
+        blank=True, null=True,
+        verbose_name='Комментарий',
+    )
+    weight = models.FloatField('Вес')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class Suggestion(models.Model):
+    """Рекомендация подписки, посчитанная заранее (recommend_follows)."""
+    FRIENDS = 'friends'
+    SIMILAR = 'similar'
+    GROUP = 'group'
+    REASONS = (
+        (FRIENDS, 'Его читают те, на кого вы подписаны'),
+        (SIMILAR, 'Его читают люди с похожими подписками'),
+        (GROUP, 'Пишет в тех же группах, что и вы'),
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name='Кому',
+    )
+    candidate = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggested_to',
+        verbose_name='Кого почитать',
+    )
+    score = models.FloatField('Оценка')
+    reason = models.CharField('Почему', max_length=16, choices=REASONS)
+    rank = models.PositiveSmallIntegerField('Место')
+
+    class Meta:
+        ordering = ('rank',)
+        indexes = [
+            models.Index(
+                fields=['user', 'rank'], name='suggestion_user_rank_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.candidate_id}'
+
+
+class SuggestionQueue(models.Model):
+    """Пользователь, чьи рекомендации пора пересчитать.
+
+    Внешнего ключа нет: отписки при удалении пользователя тоже ставят
+    его в очередь, а строка не должна мешать самому удалению.
+    """
+    user_id = models.IntegerField('Пользователь', primary_key=True)
+    marked = models.DateTimeField('Изменился')
+
+    def __str__(self):
+        return str(self.user_id)
@@ -0,0 +1,215 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+def encode_cursor(post):
+    """Непрозрачный токен позиции в ленте: (created, id) записи.
+
+    Запись — пост или словарь из `.values()` с ключами created и id.
+    """
+    if isinstance(post, dict):
+        created, pk = post['created'], post['id']
+    else:
+        created, pk = post.created, post.pk
+    raw = f'{created.isoformat()}|{pk}'
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_cursor(token):
+    """Разбирает токен. Для битого токена возвращает None."""
+    try:
+        created, pk = urlsafe_base64_decode(token).decode().split('|')
+        return datetime.fromisoformat(created), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+class CursorPage(Page):
+    """Страница keyset-пагинации.
+
+    Повторяет интерфейс `Page`, который использует шаблон
+    `posts/includes/paginator.html`, но вместо номеров страниц
+    отдаёт токены `?after=`/`?before=`.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage: {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (created, id) без COUNT(*) и OFFSET.
+
+    Стоимость любой страницы одинакова: выборка идёт по индексу
+    от позиции из токена, а не пропуском первых N записей.
+    """
+
+    def __init__(self, object_list, per_page, after=None, before=None):
+        super().__init__(object_list, per_page)
+        self.after = decode_cursor(after) if after else None
+        self.before = (
+            decode_cursor(before) if before and not self.after else None
+        )
+
+    def get_page(self, number=None):
+        return self.page()
+
+    def page(self, number=None):
+        queryset = self.object_list
+        if self.before:
+            created, pk = self.before
+            rows = list(
+                queryset.filter(
+                    Q(created__gt=created) | Q(created=created, pk__gt=pk)
+                ).order_by('created', 'pk')[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return CursorPage(rows, self, True, has_previous)
+        if self.after:
+            created, pk = self.after
+            queryset = queryset.filter(
+                Q(created__lt=created) | Q(created=created, pk__lt=pk)
+            )
+        rows = list(
+            queryset.order_by('-created', '-pk')[:self.per_page + 1]
+        )
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page], self, has_next, self.after is not None
+        )
+
+
+class LookaheadPaginator(Paginator):
+    """Номерной пагинатор без COUNT(*) по всей выборке.
+
+    Строки считаются только до `lookahead` страниц за запрошенной:
+    COUNT по подзапросу с LIMIT. Пока до конца выборки не дошли,
+    `count` — нижняя оценка, и `count_is_exact` ложно: шаблон не
+    показывает номер последней страницы.
+    """
+
+    def __init__(self, object_list, per_page, lookahead=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.lookahead = (
+            settings.PAGINATION_WINDOW if lookahead is None else lookahead
+        )
+        self.limit = None
+
+    @property
+    def count_is_exact(self):
+        return self.count < self.limit
+
+    def validate_number(self, number):
+        try:
+            requested = max(int(number), 1)
+        except (TypeError, ValueError):
+            requested = 1
+        limit = (requested + self.lookahead) * self.per_page + 1
+        if limit != self.limit:
+            self.limit = limit
+            # count и num_pages — cached_property базового класса
+            self.__dict__['count'] = self.object_list[:limit].count()
+            self.__dict__.pop('num_pages', None)
+        return super().validate_number(number)
+
+
+class EstimatedPage(Page):
+    """Страница, которая знает о следующей по прочитанной строке."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор с готовой оценкой числа строк вместо COUNT(*).
+
+    Оценка (`estimate`) берётся из счётчиков, которые уже есть: таблиц
+    статистики или кэша. Если она меньше `threshold`, строки считаются
+    точно — на маленьких лентах это дёшево. Иначе число страниц
+    приблизительное, но листание остаётся точным: страница читает на
+    одну строку больше, чтобы знать, есть ли следующая, а запрос за
+    концом ленты переключает пагинатор на точный COUNT.
+    """
+
+    def __init__(self, object_list, per_page, estimate=None, threshold=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if threshold is None:
+            threshold = settings.PAGINATION_EXACT_COUNT_THRESHOLD
+        self.count_is_exact = estimate is None or estimate < threshold
+        if not self.count_is_exact:
+            # count и num_pages — cached_property базового класса
+            self.__dict__['count'] = estimate
+
+    def use_exact_count(self):
+        self.count_is_exact = True
+        self.__dict__.pop('count', None)
+        self.__dict__.pop('num_pages', None)
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+        # оценка могла занизить число страниц: проверяет сама выборка
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_is_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return EstimatedPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            # оценка завысила число строк — дальше считаем точно
+            self.use_exact_count()
+            return super().get_page(number)
@@ -0,0 +1,184 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Обратный индекс хранится в таблице SearchPosting: для каждой основы
+слова (после стемминга) — посты, где она встречается, и вес вхождения.
+Индекс обновляется сигналами при сохранении поста или комментария,
+поэтому поиск — это выборка по индексу (term, post), а не LIKE '%q%'.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .models import Post, SearchPosting
+from .paginator import CursorPage
+from .stemmer import stem
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+# насыщение частоты терма (как в BM25) и средняя длина текста в словах
+TF_SATURATION = 1.2
+LENGTH_NORMALIZATION = 0.75
+AVERAGE_LENGTH = 50
+COMMENT_WEIGHT = 0.3
+
+STOP_WORDS = frozenset((
+    'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а',
+    'то', 'все', 'она', 'так', 'его', 'но', 'да', 'ты', 'к', 'у', 'же',
+    'вы', 'за', 'бы', 'по', 'только', 'ее', 'мне', 'было', 'вот', 'от',
+    'меня', 'еще', 'нет', 'о', 'из', 'ему', 'ли', 'если', 'уже', 'или',
+    'ни', 'быть', 'был', 'до', 'вас', 'это', 'для', 'мы', 'их', 'чем',
+))
+
+
+def analyze(text):
+    """Разбивает текст на термы: нижний регистр, без стоп-слов, основы."""
+    terms = []
+    for word in WORD_RE.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if CYRILLIC_RE.search(word):
+            word = stem(word)
+        if word:
+            terms.append(word[:MAX_TERM_LENGTH])
+    return terms
+
+
+def term_weights(text, factor=1.0):
+    terms = analyze(text)
+    frequencies = {}
+    for term in terms:
+        frequencies[term] = frequencies.get(term, 0) + 1
+    length = (
+        1 - LENGTH_NORMALIZATION
+        + LENGTH_NORMALIZATION * len(terms) / AVERAGE_LENGTH
+    )
+    return {
+        term: factor * tf * (TF_SATURATION + 1)
+        / (tf + TF_SATURATION * length)
+        for term, tf in frequencies.items()
+    }
+
+
+def post_postings(post):
+    return [
+        (term, post.pk, None, weight)
+        for term, weight in term_weights(post.text).items()
+    ]
+
+
+def comment_postings(comment):
+    return [
+        (term, comment.post_id, comment.pk, weight)
+        for term, weight in term_weights(
+            comment.text, COMMENT_WEIGHT
+        ).items()
+    ]
+
+
+def insert_postings(rows):
+    """Пишет строки (term, post_id, comment_id, weight) одним executemany.
+
+    Строк индекса на порядок больше, чем постов, а bulk_create тратит
+    на каждую модель-объект больше времени, чем сама вставка.
+    """
+    if not rows:
+        return
+    meta = SearchPosting._meta
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(meta.get_field(name).column) for name in (
+        'term', 'post', 'comment', 'weight'
+    ))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {quote(meta.db_table)} ({columns}) '
+            'VALUES (%s, %s, %s, %s)',
+            rows,
+        )
+
+
+def index_post(post):
+    """Переиндексирует текст поста (комментарии индексируются отдельно)."""
+    SearchPosting.objects.filter(post=post, comment=None).delete()
+    insert_postings(post_postings(post))
+
+
+def index_comment(comment):
+    SearchPosting.objects.filter(comment=comment).delete()
+    insert_postings(comment_postings(comment))
+
+
+def encode_cursor(score, post_id):
+    return urlsafe_base64_encode(force_bytes(f'{score!r}|{post_id}'))
+
+
+def decode_cursor(token):
+    try:
+        score, post_id = urlsafe_base64_decode(token).decode().split('|')
+        return float(score), int(post_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class SearchPage(CursorPage):
+    """Страница результатов: листается вперёд по (score, id)."""
+
+    def __init__(self, object_list, paginator, has_next, scores,
+                 has_previous=False):
+        super().__init__(object_list, paginator, has_next, has_previous)
+        self.scores = scores
+
+    @property
+    def previous_cursor(self):
+        # назад по релевантности не листаем, только на первую страницу
+        return None
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            last = self.object_list[-1]
+            return encode_cursor(self.scores[last.pk], last.pk)
+        return None
+
+
+def search_posts(query, per_page, group=None, author=None, after=None):
+    """Посты, где встречаются все слова запроса, по убыванию релевантности.
+
+    `group` — объект Group, `author` — имя пользователя автора.
+    Возвращает SearchPage; `after` — токен из `next_cursor`
+    предыдущей страницы.
+    """
+    terms = list(dict.fromkeys(analyze(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return SearchPage([], None, False, {})
+    postings = SearchPosting.objects.filter(term__in=terms)
+    if group is not None:
+        postings = postings.filter(post__group=group)
+    if author:
+        postings = postings.filter(post__author__username=author)
+    ranked = postings.values('post').annotate(
+        score=Sum('weight'), matched=Count('term', distinct=True),
+    ).filter(matched=len(terms))
+    cursor = decode_cursor(after) if after else None
+    if cursor:
+        score, post_id = cursor
+        ranked = ranked.filter(
+            Q(score__lt=score) | Q(score=score, post_id__lt=post_id)
+        )
+    # post_id, а не post: иначе ORDER BY возьмёт Meta.ordering поста
+    rows = list(
+        ranked.order_by('-score', '-post_id').values_list('post', 'score')[
+            :per_page + 1
+        ]
+    )
+    scores = dict(rows[:per_page])
+    posts = Post.objects.for_feed().in_bulk(scores)
+    return SearchPage(
+        [posts[pk] for pk in scores if pk in posts], None,
+        len(rows) > per_page, scores, has_previous=cursor is not None,
+    )
@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import (cards, graph, stats, suggestions, tasks, thumbnails,
+               timeline)
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def image_name(image):
+    return getattr(image, 'name', image) or ''
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    # запоминаем группу и картинку, чтобы отследить их смену; через
+    # __dict__, чтобы не подгружать отложенные (.only/.defer) поля
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+    instance._loaded_image = image_name(instance.__dict__.get('image'))
+
+
+@receiver(pre_save, sender=Post)
+def post_image_changed(sender, instance, **kwargs):
+    instance._image_changed = (
+        instance._state.adding
+        or image_name(instance.image) != instance._loaded_image
+    )
+    if instance._image_changed:
+        instance.image_thumbnail = ''
+        instance.image_srcset = ''
+        instance.image_webp_srcset = ''
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        tasks.fan_out_post.delay(instance.pk)
+        stats.bump_site_posts(1)
+        stats.bump_author(instance.author_id, 'posts_count', 1)
+        stats.bump_group(instance.group_id, 'posts_count', 1)
+    elif instance.group_id != instance._loaded_group_id:
+        stats.move_post(
+            instance._loaded_group_id, instance.group_id,
+            instance.comments.count(),
+        )
+    if instance.group_id != instance._loaded_group_id:
+        # новая группа автора — новые соседи в «общих группах»
+        suggestions.mark_changed([instance.author_id])
+    if instance._image_changed and instance.image:
+        thumbnails.schedule_thumbnail(instance.pk)
+    tasks.index_post.delay(instance.pk)
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = image_name(instance.image)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    stats.bump_site_posts(-1)
+    stats.bump_author(instance.author_id, 'posts_count', -1)
+    stats.bump_group(instance.group_id, 'posts_count', -1)
+
+
+def comment_group_id(comment):
+    return Post.objects.filter(pk=comment.post_id).values_list(
+        'group_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    tasks.index_comment.delay(instance.pk)
+    if created:
+        stats.bump_author(instance.author_id, 'comments_count', 1)
+        stats.bump_group(comment_group_id(instance), 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    stats.bump_author(instance.author_id, 'comments_count', -1)
+    stats.bump_group(comment_group_id(instance), 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        graph.edge_changed(instance.user_id, instance.author_id)
+        stats.bump_author(instance.author_id, 'followers_count', 1)
+        stats.bump_author(instance.user_id, 'following_count', 1)
+        timeline.followers_changed(instance.author_id)
+        tasks.add_author.delay(instance.user_id, instance.author_id)
+        suggestions.follow_changed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    graph.edge_changed(instance.user_id, instance.author_id)
+    timeline.remove_author(instance.user_id, instance.author_id)
+    stats.bump_author(instance.author_id, 'followers_count', -1)
+    stats.bump_author(instance.user_id, 'following_count', -1)
+    left = timeline.followers_changed(instance.author_id)
+    if left is not None:
+        since = left.since and left.since.isoformat()
+        tasks.backfill_author.delay(instance.author_id, since)
+    suggestions.follow_changed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def post_card_changed(sender, instance, created, **kwargs):
+    if not created:
+        cards.bump('post', instance.pk)
+        cards.bump(cards.FEEDS, 0)
+
+
+@receiver(post_delete, sender=Post)
+def post_card_deleted(sender, instance, **kwargs):
+    cards.bump(cards.FEEDS, 0)
+
+
+@receiver(post_save, sender=Comment)
+def comment_card_changed(sender, instance, created, **kwargs):
+    # правка текста не меняет ни числа комментариев, ни их свежести —
+    # страница поста узнаёт о ней только по версии карточки
+    cards.bump('post', instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_card_deleted(sender, instance, **kwargs):
+    cards.bump('post', instance.post_id)
+
+
+@receiver(post_save, sender=Group)
+def group_card_changed(sender, instance, created, **kwargs):
+    if not created:
+        cards.bump('group', instance.pk)
+        cards.bump(cards.FEEDS, 0)
+
+
+@receiver(post_save, sender=User)
+def author_card_changed(sender, instance, created, update_fields, **kwargs):
+    # вход в систему сохраняет только last_login — карточки не меняются
+    if not created and update_fields != frozenset(['last_login']):
+        cards.bump('author', instance.pk)
+        cards.bump(cards.FEEDS, 0)
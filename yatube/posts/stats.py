@@ -0,0 +1,107 @@
+"""Денормализованные счётчики авторов и групп.
+
+Сигналы меняют счётчики атомарным UPDATE ... SET x = x + delta, так что
+страницы читают готовые числа вместо COUNT(*). Если строки статистики
+ещё нет, сигнал её не создаёт: она один раз считается агрегатами с нуля
+при первом чтении.
+
+Общее число постов для главной хранится в кэше: его сдвигают те же
+сигналы, а с истечением POSTS_COUNT_TIMEOUT оно пересчитывается заново.
+
+Пересчёт всегда читает основную базу, даже внутри `replica_reads`:
+результат сохраняется в основную базу и в общий кэш, и отставшая
+реплика иначе затёрла бы верные числа старыми (core.replicas).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from .models import AuthorStats, Comment, Follow, GroupStats, Post
+
+
+def primary(model):
+    return model.objects.using(DEFAULT_DB_ALIAS)
+
+
+def recount_author(author_id):
+    stats = AuthorStats(
+        author_id=author_id,
+        posts_count=primary(Post).filter(author_id=author_id).count(),
+        comments_count=primary(Comment).filter(author_id=author_id).count(),
+        followers_count=primary(Follow).filter(author_id=author_id).count(),
+        following_count=primary(Follow).filter(user_id=author_id).count(),
+    )
+    stats.save()
+    return stats
+
+
+def recount_group(group_id):
+    stats = GroupStats(
+        group_id=group_id,
+        posts_count=primary(Post).filter(group_id=group_id).count(),
+        comments_count=primary(Comment).filter(
+            post__group_id=group_id
+        ).count(),
+    )
+    stats.save()
+    return stats
+
+
+def author_stats(author_id):
+    try:
+        return AuthorStats.objects.get(author_id=author_id)
+    except AuthorStats.DoesNotExist:
+        return recount_author(author_id)
+
+
+def group_stats(group_id):
+    try:
+        return GroupStats.objects.get(group_id=group_id)
+    except GroupStats.DoesNotExist:
+        return recount_group(group_id)
+
+
+SITE_POSTS_KEY = 'stats:posts_count'
+
+
+def recount_site_posts():
+    count = primary(Post).count()
+    cache.set(SITE_POSTS_KEY, count, settings.POSTS_COUNT_TIMEOUT)
+    return count
+
+
+def site_posts_count():
+    count = cache.get(SITE_POSTS_KEY)
+    if count is None:
+        count = recount_site_posts()
+    return count
+
+
+def bump_site_posts(delta):
+    try:
+        cache.incr(SITE_POSTS_KEY, delta)
+    except ValueError:
+        # счётчика нет в кэше — его посчитает первое чтение
+        pass
+
+
+def bump_author(author_id, field, delta):
+    AuthorStats.objects.filter(author_id=author_id).update(
+        **{field: F(field) + delta}
+    )
+
+
+def bump_group(group_id, field, delta):
+    if group_id is not None:
+        GroupStats.objects.filter(group_id=group_id).update(
+            **{field: F(field) + delta}
+        )
+
+
+def move_post(old_group_id, new_group_id, comments):
+    """Переносит пост с его комментариями из одной группы в другую."""
+    bump_group(old_group_id, 'posts_count', -1)
+    bump_group(old_group_id, 'comments_count', -comments)
+    bump_group(new_group_id, 'posts_count', 1)
+    bump_group(new_group_id, 'comments_count', comments)
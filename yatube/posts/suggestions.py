@@ -0,0 +1,296 @@
+"""«Кого почитать»: рекомендации подписок, посчитанные пакетно.
+
+Граф целиком читается в память как разреженные матрицы — по строке
+на пользователя (множества id):
+
+- A — подписки, A[u] = на кого подписан u;
+- P — кто в каких группах пишет, P[u] = группы постов u.
+
+Оценка кандидата c для пользователя u складывается из трёх частей:
+
+- друзья друзей, (A·A)[u, c]: сколько из читаемых u авторов подписаны
+  на c;
+- похожие подписки, (S·A)[u, c]: S[u, v] — косинусная близость
+  подписок u и v (строка A·Aᵀ, делённая на длины), и c набирает
+  близость всех похожих пользователей, которые его читают;
+- общие группы, (P·Pᵀ)[u, c]: группы, где пишут оба, с весом 1/число
+  авторов группы, чтобы большие группы не забивали остальное.
+
+Строка каждой части делится на свой максимум и входит в сумму с весом
+из SUGGESTIONS_WEIGHTS. Произведения считаются построчно: строка
+результата — сумма строк второй матрицы, которую Counter складывает
+на C. Популярных авторов с тысячами подписчиков обрезаем до
+SUGGESTIONS_FANOUT, иначе их подписчики перемножались бы попарно.
+
+Считать можно всех сразу или только тех, у кого граф поменялся: такие
+пользователи попадают в SuggestionQueue из сигналов (`follow_changed`).
+Подписка u на c меняет не только строку u: у подписчиков u меняются
+друзья друзей, а у других читателей c — похожие подписки, поэтому в
+очередь встают и они (не больше SUGGESTIONS_FANOUT с каждой стороны).
+Для очереди граф читается не целиком, а только окрестность её
+пользователей, так что пересчёт одного стоит нескольких запросов по
+индексам. Что осталось за пределом FANOUT, и соседей автора по группе
+подтягивает периодический полный пересчёт (`recommend_follows --all`).
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import chain, islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from . import graph
+from .models import Follow, Post, Suggestion, SuggestionQueue
+
+User = get_user_model()
+
+# сколько самых близких пользователей учитывать в «похожих подписках»
+SIMILAR_USERS = 50
+# id в одном IN (...) при чтении окрестности
+CHUNK = 500
+
+
+def mark_changed(user_ids):
+    """Ставит пользователей в очередь пересчёта (или обновляет метку)."""
+    now = timezone.now()
+    SuggestionQueue.objects.filter(user_id__in=user_ids).update(marked=now)
+    SuggestionQueue.objects.bulk_create([
+        SuggestionQueue(user_id=pk, marked=now) for pk in user_ids
+    ], ignore_conflicts=True)
+
+
+def follow_changed(user_id, author_id):
+    """В очередь — все, чьи строки меняет подписка user на author."""
+    fanout = settings.SUGGESTIONS_FANOUT
+    followers = graph.followers_many([user_id, author_id])
+    mark_changed([
+        user_id,
+        *islice(followers[user_id], fanout),
+        *islice(followers[author_id] - {user_id}, fanout),
+    ])
+
+
+def chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK):
+        yield ids[start:start + CHUNK]
+
+
+def normalized(row):
+    top = max(row.values(), default=0)
+    return {pk: value / top for pk, value in row.items()} if top else {}
+
+
+class FollowGraph:
+    """Граф подписок и групп авторов.
+
+    Без `users` читается целиком, одним проходом по каждой таблице.
+    С `users` — только то, что нужно `recommend` для этих
+    пользователей: их подписки, читатели и подписки их авторов,
+    подписки похожих пользователей, соседи по группам.
+    """
+
+    def __init__(self, users=None, fanout=None):
+        self.fanout = fanout or settings.SUGGESTIONS_FANOUT
+        self.followees = defaultdict(set)
+        self.followers = defaultdict(list)
+        self.groups = defaultdict(set)
+        self.posters = defaultdict(list)
+        if users is None:
+            self.add_follows(Follow.objects.all())
+            self.add_postings(Post.objects.filter(group__isnull=False))
+            return
+        users = set(users)
+        self.load_followees(users)
+        authors = set(chain.from_iterable(
+            self.followees[user] for user in users
+        ))
+        for chunk in chunks(authors):
+            self.add_follows(
+                Follow.objects.filter(author_id__in=chunk), followees=False
+            )
+        similar = set(chain.from_iterable(
+            self.followers[author][:self.fanout] for author in authors
+        ))
+        self.load_followees((authors | similar) - users)
+        for chunk in chunks(users):
+            groups = Post.objects.filter(
+                author_id__in=chunk, group__isnull=False
+            ).values('group_id')
+            self.add_postings(Post.objects.filter(group_id__in=groups))
+
+    def load_followees(self, users):
+        for chunk in chunks(users):
+            self.add_follows(
+                Follow.objects.filter(user_id__in=chunk), followers=False
+            )
+
+    def add_follows(self, queryset, followees=True, followers=True):
+        # по pk: обрезка до fanout не зависит от того, как читали граф
+        rows = queryset.order_by('pk').values_list('user_id', 'author_id')
+        for user, author in rows.iterator():
+            if followees:
+                self.followees[user].add(author)
+            if followers:
+                self.followers[author].append(user)
+
+    def add_postings(self, queryset):
+        rows = queryset.order_by('group_id', 'author_id').values_list(
+            'author_id', 'group_id'
+        ).distinct()
+        for author, group in rows.iterator():
+            self.groups[author].add(group)
+            self.posters[group].append(author)
+
+    def users(self):
+        """Все, для кого есть из чего считать."""
+        return set(self.followees) | set(self.groups)
+
+    def friends_of_friends(self, user):
+        return Counter(chain.from_iterable(
+            self.followees[author] for author in self.followees[user]
+        ))
+
+    def similar_users(self, user):
+        """Строка S[user]: близость подписок к другим пользователям."""
+        own = self.followees[user]
+        shared = Counter(chain.from_iterable(
+            self.followers[author][:self.fanout] for author in own
+        ))
+        shared.pop(user, None)
+        return {
+            other: count / math.sqrt(len(own) * len(self.followees[other]))
+            for other, count in shared.items()
+        }
+
+    def similar_follows(self, user):
+        row = defaultdict(float)
+        similar = self.similar_users(user)
+        for other in heapq.nlargest(SIMILAR_USERS, similar, key=similar.get):
+            for author in self.followees[other]:
+                row[author] += similar[other]
+        return row
+
+    def co_posting(self, user):
+        row = defaultdict(float)
+        for group in self.groups[user]:
+            posters = self.posters[group]
+            for author in posters[:self.fanout]:
+                row[author] += 1 / len(posters)
+        return row
+
+    def recommend(self, user, top_k, weights):
+        """top_k кандидатов: список (id, оценка, причина)."""
+        parts = {
+            Suggestion.FRIENDS: normalized(self.friends_of_friends(user)),
+            Suggestion.SIMILAR: normalized(self.similar_follows(user)),
+            Suggestion.GROUP: normalized(self.co_posting(user)),
+        }
+        scores = defaultdict(float)
+        reasons = {}
+        best = defaultdict(float)
+        for reason, row in parts.items():
+            weight = weights[reason]
+            for candidate, value in row.items():
+                part = weight * value
+                scores[candidate] += part
+                if candidate not in reasons or part > best[candidate]:
+                    best[candidate] = part
+                    reasons[candidate] = reason
+        for pk in self.followees[user] | {user}:
+            scores.pop(pk, None)
+        top = heapq.nlargest(
+            top_k, scores.items(), key=lambda item: (item[1], -item[0])
+        )
+        return [(pk, score, reasons[pk]) for pk, score in top]
+
+
+def rebuild(user_ids=None, top_k=None, batch_size=500):
+    """Пересчитывает рекомендации; без `user_ids` — для всех.
+
+    Возвращает (число пользователей, число записанных строк). Из
+    очереди уходят только отметки, сделанные до начала пересчёта.
+    """
+    if user_ids is not None and not user_ids:
+        return 0, 0
+    started = timezone.now()
+    top_k = top_k or settings.SUGGESTIONS_TOP_K
+    weights = settings.SUGGESTIONS_WEIGHTS
+    queue = SuggestionQueue.objects.filter(marked__lt=started)
+    if user_ids is None:
+        follow_graph = FollowGraph()
+        # и те, у кого рекомендации были, а считать стало не из чего
+        wanted = follow_graph.users() | set(
+            Suggestion.objects.values_list('user_id', flat=True).distinct()
+        )
+        existing = User.objects.values_list('pk', flat=True).iterator()
+    else:
+        wanted = set(user_ids)
+        follow_graph = FollowGraph(wanted)
+        # удалённые пользователи остаются в очереди только как id
+        existing = User.objects.filter(pk__in=wanted).values_list(
+            'pk', flat=True
+        )
+        queue = queue.filter(user_id__in=wanted)
+    users = iter(sorted(wanted.intersection(existing)))
+    done = written = 0
+    while True:
+        batch = list(islice(users, batch_size))
+        if not batch:
+            break
+        rows = [
+            Suggestion(
+                user_id=user, candidate_id=candidate, score=score,
+                reason=reason, rank=rank,
+            )
+            for user in batch
+            for rank, (candidate, score, reason) in enumerate(
+                follow_graph.recommend(user, top_k, weights), 1
+            )
+        ]
+        with transaction.atomic():
+            Suggestion.objects.filter(user_id__in=batch).delete()
+            Suggestion.objects.bulk_create(rows)
+        done += len(batch)
+        written += len(rows)
+    queue.delete()
+    return done, written
+
+
+def suggested_for(user, limit=None):
+    """Блок «Кого почитать»: готовые строки одним запросом.
+
+    Тех, на кого пользователь подписался после пересчёта, отсеивает
+    кэшированный граф подписок. Пока пересчёт до пользователя не
+    дошёл, блок собирается на лету из друзей друзей (graph.suggestions).
+    """
+    if not user.is_authenticated:
+        return []
+    limit = limit or settings.SUGGESTIONS_SHOWN
+    rows = list(
+        Suggestion.objects.filter(user=user).select_related('candidate')
+    )
+    followees = graph.followees(user.pk)
+    if not rows:
+        candidates = graph.suggestions(user.pk, limit)
+        users = User.objects.in_bulk(candidates)
+        rows = [
+            Suggestion(
+                user=user, candidate=users[pk], reason=Suggestion.FRIENDS,
+                rank=rank,
+            )
+            for rank, pk in enumerate(candidates, 1) if pk in users
+        ]
+    return [
+        row for row in rows if row.candidate_id not in followees
+    ][:limit]
+
+
+def suggested_for_request(request):
+    """suggested_for зрителя один раз за запрос: валидатору и view."""
+    if not hasattr(request, '_suggested'):
+        request._suggested = suggested_for(request.user)
+    return request._suggested
@@ -0,0 +1,52 @@
+"""Медленные последствия сохранения постов, комментариев и подписок.
+
+Сигналы только ставят эти задачи в очередь (см. tasks.background), и
+запрос не ждёт раскладки по лентам, индексации и миниатюр. К моменту
+запуска объект могли удалить или подписку отменить — задачи это
+проверяют и тихо завершаются.
+"""
+from django.utils.dateparse import parse_datetime
+
+from tasks.background import task
+
+from . import search, thumbnails, timeline
+from .models import Comment, Follow, Post
+
+
+@task
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out_post(post)
+
+
+@task
+def add_author(user_id, author_id):
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        timeline.add_author(user_id, author_id)
+
+
+@task
+def backfill_author(author_id, since):
+    # автор мог снова стать тяжёлым, пока задача ждала очереди
+    if author_id not in timeline.heavy_authors():
+        timeline.backfill_author(author_id, since and parse_datetime(since))
+
+
+@task
+def index_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        search.index_post(post)
+
+
+@task
+def index_comment(comment_id):
+    comment = Comment.objects.filter(pk=comment_id).first()
+    if comment is not None:
+        search.index_comment(comment)
+
+
+@task
+def generate_thumbnail(post_id):
+    thumbnails.generate_thumbnail(post_id)
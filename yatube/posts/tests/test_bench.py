@@ -0,0 +1,48 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.management.commands import bench_urls
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+from posts.urls import urlpatterns
+
+User = get_user_model()
+
+
+class SeedBenchTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed_bench', users=30, groups=3, posts=200, comments=50,
+            follows=5, images=0, stdout=StringIO(),
+        )
+
+    def test_volumes(self):
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(
+            AuthorStats.objects.get(author__username='bench0').posts_count,
+            Post.objects.filter(author__username='bench0').count(),
+        )
+
+    def test_popular_authors_dominate(self):
+        first = Post.objects.filter(author__username='bench0').count()
+        last = Post.objects.filter(author__username='bench29').count()
+        self.assertGreater(first, last)
+
+    def test_runner_covers_every_route(self):
+        targets = bench_urls.Command().targets()
+        self.assertEqual(
+            set(targets), {pattern.name for pattern in urlpatterns}
+        )
+
+    def test_runner_rejects_too_few_requests(self):
+        with self.assertRaisesMessage(CommandError, '--requests'):
+            call_command('bench_urls', requests=1, stdout=StringIO())
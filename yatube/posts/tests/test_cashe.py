@@ -6,8 +6,10 @@ from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
+from django.urls import reverse
 
-from posts.models import Group, Post
+from posts.cards import attach_card_keys
+from posts.models import Comment, Group, Post
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -63,3 +65,64 @@ class CasheFormTests(TestCase):
         cache.clear()
         response = self.authorized_client.get('/')
         self.assertIn(post, response.context['page_obj'])
+
+
+class PostCardCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Старый текст', author=self.user, group=self.group
+        )
+        self.urls = (
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+
+    def assert_all_feeds_contain(self, text):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), text)
+
+    def test_cards_come_from_cache(self):
+        self.assert_all_feeds_contain('Старый текст')
+        Post.objects.filter(pk=self.post.pk).update(text='Тихий текст')
+        self.assert_all_feeds_contain('Старый текст')
+
+    def test_post_edit_invalidates_card(self):
+        self.assert_all_feeds_contain('Старый текст')
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assert_all_feeds_contain('Новый текст')
+
+    def test_author_rename_invalidates_card(self):
+        self.assert_all_feeds_contain('Лев Толстой')
+        self.user.first_name = 'Алексей'
+        self.user.save()
+        self.assert_all_feeds_contain('Алексей Толстой')
+
+    def test_card_versions_are_independent(self):
+        other = Post.objects.create(text='Другой', author=self.user)
+        before = {
+            post.pk: post.card_key
+            for post in attach_card_keys([self.post, other])
+        }
+        Comment.objects.create(post=self.post, author=self.user, text='Ок')
+        after = {
+            post.pk: post.card_key
+            for post in attach_card_keys([self.post, other])
+        }
+        self.assertNotEqual(before[self.post.pk], after[self.post.pk])
+        self.assertEqual(before[other.pk], after[other.pk])
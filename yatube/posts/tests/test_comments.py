@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..comments import assign_paths, comment_page
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PAGE_SIZE=3, COMMENT_MAX_DEPTH=2)
+class CommentThreadTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text, parent=parent
+        )
+
+    def reply(self, parent, text):
+        self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': text, 'parent': parent.pk},
+        )
+        return Comment.objects.get(text=text)
+
+    def test_replies_follow_their_parent(self):
+        first = self.comment('Первый')
+        second = self.comment('Второй')
+        answer = self.reply(first, 'Ответ')
+        self.assertEqual(answer.parent, first)
+        self.assertTrue(answer.path.startswith(first.path))
+        self.assertEqual(answer.depth, 1)
+        page = comment_page(self.post.pk)
+        self.assertEqual(list(page), [first, answer, second])
+        self.assertEqual(
+            list(Comment.objects.subtree(first.path).order_by('path')),
+            [first, answer],
+        )
+
+    def test_path_is_set_before_post_save(self):
+        seen = []
+
+        def remember(instance, **kwargs):
+            seen.append(instance.path)
+            seen.append(Comment.objects.get(pk=instance.pk).path)
+
+        post_save.connect(remember, sender=Comment)
+        self.addCleanup(post_save.disconnect, remember, sender=Comment)
+        comment = self.comment('Первый')
+        self.assertEqual(seen, [comment.path, comment.path])
+        self.assertTrue(comment.path)
+
+    def test_reparent_moves_whole_subtree(self):
+        first = self.comment('Первый')
+        second = self.comment('Второй')
+        reply = self.comment('Ответ', parent=first)
+        nested = self.comment('Ответ на ответ', parent=reply)
+        reply.parent = second
+        reply.save()
+        nested.refresh_from_db()
+        self.assertEqual(reply.path[:len(second.path)], second.path)
+        self.assertEqual(nested.path[:len(reply.path)], reply.path)
+        self.assertEqual(
+            list(Comment.objects.subtree(second.path)),
+            [second, reply, nested],
+        )
+        self.assertEqual(list(Comment.objects.subtree(first.path)), [first])
+        second.parent = nested
+        with self.assertRaises(ValueError):
+            second.save()
+
+    def test_deep_reply_attaches_to_last_allowed_level(self):
+        parent = self.comment('Корень')
+        for level in range(1, 4):
+            parent = self.reply(parent, f'Уровень {level}')
+        self.assertEqual(parent.depth, 2)
+        self.assertEqual(parent.parent.text, 'Уровень 1')
+
+    def test_pages_and_fragment(self):
+        comments = [self.comment(f'Комментарий {i}') for i in range(5)]
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        page = response.context['comments']
+        self.assertEqual(list(page), comments[:3])
+        self.assertEqual(page.next_cursor, comments[2].path)
+        self.assertNotContains(response, 'Комментарий 3')
+        fragment = self.client.get(
+            reverse('posts:comment_list', args=[self.post.pk]),
+            {'after': page.next_cursor},
+        )
+        self.assertEqual(list(fragment.context['comments']), comments[3:])
+        self.assertNotContains(fragment, '<html')
+        self.assertNotContains(fragment, 'Показать ещё')
+
+    def test_thread_fragment(self):
+        root = self.comment('Ветка')
+        answer = self.reply(root, 'Ответ')
+        self.comment('Другая ветка')
+        response = self.client.get(
+            reverse('posts:comment_list', args=[self.post.pk]),
+            {'thread': root.pk},
+        )
+        self.assertEqual(list(response.context['comments']), [root, answer])
+
+    def test_bad_cursor_and_foreign_parent(self):
+        other = Post.objects.create(author=self.user, text='Другой')
+        foreign = Comment.objects.create(
+            post=other, author=self.user, text='Чужой'
+        )
+        answer = self.reply(foreign, 'Ответ')
+        self.assertIsNone(answer.parent)
+        response = self.client.get(
+            reverse('posts:comment_list', args=[self.post.pk]),
+            {'after': "' OR 1=1 --"},
+        )
+        self.assertEqual(list(response.context['comments']), [answer])
+
+    def test_assign_paths_for_bulk_rows(self):
+        root = self.comment('Корень')
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text='Пачка'),
+            Comment(post=self.post, author=self.user, text='Ответ в пачке',
+                    parent=root),
+        ])
+        rows = Comment.objects.filter(path='')
+        self.assertEqual(len(rows), 2)
+        assign_paths(rows)
+        self.assertEqual(
+            [comment.text for comment in comment_page(self.post.pk)],
+            ['Корень', 'Ответ в пачке', 'Пачка'],
+        )
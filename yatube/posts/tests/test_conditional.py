@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.urls = (
+            reverse('posts:group_list', args=['test-slug']),
+            reverse('posts:profile', args=['auth']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def assertNotModified(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.templates)
+
+    def assertModified(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_pages_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Cookie', response['Vary'])
+                self.assertNotModified(
+                    self.guest_client, url, response['ETag']
+                )
+
+    def test_guest_and_user_variants_differ(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                self.assertModified(self.authorized_client, url, etag)
+
+    def test_new_comment_changes_group_and_detail(self):
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        for url in (self.urls[0], self.urls[2]):
+            with self.subTest(url=url):
+                self.assertModified(self.guest_client, url, etags[url])
+
+    def test_comment_edit_and_delete_change_detail(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        url = self.urls[2]
+        etag = self.guest_client.get(url)['ETag']
+        comment.text = 'Исправленный комментарий'
+        comment.save()
+        self.assertModified(self.guest_client, url, etag)
+        etag = self.guest_client.get(url)['ETag']
+        comment.delete()
+        self.assertModified(self.guest_client, url, etag)
+
+    def test_edit_changes_every_page(self):
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertModified(self.guest_client, url, etags[url])
+
+    def test_follow_changes_profile_for_viewer(self):
+        url = self.urls[1]
+        etag = self.authorized_client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertModified(self.authorized_client, url, etag)
+
+    def test_missing_objects_still_404(self):
+        urls = (
+            reverse('posts:group_list', args=['missing']),
+            reverse('posts:profile', args=['missing']),
+            reverse('posts:post_detail', args=[404]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
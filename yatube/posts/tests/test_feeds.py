@@ -0,0 +1,120 @@
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {i}'
+            )
+        Post.objects.create(author=cls.user, text='Пост без группы')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_feed(self, url, **headers):
+        response = self.guest_client.get(url, **headers)
+        if response.status_code != 200:
+            return response, None
+        content = (
+            b''.join(response.streaming_content) if response.streaming
+            else response.content
+        )
+        return response, ElementTree.fromstring(content)
+
+    def test_rss_and_atom(self):
+        response, rss = self.get_feed(
+            reverse('posts:index_feed', args=['rss'])
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(rss.findall('channel/item')), 4)
+        self.assertEqual(
+            rss.find('channel/item/title').text, 'Пост без группы'
+        )
+        _, atom = self.get_feed(
+            reverse('posts:group_feed', args=['test-slug', 'atom'])
+        )
+        self.assertEqual(len(atom.findall(f'{ATOM}entry')), 3)
+        _, profile = self.get_feed(
+            reverse('posts:profile_feed', args=['auth', 'rss'])
+        )
+        self.assertEqual(len(profile.findall('channel/item')), 4)
+
+    def test_unknown_feed(self):
+        urls = (
+            reverse('posts:index_feed', args=['json']),
+            reverse('posts:group_feed', args=['missing', 'rss']),
+            reverse('posts:profile_feed', args=['missing', 'rss']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_if_modified_since(self):
+        url = reverse('posts:group_feed', args=['test-slug', 'rss'])
+        response, _ = self.get_feed(url)
+        last_modified = response['Last-Modified']
+        response, _ = self.get_feed(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+        response, _ = self.get_feed(url, HTTP_IF_MODIFIED_SINCE=http_date(
+            (timezone.now() - timedelta(days=1)).timestamp()
+        ))
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_per_scope_until_new_post(self):
+        url = reverse('posts:profile_feed', args=['auth', 'rss'])
+        response, _ = self.get_feed(url)
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(2):
+            response, _ = self.get_feed(url)
+        self.assertFalse(response.streaming)
+        Post.objects.create(author=self.user, text='Новый пост')
+        response, rss = self.get_feed(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(rss.find('channel/item/title').text, 'Новый пост')
+
+    def test_cached_per_host_and_scheme(self):
+        url = reverse('posts:profile_feed', args=['auth', 'rss'])
+        self.get_feed(url)
+        variants = (
+            ({'HTTP_HOST': 'localhost'}, 'http://localhost/'),
+            ({'secure': True}, 'https://testserver/'),
+        )
+        for headers, origin in variants:
+            with self.subTest(origin=origin):
+                _, rss = self.get_feed(url, **headers)
+                link = rss.find('channel/link').text
+                self.assertTrue(link.startswith(origin))
+
+    @override_settings(FEED_CACHE_MAX_SIZE=10)
+    def test_large_feed_not_cached(self):
+        url = reverse('posts:index_feed', args=['atom'])
+        self.get_feed(url)
+        response, _ = self.get_feed(url)
+        self.assertTrue(response.streaming)
@@ -1,13 +1,18 @@
 import shutil
 import tempfile
+from io import StringIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Comment, Follow, Group, Post
+from posts.models import (Comment, Follow, Group, HeavyAuthor, Post,
+                          TimelineEntry)
+from posts.timeline import heavy_authors
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -102,3 +107,93 @@ class PostCreateFormTests(TestCase):
         self.client.login(username='username', password='password')
         response = self.client.get(reverse('posts:follow_index'))
         self.assertNotIn(post, response.context['page_obj'])
+
+
+class TimelineTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def follow_page(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.follow_page(), [post])
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.follow_page(), [post])
+        Follow.objects.get(user=self.user, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.follow_page(), [])
+
+    @override_settings(TIMELINE_SIZE=2)
+    def test_timeline_is_bounded(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        for i in range(4):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 2
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_heavy_author_is_read_on_request(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        cache.clear()
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.follow_page(), [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2)
+    def test_heavy_author_backfills_when_leaving(self):
+        others = [
+            User.objects.create_user(username=f'fan{i}') for i in range(2)
+        ]
+        for user in (self.user, *others):
+            Follow.objects.create(user=user, author=self.author)
+        with self.assertNumQueries(0):
+            self.assertIn(self.author.pk, heavy_authors())
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        # у порога автор не возвращается к раскладке сразу
+        Follow.objects.filter(user=others[0]).delete()
+        self.assertTrue(HeavyAuthor.objects.filter(author=self.author))
+        Follow.objects.filter(user=others[1]).delete()
+        self.assertFalse(HeavyAuthor.objects.filter(author=self.author))
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.follow_page(), [post])
+
+    def test_rebuild_timelines_clears_users_without_follows(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(text='Пост', author=self.author)
+        # удаление мимо сигналов, как сырым SQL
+        follows = Follow.objects.all()
+        follows._raw_delete(follows.db)
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user))
+
+    def test_rebuild_timelines_after_bulk_import(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.bulk_create([
+            Post(text=f'Импорт {i}', author=self.author) for i in range(3)
+        ])
+        self.assertEqual(self.follow_page(), [])
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(len(self.follow_page()), 3)
@@ -1,15 +1,20 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.forms import PostForm
 from posts.models import Comment, Group, Post
+from posts.thumbnails import generate_thumbnail
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -193,3 +198,61 @@ class PostCreateFormTests(TestCase):
                 text=form_data['text'],
             ).exists()
         )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostThumbnailTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def make_image(self):
+        return SimpleUploadedFile(
+            name='small.gif',
+            content=PostCreateFormTests.small_gif,
+            content_type='image/gif'
+        )
+
+    def test_image_upload_schedules_thumbnail(self):
+        with mock.patch(
+            'posts.signals.thumbnails.schedule_thumbnail'
+        ) as schedule:
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'С картинкой', 'image': self.make_image()},
+            )
+        post = Post.objects.get(text='С картинкой')
+        schedule.assert_called_once_with(post.pk)
+        self.assertEqual(post.image_thumbnail, '')
+
+    def test_generate_thumbnail_records_url(self):
+        post = Post.objects.create(
+            text='Текст', author=self.user, image=self.make_image()
+        )
+        url = generate_thumbnail(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.image_thumbnail, url)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertContains(response, url)
+
+    def test_backfill_command(self):
+        post = Post.objects.create(
+            text='Текст', author=self.user, image=self.make_image()
+        )
+        call_command('generate_thumbnails', workers=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.image_thumbnail)
@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import graph
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user, cls.friend, cls.author, cls.stranger = (
+            User.objects.create_user(username=name)
+            for name in ('user', 'friend', 'author', 'stranger')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def follow(self, user, author):
+        Follow.objects.create(user=user, author=author)
+
+    def test_lookups_are_cached_and_reset_on_change(self):
+        self.assertFalse(graph.is_following(self.user, self.author.pk))
+        self.assertEqual(graph.followers(self.author.pk), set())
+        self.client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        with self.assertNumQueries(1):
+            self.assertTrue(graph.is_following(self.user, self.author.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_following(self.user, self.author.pk))
+        self.assertIn(self.user.pk, graph.followers(self.author.pk))
+        Follow.objects.get(user=self.user, author=self.author).delete()
+        self.assertFalse(graph.is_following(self.user, self.author.pk))
+        self.assertEqual(graph.followers(self.author.pk), set())
+
+    def test_rolled_back_follow_leaves_no_edge(self):
+        graph.followees(self.user.pk)
+        try:
+            with transaction.atomic():
+                self.follow(self.user, self.author)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(graph.is_following(self.user, self.author.pk))
+
+    def test_profile_following_depends_on_viewer(self):
+        self.follow(self.friend, self.author)
+        url = reverse('posts:profile', args=[self.author.username])
+        self.assertFalse(self.client.get(url).context['following'])
+        self.follow(self.user, self.author)
+        self.assertTrue(self.client.get(url).context['following'])
+
+    def test_batched_lookups_and_suggestions(self):
+        self.follow(self.user, self.friend)
+        self.follow(self.friend, self.author)
+        self.follow(self.friend, self.stranger)
+        self.follow(self.user, self.stranger)
+        self.assertEqual(
+            graph.followed_among(
+                self.user, [self.friend.pk, self.author.pk]
+            ),
+            {self.friend.pk},
+        )
+        self.assertEqual(graph.suggestions(self.user.pk), [self.author.pk])
+
+    def test_mutual_uses_cached_sets(self):
+        self.follow(self.user, self.friend)
+        self.follow(self.friend, self.user)
+        self.follow(self.user, self.author)
+        self.follow(self.stranger, self.user)
+        self.assertEqual(graph.mutual(self.user.pk), {self.friend.pk})
+        with self.assertNumQueries(0):
+            self.assertEqual(graph.mutual(self.user.pk), {self.friend.pk})
+
+    def test_group_page_offers_follow_for_unfollowed_authors(self):
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(author=self.author, group=group, text='Пост')
+        url = reverse('posts:group_list', args=[group.slug])
+        follow_url = reverse(
+            'posts:profile_follow', args=[self.author.username]
+        )
+        response = self.client.get(url)
+        self.assertContains(response, follow_url)
+        self.follow(self.user, self.author)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, follow_url)
+
+    def test_forget_after_bulk_create(self):
+        graph.followees(self.user.pk)
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=self.author),
+        ])
+        self.assertFalse(graph.is_following(self.user, self.author.pk))
+        graph.forget([self.user.pk])
+        self.assertTrue(graph.is_following(self.user, self.author.pk))
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image, features
+
+from ..images import VARIANTS_DIR
+from ..models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def make_upload(name='photo.jpg', size=(1200, 800), image_format='JPEG',
+                exif=True):
+    picture = Image.new('RGB', size, (200, 30, 30))
+    options = {}
+    if exif:
+        data = Image.Exif()
+        data[0x010F] = 'Камера'
+        options['exif'] = data.tobytes()
+    buffer = BytesIO()
+    picture.save(buffer, image_format, **options)
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type=f'image/{image_format.lower()}'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASKS_MODE='eager')
+class ImageProcessingTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, upload):
+        return self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'С картинкой', 'image': upload},
+        )
+
+    def test_upload_is_stripped_and_cut_into_widths(self):
+        self.create(make_upload())
+        post = Post.objects.get()
+        with default_storage.open(post.image.name) as source:
+            self.assertFalse(Image.open(source).getexif())
+        self.assertIn('-480.jpg 480w', post.image_srcset)
+        self.assertIn('-960.jpg 960w', post.image_srcset)
+        # шире оригинала не растягиваем
+        self.assertNotIn('1440w', post.image_srcset)
+        self.assertTrue(post.image_thumbnail.endswith('-960.jpg'))
+        with default_storage.open(
+            post.image_thumbnail[len(settings.MEDIA_URL):]
+        ) as source:
+            self.assertEqual(Image.open(source).size, (960, 339))
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertContains(response, f'srcset="{post.image_srcset}"')
+
+    def test_stripped_copy_replaces_original(self):
+        self.create(make_upload('swap.jpg'))
+        post = Post.objects.get()
+        self.assertNotEqual(post.image.name, 'posts/swap.jpg')
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertFalse(default_storage.exists('posts/swap.jpg'))
+
+    @override_settings(TASKS_MODE='worker')
+    def test_unprocessed_original_is_not_served(self):
+        self.create(make_upload())
+        post = Post.objects.get()
+        self.assertFalse(post.image_thumbnail)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, post.image.url)
+        self.assertContains(response, 'Изображение обрабатывается')
+
+    @skipUnless(features.check('webp'), 'PIL собран без WebP')
+    def test_webp_variants(self):
+        self.create(make_upload())
+        post = Post.objects.get()
+        self.assertIn('-960.webp 960w', post.image_webp_srcset)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'type="image/webp"')
+
+    def test_new_image_replaces_variants(self):
+        self.create(make_upload())
+        post = Post.objects.get()
+        old = post.image_thumbnail
+        post.image = make_upload('other.png', image_format='PNG', exif=False)
+        post.save()
+        post.refresh_from_db()
+        self.assertNotEqual(post.image_thumbnail, old)
+        folder = os.path.join(VARIANTS_DIR, str(post.pk))
+        self.assertEqual(len(default_storage.listdir(folder)[1]), 2)
+
+    def test_limits(self):
+        cases = (
+            ({'POST_IMAGE_MAX_SIZE': 100}, make_upload(), 'Файл больше'),
+            (
+                {'POST_IMAGE_MAX_PIXELS': 1000}, make_upload(),
+                'Слишком большое разрешение',
+            ),
+            (
+                {}, make_upload('photo.bmp', image_format='BMP', exif=False),
+                'Поддерживаются только',
+            ),
+        )
+        for limits, upload, error in cases:
+            with self.subTest(error=error), override_settings(**limits):
+                response = self.create(upload)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, error)
+        self.assertFalse(Post.objects.exists())
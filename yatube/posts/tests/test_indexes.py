@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class FeedQueryPlanTests(TestCase):
+    """Основные запросы лент идут по индексам, без полного скана."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(15):
+            cls.post = Post.objects.create(
+                text=f'Пост {i}', author=cls.user, group=cls.group
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text='Комм'
+            )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        cache.clear()
+
+    def plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        return {
+            query['sql']: query_plan(query['sql'])
+            for query in queries
+            if query['sql'].startswith('SELECT')
+            and ('"posts_post"' in query['sql']
+                 or '"posts_comment"' in query['sql'])
+        }
+
+    def assert_indexed(self, url, allow_sort=False):
+        for sql, plan in self.plans(url).items():
+            with self.subTest(url=url, sql=sql):
+                full_scans = [
+                    step for step in plan
+                    if step.startswith('SCAN') and 'USING' not in step
+                ]
+                self.assertEqual(full_scans, [], plan)
+                if not allow_sort:
+                    self.assertNotIn(
+                        'USE TEMP B-TREE FOR ORDER BY', plan, plan
+                    )
+
+    def feed_urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+
+    def test_feeds_use_indexes(self):
+        for url in self.feed_urls():
+            self.assert_indexed(url)
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_cursor_feeds_use_indexes(self):
+        for url in self.feed_urls():
+            page = self.authorized_client.get(url).context.get('page_obj')
+            if page is not None:
+                url += f'?after={page.next_cursor}'
+            self.assert_indexed(url)
+
+    def test_follow_feed_uses_timeline_index(self):
+        # сортируется только ограниченная лента (TIMELINE_SIZE),
+        # а не вся таблица постов
+        self.assert_indexed(reverse('posts:follow_index'), allow_sort=True)
+
+    def test_comment_fragment_uses_path_index(self):
+        comment = self.post.comments.first()
+        url = reverse('posts:comment_list', kwargs={'post_id': self.post.id})
+        self.assert_indexed(f'{url}?after={comment.path}')
+        self.assert_indexed(f'{url}?thread={comment.pk}')
@@ -1,7 +1,11 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post
+from ..stats import author_stats, group_stats
 
 User = get_user_model()
 
@@ -55,3 +59,59 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     task._meta.get_field(field).help_text, expected_value)
+
+
+class StatsCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def test_signals_keep_counters_in_sync(self):
+        """Сигналы обновляют счётчики без пересчёта агрегатов."""
+        self.assertEqual(author_stats(self.user.pk).posts_count, 0)
+        self.assertEqual(group_stats(self.group.pk).posts_count, 0)
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Комм')
+        Follow.objects.create(user=self.reader, author=self.user)
+        author = author_stats(self.user.pk)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author_stats(self.reader.pk).comments_count, 1)
+        self.assertEqual(author_stats(self.reader.pk).following_count, 1)
+        group = group_stats(self.group.pk)
+        self.assertEqual(group.posts_count, 1)
+        self.assertEqual(group.comments_count, 1)
+        post.delete()
+        self.assertEqual(author_stats(self.user.pk).posts_count, 0)
+        self.assertEqual(author_stats(self.reader.pk).comments_count, 0)
+        self.assertEqual(group_stats(self.group.pk).comments_count, 0)
+
+    def test_group_change_moves_counters(self):
+        other = Group.objects.create(title='Другая', slug='other')
+        group_stats(self.group.pk)
+        group_stats(other.pk)
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        post.group = other
+        post.save()
+        self.assertEqual(group_stats(self.group.pk).posts_count, 0)
+        self.assertEqual(group_stats(other.pk).posts_count, 1)
+
+    def test_recount_stats_repairs_drift(self):
+        author_stats(self.user.pk)
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Пост {i}') for i in range(3)
+        ])
+        self.assertEqual(author_stats(self.user.pk).posts_count, 0)
+        call_command('recount_stats', batch_size=1, stdout=StringIO())
+        self.assertEqual(author_stats(self.user.pk).posts_count, 3)
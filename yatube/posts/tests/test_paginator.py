@@ -0,0 +1,151 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..paginator import EstimatedCountPaginator, LookaheadPaginator
+from ..stats import site_posts_count
+
+User = get_user_model()
+
+
+class LookaheadPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=cls.user) for i in range(95)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_counts_only_window_ahead(self):
+        paginator = LookaheadPaginator(Post.objects.all(), 10, lookahead=2)
+        page = paginator.get_page(1)
+        self.assertEqual(paginator.count, 31)
+        self.assertFalse(paginator.count_is_exact)
+        self.assertTrue(page.has_next())
+        page = paginator.get_page(8)
+        self.assertEqual(paginator.count, 95)
+        self.assertTrue(paginator.count_is_exact)
+        self.assertEqual(page.paginator.num_pages, 10)
+
+    def test_out_of_range_falls_back_to_last_page(self):
+        paginator = LookaheadPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.get_page(100).number, 10)
+        self.assertEqual(len(paginator.get_page('x')), 10)
+
+    @override_settings(POSTS_PAGE_COUNT='estimated')
+    def test_estimated_mode_renders_window_without_last_page(self):
+        url = reverse('posts:profile', args=['auth'])
+        # прогрев: строка счётчиков автора считается при первом чтении
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url, {'page': 5})
+        self.assertFalse(any(
+            'COUNT' in query['sql'] and 'LIMIT' not in query['sql']
+            for query in queries
+            if 'posts_post' in query['sql']
+        ))
+        content = response.content.decode()
+        self.assertIn('?page=7', content)
+        self.assertNotIn('?page=10', content)
+        self.assertNotIn('Последняя', content)
+
+    def test_exact_mode_elides_long_ranges(self):
+        response = self.guest_client.get(
+            reverse('posts:profile', args=['auth']), {'page': 6}
+        )
+        content = response.content.decode()
+        for page in (1, 4, 8, 9, 10):
+            with self.subTest(page=page):
+                self.assertIn(f'?page={page}"', content)
+        self.assertNotIn('?page=2"', content)
+        self.assertNotIn('?page=3"', content)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=cls.user) for i in range(95)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def paginator(self, estimate):
+        return EstimatedCountPaginator(
+            Post.objects.all(), 10, estimate=estimate, threshold=50
+        )
+
+    def test_small_estimate_counts_exactly(self):
+        paginator = EstimatedCountPaginator(
+            Post.objects.all(), 10, estimate=30, threshold=50
+        )
+        self.assertTrue(paginator.count_is_exact)
+        self.assertEqual(paginator.count, 95)
+        self.assertEqual(type(paginator.get_page(1)), Page)
+
+    def test_large_estimate_skips_count(self):
+        paginator = self.paginator(1000)
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.get_page(3)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        self.assertEqual(paginator.num_pages, 100)
+        self.assertEqual(len(page), 10)
+        self.assertTrue(page.has_next())
+        self.assertEqual(page.end_index(), 30)
+
+    def test_overestimate_falls_back_to_last_page(self):
+        paginator = self.paginator(1000)
+        page = paginator.get_page(10)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next())
+        page = paginator.get_page(50)
+        self.assertTrue(paginator.count_is_exact)
+        self.assertEqual(paginator.count, 95)
+        self.assertEqual(page.number, 10)
+
+    def test_underestimate_keeps_next_pages_reachable(self):
+        paginator = self.paginator(60)
+        page = paginator.get_page(7)
+        self.assertEqual(paginator.num_pages, 6)
+        self.assertTrue(page.has_next())
+        self.assertEqual(page.next_page_number(), 8)
+        self.assertEqual(len(paginator.get_page(10)), 5)
+
+    @override_settings(PAGINATION_EXACT_COUNT_THRESHOLD=50)
+    def test_profile_uses_author_stats_for_page_count(self):
+        url = reverse('posts:profile', args=['auth'])
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url, {'page': 2})
+        self.assertFalse(any(
+            'COUNT' in query['sql'] for query in queries
+            if 'posts_post' in query['sql']
+        ))
+        content = response.content.decode()
+        self.assertIn('?page=4"', content)
+        self.assertNotIn('Последняя', content)
+        self.assertEqual(
+            len(response.context['page_obj'].object_list), 10
+        )
+
+    def test_site_posts_count_follows_signals(self):
+        self.assertEqual(site_posts_count(), 95)
+        post = Post.objects.create(text='Новый', author=self.user)
+        self.assertEqual(site_posts_count(), 96)
+        post.delete()
+        self.assertEqual(site_posts_count(), 95)
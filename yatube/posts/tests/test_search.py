@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, SearchPosting
+from ..search import search_posts
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.cats = Post.objects.create(
+            author=cls.user, group=cls.group,
+            text='Мои кошки любят спать на подоконнике',
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.other, text='Собака спит у двери',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_stemmer_collapses_word_forms(self):
+        self.assertEqual(stem('посты'), stem('постов'))
+        self.assertEqual(stem('кошка'), stem('кошки'))
+
+    def test_search_matches_word_forms_and_all_terms(self):
+        tasks = {
+            'кошка': [self.cats],
+            'КОШКАМ подоконнике': [self.cats],
+            'кошки двери': [],
+            'спать': [self.cats],
+        }
+        for query, expected in tasks.items():
+            with self.subTest(query=query):
+                page = search_posts(query, 10)
+                self.assertEqual(list(page.object_list), expected)
+
+    def test_filters_by_group_and_author(self):
+        Post.objects.create(author=self.other, text='Кошка соседа')
+        self.assertEqual(
+            list(search_posts('кошка', 10, group=self.group).object_list),
+            [self.cats],
+        )
+        self.assertEqual(
+            list(search_posts('кошка', 10, author='other').object_list)[0]
+            .author, self.other,
+        )
+
+    def test_index_follows_edits_and_comments(self):
+        self.dogs.text = 'Попугай спит у двери'
+        self.dogs.save()
+        self.assertFalse(search_posts('собака', 10).object_list)
+        self.assertEqual(
+            list(search_posts('попугай', 10).object_list), [self.dogs]
+        )
+        Comment.objects.create(
+            post=self.dogs, author=self.user, text='Какой зелёный попугай'
+        )
+        self.assertEqual(
+            list(search_posts('зелёный', 10).object_list), [self.dogs]
+        )
+
+    def test_keyset_pages_do_not_overlap(self):
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Кошка номер {i}')
+            for i in range(5)
+        ])
+        call_command('rebuild_search_index', stdout=StringIO())
+        first = search_posts('кошка', 4)
+        self.assertTrue(first.has_next())
+        second = search_posts('кошка', 4, after=first.next_cursor)
+        self.assertFalse(second.has_next())
+        seen = [post.pk for post in first] + [post.pk for post in second]
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_search_page(self):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'кошки', 'group': 'test-slug'}
+        )
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(
+            list(response.context['page_obj'].object_list), [self.cats]
+        )
+        response = self.guest_client.get(reverse('posts:search'))
+        self.assertIsNone(response.context['page_obj'])
+
+    def test_rebuild_search_index(self):
+        SearchPosting.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            list(search_posts('подоконник', 10).object_list), [self.cats]
+        )
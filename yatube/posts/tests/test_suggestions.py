@@ -0,0 +1,147 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import graph
+from ..models import Follow, Group, Post, Suggestion, SuggestionQueue
+from ..suggestions import FollowGraph, rebuild, suggested_for
+
+User = get_user_model()
+
+WEIGHTS = {'friends': 1.0, 'similar': 1.0, 'group': 0.5}
+
+
+class SuggestionsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        (cls.user, cls.friend, cls.author, cls.peer, cls.other,
+         cls.writer, cls.stranger) = (
+            User.objects.create_user(username=name)
+            for name in ('user', 'friend', 'author', 'peer', 'other',
+                         'writer', 'stranger')
+        )
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        # друг друга: user → friend → author
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.author)
+        # похожие подписки: peer, как и user, читает friend
+        Follow.objects.create(user=cls.peer, author=cls.friend)
+        Follow.objects.create(user=cls.peer, author=cls.other)
+        # общая группа
+        Post.objects.create(author=cls.user, group=group, text='Пост')
+        Post.objects.create(author=cls.writer, group=group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def suggested(self, user):
+        return {
+            row.candidate_id: row.reason
+            for row in Suggestion.objects.filter(user=user)
+        }
+
+    def test_full_rebuild_mixes_three_reasons(self):
+        self.assertTrue(
+            SuggestionQueue.objects.filter(user_id=self.user.pk).exists()
+        )
+        rebuild()
+        self.assertEqual(self.suggested(self.user), {
+            self.author.pk: Suggestion.FRIENDS,
+            self.other.pk: Suggestion.SIMILAR,
+            self.writer.pk: Suggestion.GROUP,
+        })
+        ranks = Suggestion.objects.filter(user=self.user).values_list(
+            'rank', flat=True
+        )
+        self.assertEqual(list(ranks), [1, 2, 3])
+        self.assertFalse(SuggestionQueue.objects.exists())
+
+    def test_follow_queues_affected_users_only(self):
+        Follow.objects.create(user=self.writer, author=self.stranger)
+        rebuild()
+        untouched = set(
+            Suggestion.objects.filter(user=self.friend).values_list(
+                'pk', flat=True
+            )
+        )
+        Follow.objects.create(user=self.stranger, author=self.friend)
+        # сам подписчик, его читатели и другие читатели автора
+        self.assertEqual(
+            set(SuggestionQueue.objects.values_list('user_id', flat=True)),
+            {self.stranger.pk, self.writer.pk, self.user.pk, self.peer.pk},
+        )
+        output = StringIO()
+        call_command('recommend_follows', stdout=output)
+        self.assertIn('Пересчитано пользователей: 4,', output.getvalue())
+        self.assertIn(self.author.pk, self.suggested(self.stranger))
+        self.assertIn(self.friend.pk, self.suggested(self.writer))
+        self.assertEqual(
+            set(Suggestion.objects.filter(user=self.friend).values_list(
+                'pk', flat=True
+            )),
+            untouched,
+        )
+        self.assertFalse(SuggestionQueue.objects.exists())
+
+    def test_neighbourhood_graph_matches_full_graph(self):
+        full = FollowGraph()
+        for user in User.objects.all():
+            with self.subTest(user=user.username):
+                self.assertEqual(
+                    FollowGraph([user.pk]).recommend(user.pk, 10, WEIGHTS),
+                    full.recommend(user.pk, 10, WEIGHTS),
+                )
+
+    def test_block_falls_back_to_friends_of_friends(self):
+        self.assertEqual(
+            [row.candidate for row in suggested_for(self.user)],
+            [self.author],
+        )
+        self.assertFalse(Suggestion.objects.exists())
+
+    def test_block_reads_rows_in_one_query(self):
+        rebuild()
+        graph.followees(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [row.candidate.username for row in suggested_for(self.user)],
+                ['author', 'other', 'writer'],
+            )
+        # подписался после пересчёта — из блока сразу пропадает
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [row.candidate for row in response.context['suggested']],
+            [self.other, self.writer],
+        )
+        self.assertContains(response, 'Кого почитать')
+
+    def test_profile_shows_block_to_viewer(self):
+        rebuild()
+        url = reverse('posts:profile', args=[self.writer.username])
+        response = self.client.get(url)
+        self.assertEqual(
+            [row.candidate for row in response.context['suggested']],
+            [self.author, self.other, self.writer],
+        )
+        self.assertContains(response, 'Кого почитать')
+        # подписка меняет блок — и ETag профиля
+        Follow.objects.create(user=self.user, author=self.other)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        suggested = response.context['suggested']
+        self.assertNotIn(self.other, [row.candidate for row in suggested])
+        guest = Client().get(url)
+        self.assertEqual(guest.context['suggested'], [])
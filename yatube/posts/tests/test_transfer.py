@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+from ..search import search_posts
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, TASKS_MODE='eager')
+class TransferCommandsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Кошка на подоконнике',
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        Post.objects.filter(pk=cls.post.pk).update(
+            created=timezone.now() - timedelta(days=30)
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Зелёный попугай'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def export_and_import(self, file_format):
+        call_command(
+            'export_content', self.directory, format=file_format,
+            stdout=StringIO(),
+        )
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        output = StringIO()
+        call_command(
+            'import_content', self.directory, format=file_format,
+            batch_size=1, stdout=output,
+        )
+        return output.getvalue()
+
+    def test_round_trip(self):
+        for file_format in ('ndjson', 'csv'):
+            with self.subTest(file_format=file_format):
+                output = self.export_and_import(file_format)
+                self.assertIn('строк/с', output)
+                post = Post.objects.get()
+                self.assertNotEqual(post.pk, self.post.pk)
+                self.assertEqual(post.author, self.user)
+                self.assertEqual(post.group, self.group)
+                self.assertLess(
+                    post.created, timezone.now() - timedelta(days=29)
+                )
+                self.assertEqual(post.comments.get().author, self.reader)
+                self.assertTrue(Follow.objects.filter(
+                    user=self.reader, author=self.user
+                ).exists())
+                self.assertEqual(User.objects.count(), 2)
+                self.assertEqual(Group.objects.count(), 1)
+
+    def test_existing_follows_not_counted(self):
+        call_command(
+            'export_content', self.directory, stdout=StringIO(),
+        )
+        Post.objects.all().delete()
+        output = StringIO()
+        call_command(
+            'import_content', self.directory, skip_derived=True,
+            stdout=output,
+        )
+        self.assertIn('follows: 0 строк', output.getvalue())
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_media_copied_and_content_indexed(self):
+        self.export_and_import('ndjson')
+        post = Post.objects.get()
+        self.assertTrue(post.image.storage.exists(post.image.name))
+        self.assertEqual(post.image_thumbnail, '')
+        self.assertEqual(list(search_posts('попугай', 10)), [post])
@@ -2,10 +2,13 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Group, Post
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.utils import assert_queries_do_not_grow
 
 User = get_user_model()
 
@@ -190,3 +193,121 @@ class PaginatorViewsTest(TestCase):
             'posts:profile', kwargs={'username': self.user}
         ) + '?page=2')
         self.assertEqual(len(response.context['page_obj']), settings.THREE)
+
+
+@override_settings(POSTS_PAGINATION='cursor')
+class CursorPaginatorViewsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([
+            Post(
+                text=f'Тестовый текст {i}',
+                author=cls.user,
+                group=cls.group
+            ) for i in range(13)
+        ])
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Токены after/before листают ленту без пропусков."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.authorized_client.get(url).context['page_obj']
+                self.assertEqual(len(first), settings.TEN)
+                self.assertFalse(first.has_previous())
+                second = self.authorized_client.get(
+                    url, {'after': first.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(second), settings.THREE)
+                self.assertFalse(second.has_next())
+                back = self.authorized_client.get(
+                    url, {'before': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+
+    def test_cursor_page_skips_count_query(self):
+        """Keyset-пагинация не выполняет COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(reverse('posts:index'))
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'after': 'broken'}
+        )
+        self.assertEqual(len(response.context['page_obj']), settings.TEN)
+
+
+class QueryCountViewsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def new_user(self):
+        return User.objects.create_user(
+            username=f'user{User.objects.count()}'
+        )
+
+    def add_posts(self, count):
+        for _ in range(count):
+            author = self.new_user()
+            Follow.objects.get_or_create(user=self.user, author=author)
+            Post.objects.create(text='Текст', author=author, group=self.group)
+
+    def add_comments(self, count):
+        for _ in range(count):
+            Comment.objects.create(
+                post=self.post, author=self.new_user(), text='Ок'
+            )
+
+    def test_feeds_do_not_run_query_per_post(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                assert_queries_do_not_grow(
+                    self, self.authorized_client, url, self.add_posts
+                )
+
+    def test_post_detail_does_not_run_query_per_comment(self):
+        assert_queries_do_not_grow(
+            self, self.authorized_client,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            self.add_comments,
+        )
@@ -0,0 +1,26 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(client, url):
+    # первый запрос прогревает лениво создаваемые строки (счётчики и т.п.)
+    client.get(url)
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    return len(queries)
+
+
+def assert_queries_do_not_grow(test, client, url, add_rows, rows=5):
+    """Число запросов страницы не зависит от числа строк на ней.
+
+    `add_rows(n)` должна добавить на страницу ещё n объектов.
+    """
+    add_rows(1)
+    expected = count_queries(client, url)
+    add_rows(rows)
+    test.assertEqual(
+        count_queries(client, url), expected,
+        f'Число запросов к {url} растёт вместе с числом записей'
+    )
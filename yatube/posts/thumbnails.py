@@ -0,0 +1,48 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+После коммита транзакции фоновая задача чистит оригинал от EXIF и режет
+карточки нескольких ширин (см. posts.images); URL карточки базовой
+ширины записывается в `Post.image_thumbnail`, а `srcset` — рядом. Шаблоны
+только выводят готовые URL и никогда не ресайзят картинку в запросе.
+"""
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from . import cards, images
+from .models import Post
+
+
+def generate_thumbnail(post_id):
+    """Обрабатывает картинку поста и сохраняет URL карточек."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return None
+    name = post.image.name
+    with default_storage.open(name) as source:
+        picture = Image.open(source)
+        picture.load()
+    clean_name = images.strip_original(name, picture)
+    src, srcset, webp_srcset = images.build_variants(
+        post_id, clean_name, picture
+    )
+    # картинку могли заменить, пока она обрабатывалась
+    updated = Post.objects.filter(pk=post_id, image=name).update(
+        image=clean_name,
+        image_thumbnail=src,
+        image_srcset=srcset,
+        image_webp_srcset=webp_srcset,
+    )
+    if clean_name != name:
+        # не обновили — картинку заменили, чистая копия никому не нужна
+        default_storage.delete(name if updated else clean_name)
+    if updated:
+        cards.bump('post', post_id)
+    return src
+
+
+def schedule_thumbnail(post_id):
+    """Ставит подготовку миниатюры в очередь фоновых задач."""
+    # импорт здесь: модуль задач сам импортирует thumbnails
+    from .tasks import generate_thumbnail as generate_thumbnail_task
+
+    generate_thumbnail_task.delay(post_id)
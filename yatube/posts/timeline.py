@@ -0,0 +1,205 @@
+"""Материализованные ленты подписок (fan-out on write).
+
+При публикации поста его id раскладывается в ленты подписчиков автора,
+и страница `/follow/` читает готовую ленту вместо join'а Follow x Post.
+Для авторов с очень большим числом подписчиков раскладка не делается:
+их посты подмешиваются в ленту при чтении (fan-out on read).
+
+Кто из авторов «тяжёлый», хранит таблица HeavyAuthor, а правят её
+сигналы подписки по счётчику подписчиков из posts.stats. Автор
+становится тяжёлым, перешагнув TIMELINE_FANOUT_LIMIT, а перестаёт —
+только опустившись ниже LEAVE_RATIO от порога, чтобы подписки и
+отписки на границе не гоняли его туда и обратно. Уходя из таблицы,
+автор дораскладывает по лентам посты, опубликованные, пока он был
+тяжёлым (задача backfill_author).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import graph
+from .models import Follow, HeavyAuthor, Post, TimelineEntry
+from .stats import author_stats
+
+HEAVY_AUTHORS_KEY = 'timeline:heavy_authors'
+HEAVY_AUTHORS_TIMEOUT = 24 * 60 * 60
+# доля порога, ниже которой тяжёлый автор снова раскладывается по лентам
+LEAVE_RATIO = 0.9
+
+
+def heavy_authors():
+    """id авторов, чьи посты не раскладываются по лентам."""
+    authors = cache.get(HEAVY_AUTHORS_KEY)
+    if authors is None:
+        authors = frozenset(
+            HeavyAuthor.objects.values_list('author_id', flat=True)
+        )
+        cache.set(HEAVY_AUTHORS_KEY, authors, HEAVY_AUTHORS_TIMEOUT)
+    return authors
+
+
+def forget_heavy_authors():
+    # как graph.edge_changed: сразу и ещё раз после коммита
+    cache.delete(HEAVY_AUTHORS_KEY)
+    transaction.on_commit(lambda: cache.delete(HEAVY_AUTHORS_KEY))
+
+
+def followers_changed(author_id):
+    """Переводит автора между раскладкой и чтением по числу подписчиков.
+
+    Если автор только что перестал быть тяжёлым, возвращает его
+    удалённую строку HeavyAuthor: посты с `since` надо дораскладывать.
+    """
+    followers = author_stats(author_id).followers_count
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    heavy = author_id in heavy_authors()
+    if not heavy and followers > limit:
+        HeavyAuthor.objects.get_or_create(
+            author_id=author_id, defaults={'since': timezone.now()}
+        )
+        forget_heavy_authors()
+    elif heavy and followers < limit * LEAVE_RATIO:
+        row = HeavyAuthor.objects.filter(author_id=author_id).first()
+        if row is not None:
+            row.delete()
+        forget_heavy_authors()
+        return row
+    return None
+
+
+def refresh_heavy_authors():
+    """Пересчитывает таблицу HeavyAuthor с нуля агрегатом по Follow.
+
+    Полный GROUP BY — только для офлайн-команд (rebuild_timelines).
+    """
+    authors = (
+        Follow.objects.order_by().values('author')
+        .annotate(followers=Count('id'))
+        .filter(followers__gt=settings.TIMELINE_FANOUT_LIMIT)
+        .values_list('author', flat=True)
+    )
+    with transaction.atomic():
+        HeavyAuthor.objects.all().delete()
+        HeavyAuthor.objects.bulk_create(
+            HeavyAuthor(author_id=pk) for pk in authors
+        )
+    forget_heavy_authors()
+
+
+def trim_timelines(user_ids):
+    """Обрезает ленты до TIMELINE_SIZE самых свежих записей."""
+    overflowed = (
+        TimelineEntry.objects.filter(user_id__in=user_ids)
+        .order_by()
+        .values('user')
+        .annotate(entries=Count('id'))
+        .filter(entries__gt=settings.TIMELINE_SIZE)
+        .values_list('user', 'entries')
+    )
+    for user_id, entries in overflowed:
+        stale = TimelineEntry.objects.filter(user_id=user_id).order_by(
+            'created', 'post_id'
+        ).values_list('pk', flat=True)[:entries - settings.TIMELINE_SIZE]
+        TimelineEntry.objects.filter(pk__in=list(stale)).delete()
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if post.author_id in heavy_authors():
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, created=post.created)
+            for user_id in follower_ids
+        ],
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines(follower_ids)
+
+
+def add_author(user_id, author_id):
+    """Подтягивает в ленту свежие посты нового автора из подписок."""
+    if author_id in heavy_authors():
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-created'
+    ).values_list('pk', 'created')[:settings.TIMELINE_SIZE]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=pk, created=created)
+            for pk, created in posts
+        ],
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id])
+
+
+def backfill_author(author_id, since):
+    """Раскладывает посты автора с `since` по лентам его подписчиков."""
+    posts = Post.objects.filter(author_id=author_id)
+    if since is not None:
+        posts = posts.filter(created__gte=since)
+    posts = list(
+        posts.order_by('-created')
+        .values_list('pk', 'created')[:settings.TIMELINE_SIZE]
+    )
+    if not posts:
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    )
+    step = max(1, settings.TIMELINE_BATCH_SIZE // len(posts))
+    for start in range(0, len(follower_ids), step):
+        batch = follower_ids[start:start + step]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=pk, created=created)
+                for user_id in batch
+                for pk, created in posts
+            ],
+            batch_size=settings.TIMELINE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        trim_timelines(batch)
+
+
+def remove_author(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild_timeline(user_id):
+    """Пересобирает ленту пользователя с нуля по таблице Follow."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    light_authors = Follow.objects.filter(user_id=user_id).exclude(
+        author_id__in=heavy_authors()
+    ).values('author_id')
+    posts = Post.objects.filter(author_id__in=light_authors).order_by(
+        '-created'
+    ).values_list('pk', 'created')[:settings.TIMELINE_SIZE]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=pk, created=created)
+            for pk, created in posts
+        ],
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+    )
+
+
+def timeline_posts(user):
+    """Посты ленты подписок: готовая лента плюс посты «тяжёлых» авторов."""
+    pulled = graph.followees(user.pk) & heavy_authors()
+    pushed = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.for_feed().filter(
+        Q(pk__in=pushed) | Q(author_id__in=pulled)
+    )
@@ -0,0 +1,290 @@
+"""Перенос контента между инсталляциями: выгрузка и загрузка.
+
+Каждая таблица — отдельный файл <таблица>.ndjson или <таблица>.csv в
+каталоге выгрузки, картинки постов — в его подкаталоге media/. Строки
+пишутся и читаются генераторами, так что память не зависит от объёма
+таблиц; в памяти держатся только соответствия старых id новым.
+"""
+import csv
+import json
+import os
+import shutil
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from . import graph, search
+from .bulk import bulk_create_with_pks, explicit_created
+from .comments import assign_paths
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = (NDJSON, CSV)
+MEDIA_DIR = 'media'
+
+# таблица, модель и поля в порядке загрузки: ссылки идут только назад
+TABLES = (
+    ('users', User, (
+        'id', 'username', 'password', 'first_name', 'last_name', 'email',
+        'is_active', 'date_joined',
+    )),
+    ('groups', Group, ('id', 'title', 'slug', 'description')),
+    ('posts', Post, (
+        'id', 'author_id', 'group_id', 'text', 'created', 'image',
+    )),
+    ('comments', Comment, (
+        'id', 'post_id', 'author_id', 'parent_id', 'text', 'created',
+    )),
+    ('follows', Follow, ('user_id', 'author_id')),
+)
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def table_path(directory, table, file_format):
+    return os.path.join(directory, f'{table}.{file_format}')
+
+
+def write_ndjson(path, fields, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8') as output:
+        for row in rows:
+            output.write(json.dumps(
+                dict(zip(fields, row)), cls=DjangoJSONEncoder,
+                ensure_ascii=False,
+            ))
+            output.write('\n')
+            count += 1
+    return count
+
+
+def write_csv(path, fields, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow('' if value is None else value for value in row)
+            count += 1
+    return count
+
+
+def read_ndjson(path):
+    with open(path, encoding='utf-8') as source:
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as source:
+        yield from csv.DictReader(source)
+
+
+WRITERS = {NDJSON: write_ndjson, CSV: write_csv}
+READERS = {NDJSON: read_ndjson, CSV: read_csv}
+
+
+def export_table(directory, file_format, table, model, fields,
+                 chunk_size=2000):
+    rows = model.objects.order_by('pk').values_list(*fields).iterator(
+        chunk_size=chunk_size
+    )
+    return WRITERS[file_format](
+        table_path(directory, table, file_format), fields, rows
+    )
+
+
+def export_media(directory):
+    """Копирует картинки постов; файлы идут потоком, кусками."""
+    copied = 0
+    names = Post.objects.exclude(image='').values_list(
+        'image', flat=True
+    ).distinct().iterator()
+    for name in names:
+        target = os.path.join(directory, MEDIA_DIR, name)
+        if os.path.exists(target) or not default_storage.exists(name):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with default_storage.open(name) as source, \
+                open(target, 'wb') as output:
+            shutil.copyfileobj(source, output)
+        copied += 1
+    return copied
+
+
+def parse_row(model, row):
+    """Приводит значения строки к типам полей модели.
+
+    Из CSV всё приходит строками, из NDJSON даты — тоже строками.
+    """
+    values = {}
+    for name, value in row.items():
+        field = model._meta.get_field(name)
+        if value == '' and field.null:
+            value = None
+        values[name] = field.to_python(value)
+    return values
+
+
+class Importer:
+    """Загружает выгрузку пачками по batch_size строк.
+
+    Каждая пачка — своя транзакция и один bulk_create. Пользователи и
+    группы, которые уже есть (по username и slug), не дублируются:
+    ссылки на них переназначаются на существующие записи. Миниатюры
+    картинок не строятся — это дело generate_thumbnails.
+    """
+
+    def __init__(self, directory, file_format, batch_size=1000):
+        self.directory = directory
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.ids = {model: {} for _, model, _ in TABLES}
+        self.media = {}
+
+    def rows(self, table, model):
+        path = table_path(self.directory, table, self.file_format)
+        if not os.path.exists(path):
+            return
+        for row in READERS[self.file_format](path):
+            yield parse_row(model, row)
+
+    def load(self, table, model):
+        loaders = {
+            'users': self.load_users,
+            'groups': self.load_groups,
+            'posts': self.load_posts,
+            'comments': self.load_comments,
+            'follows': self.load_follows,
+        }
+        total = 0
+        for batch in batched(self.rows(table, model), self.batch_size):
+            with transaction.atomic(), explicit_created(Post, Comment):
+                total += loaders[table](batch)
+        return total
+
+    def load_existing(self, model, field, batch):
+        """Строки, чей ключ `field` уже есть, сопоставляет с записями."""
+        existing = dict(model.objects.filter(
+            **{f'{field}__in': [row[field] for row in batch]}
+        ).values_list(field, 'pk'))
+        fresh = []
+        for row in batch:
+            if row[field] in existing:
+                self.ids[model][row['id']] = existing[row[field]]
+            else:
+                fresh.append(row)
+        objs = bulk_create_with_pks(model, [
+            model(**{name: value for name, value in row.items()
+                     if name != 'id'})
+            for row in fresh
+        ])
+        for row, obj in zip(fresh, objs):
+            self.ids[model][row['id']] = obj.pk
+        return len(batch)
+
+    def load_users(self, batch):
+        return self.load_existing(User, 'username', batch)
+
+    def load_groups(self, batch):
+        return self.load_existing(Group, 'slug', batch)
+
+    def load_posts(self, batch):
+        users, groups = self.ids[User], self.ids[Group]
+        rows = [row for row in batch if row['author_id'] in users]
+        posts = bulk_create_with_pks(Post, [
+            Post(
+                author_id=users[row['author_id']],
+                group_id=groups.get(row['group_id']),
+                text=row['text'],
+                created=row['created'],
+                image=self.copy_media(row['image']),
+            )
+            for row in rows
+        ])
+        for row, post in zip(rows, posts):
+            self.ids[Post][row['id']] = post.pk
+        search.insert_postings([
+            posting for post in posts
+            for posting in search.post_postings(post)
+        ])
+        return len(posts)
+
+    def load_comments(self, batch):
+        users, posts = self.ids[User], self.ids[Post]
+        parents = self.ids[Comment]
+        rows = [
+            row for row in batch
+            if row['post_id'] in posts and row['author_id'] in users
+        ]
+        # ответы идут после родителей: pk в выгрузке возрастают
+        comments = bulk_create_with_pks(Comment, [
+            Comment(
+                post_id=posts[row['post_id']],
+                author_id=users[row['author_id']],
+                parent_id=parents.get(row.get('parent_id')),
+                text=row['text'],
+                created=row['created'],
+            )
+            for row in rows
+        ])
+        for row, comment in zip(rows, comments):
+            parents[row['id']] = comment.pk
+        assign_paths(comments)
+        search.insert_postings([
+            posting for comment in comments
+            for posting in search.comment_postings(comment)
+        ])
+        return len(comments)
+
+    def load_follows(self, batch):
+        users = self.ids[User]
+        follows = [
+            Follow(user_id=users[row['user_id']],
+                   author_id=users[row['author_id']])
+            for row in batch
+            if row['user_id'] in users and row['author_id'] in users
+            and users[row['user_id']] != users[row['author_id']]
+        ]
+        # уже существующие пары ignore_conflicts пропускает молча —
+        # вставленное считаем по числу подписок этих читателей
+        existing = Follow.objects.filter(
+            user_id__in={follow.user_id for follow in follows}
+        )
+        before = existing.count()
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        graph.forget(
+            {follow.user_id for follow in follows}
+            | {follow.author_id for follow in follows}
+        )
+        return existing.count() - before
+
+    def copy_media(self, name):
+        """Кладёт картинку в хранилище; имя может смениться при конфликте."""
+        if not name:
+            return ''
+        if name not in self.media:
+            source = os.path.join(self.directory, MEDIA_DIR, name)
+            if not os.path.exists(source):
+                self.media[name] = ''
+            else:
+                with open(source, 'rb') as image:
+                    self.media[name] = default_storage.save(
+                        name, File(image)
+                    )
+        return self.media[name]
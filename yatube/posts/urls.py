@@ -15,7 +15,21 @@ urlpatterns = [
         'posts/<int:post_id>/comment/',
         views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comment_list, name='comment_list'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
+    path('feed/<str:feed_type>/', views.index_feed, name='index_feed'),
+    path(
+        'group/<slug:slug>/feed/<str:feed_type>/',
+        views.group_feed, name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feed/<str:feed_type>/',
+        views.profile_feed, name='profile_feed'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
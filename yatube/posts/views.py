@@ -1,77 +1,163 @@
+from calendar import timegm
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.paginator import Paginator
-from django.http import HttpResponseRedirect
+from django.http import (Http404, HttpResponse, HttpResponseRedirect,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.views.decorators.cache import cache_page
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from core.replicas import mark_written, replica_reads
+
+from . import graph
+from .cards import attach_card_keys, card_cache
+from .comments import comment_page, reply_parent
+from .conditional import (conditional_page, detail_validator, group_validator,
+                          profile_validator)
+from .feeds import (FEED_TYPES, cache_stream, feed_cache_key, newest_created,
+                    post_items)
+from .forms import CommentForm, PostForm, SearchForm
+from .models import Comment, Follow, Group, Post
+from .paginator import (CursorPaginator, EstimatedCountPaginator,
+                        LookaheadPaginator)
+from .search import search_posts
+from .stats import author_stats, group_stats, site_posts_count
+from .suggestions import suggested_for, suggested_for_request
+from .timeline import timeline_posts
 
 User = get_user_model()
 
 
-def get_page_context(queryset, request):
-    paginator = Paginator(queryset, settings.TEN)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def get_page_context(queryset, request, estimate=None):
+    """Страница ленты.
+
+    `estimate` — известное заранее число постов или функция, которая
+    его вернёт: в cursor-режиме число не нужно и не вычисляется.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if settings.POSTS_PAGINATION == 'cursor' or after or before:
+        paginator = CursorPaginator(
+            queryset, settings.TEN, after=after, before=before
+        )
+        page_obj = paginator.get_page()
+    else:
+        if settings.POSTS_PAGE_COUNT == 'estimated':
+            paginator = LookaheadPaginator(queryset, settings.TEN)
+        elif settings.POSTS_PAGE_COUNT == 'cached':
+            if callable(estimate):
+                estimate = estimate()
+            paginator = EstimatedCountPaginator(
+                queryset, settings.TEN, estimate=estimate
+            )
+        else:
+            paginator = Paginator(queryset, settings.TEN)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+    page_obj.object_list = attach_card_keys(list(page_obj.object_list))
     return {
         'page_obj': page_obj,
+        'card_timeout': settings.POST_CARD_TIMEOUT,
+        'card_cache': card_cache(),
     }
 
 
+@replica_reads
 @cache_page(1 * 20)
 def index(request):
-    context = get_page_context(Post.objects.all(), request)
+    context = get_page_context(
+        Post.objects.for_feed(), request, site_posts_count
+    )
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+@conditional_page(group_validator)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.for_feed()
+    stats = group_stats(group.pk)
     context = {
         'group': group,
+        'stats': stats,
     }
-    context.update(get_page_context(post_list, request))
+    context.update(get_page_context(post_list, request, stats.posts_count))
+    context['followed'] = graph.followed_among(
+        request.user, [post.author_id for post in context['page_obj']]
+    )
     return render(request, 'posts/group_list.html', context)
 
 
+@replica_reads
+@conditional_page(profile_validator)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    count_posts = post_list.count()
-    user = request.user
-    following = user.is_authenticated and author.following.exists()
+    post_list = author.posts.for_feed()
+    stats = author_stats(author.pk)
+    following = graph.is_following(request.user, author.pk)
     context = {
         'author': author,
-        'count_posts': count_posts,
+        'stats': stats,
+        'count_posts': stats.posts_count,
         'following': following,
+        'suggested': suggested_for_request(request),
     }
-    context.update(get_page_context(post_list, request))
+    context.update(get_page_context(post_list, request, stats.posts_count))
     return render(request, 'posts/profile.html', context)
 
 
+@replica_reads
+@conditional_page(detail_validator)
 def post_detail(request, post_id):
     form = CommentForm()
-    post = get_object_or_404(Post, pk=post_id)
-    author = post.author
-    posts_count = author.posts.count()
-    comments = post.comments.all()
-    following = (
-        request.user.is_authenticated
-        and post.author.following.filter(user=request.user).exists()
-    )
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+    posts_count = author_stats(post.author_id).posts_count
+    comments = comment_page(post.pk, request.GET.get('after'))
+    reply_to = request.GET.get('reply_to', '')
+    if request.user.is_authenticated and reply_to.isdigit():
+        reply_to = Comment.objects.select_related('author').filter(
+            pk=reply_to, post=post
+        ).first()
+    else:
+        reply_to = None
+    following = graph.is_following(request.user, post.author_id)
     context = {
         'post_id': post,
         'posts_count': posts_count,
         'form': form,
         'comments': comments,
+        'reply_to': reply_to,
         'following': following,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@replica_reads
+@conditional_page(detail_validator)
+def comment_list(request, post_id):
+    """Фрагмент со следующей страницей комментариев или веткой."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    root = request.GET.get('thread', '')
+    if root.isdigit():
+        root = get_object_or_404(
+            Comment.objects.only('pk', 'path'), pk=root, post=post
+        )
+    else:
+        root = None
+    context = {
+        'post_id': post,
+        'comments': comment_page(post.pk, request.GET.get('after'), root),
+        'thread': root,
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None,)
@@ -113,16 +199,17 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = reply_parent(post, request.POST.get('parent'))
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_reads
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(
-        author__following__user=request.user
-    )
+    post_list = timeline_posts(request.user)
     context = get_page_context(post_list, request)
+    context['suggested'] = suggested_for(request.user)
     return render(request, 'posts/follow.html', context)
 
 
@@ -132,6 +219,7 @@ def profile_follow(request, username):
     user = request.user
     if author != user:
         Follow.objects.get_or_create(user=user, author=author)
+        mark_written(request)
         return redirect(
             'posts:profile',
             username=username
@@ -142,5 +230,96 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     user = request.user
-    Follow.objects.get(user=user, author__username=username).delete()
+    Follow.objects.filter(user=user, author__username=username).delete()
+    mark_written(request)
     return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
+
+
+def search(request):
+    form = SearchForm(request.GET or None)
+    context = {'form': form, 'page_obj': None}
+    if form.is_valid():
+        page_obj = search_posts(
+            form.cleaned_data['q'],
+            settings.TEN,
+            group=form.cleaned_data['group'],
+            author=form.cleaned_data['author'],
+            after=request.GET.get('after'),
+        )
+        page_obj.object_list = attach_card_keys(page_obj.object_list)
+        query = request.GET.copy()
+        query.pop('after', None)
+        context.update({
+            'page_obj': page_obj,
+            'page_query': query.urlencode() + '&',
+            'card_timeout': settings.POST_CARD_TIMEOUT,
+            'card_cache': card_cache(),
+        })
+    return render(request, 'posts/search.html', context)
+
+
+def feed_response(request, feed_type, queryset, scope, **feed_kwargs):
+    """Лента Atom/RSS: 304 по If-Modified-Since, кэш или поток."""
+    feed_class = FEED_TYPES.get(feed_type)
+    if feed_class is None:
+        raise Http404
+    newest = newest_created(queryset)
+    last_modified = newest and timegm(newest.utctimetuple())
+    response = get_conditional_response(request, last_modified=last_modified)
+    if response is None:
+        key = feed_cache_key(request, feed_type, scope, newest)
+        cached = cache.get(key)
+        if cached is not None:
+            response = HttpResponse(
+                cached, content_type=feed_class.content_type
+            )
+        else:
+            feed = feed_class(
+                feed_url=request.build_absolute_uri(),
+                language=settings.LANGUAGE_CODE,
+                **feed_kwargs
+            )
+            feed.newest = newest
+            chunks = feed.stream(
+                post_items(feed, queryset, request.build_absolute_uri)
+            )
+            response = StreamingHttpResponse(
+                cache_stream(chunks, key),
+                content_type=feed_class.content_type,
+            )
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def index_feed(request, feed_type):
+    return feed_response(
+        request, feed_type, Post.objects.for_feed(), 'index',
+        title='Последние обновления на сайте',
+        link=request.build_absolute_uri(reverse('posts:index')),
+        description='Новые посты всех авторов',
+    )
+
+
+def group_feed(request, slug, feed_type):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request, feed_type, group.posts.for_feed(), f'group:{group.pk}',
+        title=f'Записи сообщества {group.title}',
+        link=request.build_absolute_uri(
+            reverse('posts:group_list', args=[slug])
+        ),
+        description=group.description,
+    )
+
+
+def profile_feed(request, username, feed_type):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, feed_type, author.posts.for_feed(), f'author:{author.pk}',
+        title=f'Посты пользователя {author.get_full_name() or username}',
+        link=request.build_absolute_uri(
+            reverse('posts:profile', args=[username])
+        ),
+        description=f'Новые посты {username}',
+    )
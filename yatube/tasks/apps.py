@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.core.signals import request_started
+
+
+class TasksConfig(AppConfig):
+    name = 'tasks'
+
+    def ready(self):
+        from .background import start_sweeper
+
+        # не в ready(): manage.py migrate и прочие команды не должны
+        # ходить в таблицу Task из фона
+        request_started.connect(
+            start_sweeper, dispatch_uid='tasks.start_sweeper'
+        )
@@ -0,0 +1,256 @@
+"""Фоновые задачи без внешнего брокера.
+
+Функция, помеченная `@task`, ставится в очередь вызовом `.delay(...)`.
+Очередь — таблица Task в основной базе: строка пишется в той же
+транзакции, что и данные, которые задача обработает, поэтому откат
+убирает и задачу. Дальше всё решает TASKS_MODE:
+
+- 'eager' — задача выполняется сразу, в запросе (отладка и тесты);
+- 'thread' — после коммита строка отдаётся пулу потоков процесса;
+- 'worker' — строка только ждёт в очереди `manage.py run_worker`.
+
+В режиме 'thread' очередь всё равно не держится на памяти процесса:
+фоновый поток-«подметальщик» раз в TASKS_SWEEP_INTERVAL секунд делает
+то же, что проход run_worker, — возвращает зависшие задачи и отдаёт
+пулу те, что пора выполнить. Так подбираются строки, закоммиченные
+перед перезапуском, потерянные on_commit и повторы, чей таймер умер
+вместе с процессом. Подметальщик запускается с первым запросом или
+первой задачей процесса.
+
+Строку забирает тот, чей UPDATE ... WHERE status = 'queued' сработал
+первым, так что пул и воркер могут разбирать одну очередь. Упавшая
+задача возвращается в очередь с экспоненциальной задержкой, после
+`max_attempts` попыток остаётся в статусе failed. Успешные строки
+удаляются. Аргументы задачи сериализуются в JSON — передавайте id,
+а не объекты моделей.
+"""
+import json
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .metrics import metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+# исходы run_task
+DONE = 'done'
+SKIPPED = 'skipped'  # задачу уже забрал другой исполнитель или она не к сроку
+RETRIED = 'retried'
+FAILED = 'failed'
+
+_executor = None
+_executor_lock = threading.Lock()
+_sweeper = None
+
+
+class BackgroundTask:
+    def __init__(self, func, max_attempts=None):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return enqueue(self, *args, **kwargs)
+
+
+def task(func=None, *, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу: `@task` или `@task(...)`."""
+    def register(func):
+        background = BackgroundTask(func, max_attempts)
+        registry[background.name] = background
+        return background
+    if func is None:
+        return register
+    return register(func)
+
+
+def get_task(name):
+    if name not in registry:
+        # модуль с задачей ещё не импортирован в этом процессе
+        import_string(name)
+    return registry[name]
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TASKS_WORKERS,
+                thread_name_prefix='tasks',
+            )
+    start_sweeper()
+    return _executor
+
+
+def start_sweeper(**kwargs):
+    """Запускает подметальщика очереди, если режим 'thread' (один раз)."""
+    global _sweeper
+    if settings.TASKS_MODE != 'thread' or _sweeper is not None:
+        return
+    with _executor_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(
+                target=sweep_forever, name='tasks-sweeper', daemon=True
+            )
+            _sweeper.start()
+
+
+def sweep(limit=100):
+    """Один проход: зависшие — в очередь, просроченные — в пул.
+
+    Свежие строки не трогаем: их только что отдал пулу on_commit, а
+    повторная отправка стоила бы лишнего UPDATE в `claim`.
+    """
+    release_stale()
+    grace = timedelta(seconds=settings.TASKS_SWEEP_INTERVAL)
+    batch = due_tasks(limit, before=timezone.now() - grace)
+    for pk in batch:
+        get_executor().submit(run_in_thread, pk)
+    return batch
+
+
+def sweep_forever():
+    while True:
+        time.sleep(settings.TASKS_SWEEP_INTERVAL)
+        try:
+            sweep()
+        except Exception:
+            logger.exception('Проход по очереди задач упал')
+        finally:
+            connection.close()
+
+
+def enqueue(background, *args, **kwargs):
+    """Ставит задачу в очередь; в режиме 'eager' сразу выполняет её."""
+    metrics.record(background.name, 'enqueued')
+    if settings.TASKS_MODE == 'eager':
+        if run_callable(background, args, kwargs):
+            metrics.record(background.name, 'failed')
+        return None
+    job = Task.objects.create(
+        name=background.name,
+        arguments=json.dumps([args, kwargs]),
+        max_attempts=background.max_attempts or settings.TASKS_MAX_ATTEMPTS,
+    )
+    if settings.TASKS_MODE == 'thread':
+        transaction.on_commit(lambda: submit(job.pk))
+    return job
+
+
+def submit(pk, delay=0):
+    if delay:
+        timer = threading.Timer(delay, submit, args=(pk,))
+        timer.daemon = True
+        timer.start()
+    else:
+        get_executor().submit(run_in_thread, pk)
+
+
+def run_in_thread(pk):
+    try:
+        return run_task(pk)
+    finally:
+        # у каждого потока пула своё соединение с БД
+        connection.close()
+
+
+def run_callable(background, args, kwargs):
+    """Выполняет задачу, пишет метрики; возвращает текст ошибки или ''."""
+    started = time.perf_counter()
+    try:
+        background(*args, **kwargs)
+    except Exception:
+        logger.exception('Задача %s упала', background.name)
+        error = traceback.format_exc()
+    else:
+        error = ''
+        metrics.record(background.name, 'succeeded')
+    metrics.observe(background.name, (time.perf_counter() - started) * 1000)
+    return error
+
+
+def claim(pk):
+    """Забирает задачу в работу; False, если её уже взял кто-то другой."""
+    now = timezone.now()
+    return bool(
+        Task.objects.filter(
+            pk=pk, status=Task.QUEUED, run_at__lte=now
+        ).update(
+            status=Task.RUNNING, locked_at=now, attempts=F('attempts') + 1
+        )
+    )
+
+
+def retry_delay(attempts):
+    return settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run_task(pk):
+    """Выполняет задачу из очереди; возвращает исход — DONE, SKIPPED,
+    RETRIED (упала и ждёт повтора) или FAILED (попытки кончились)."""
+    if not claim(pk):
+        return SKIPPED
+    job = Task.objects.get(pk=pk)
+    try:
+        background = get_task(job.name)
+        args, kwargs = json.loads(job.arguments)
+    except (ImportError, KeyError, ValueError):
+        logger.exception('Задача %s не найдена', job.name)
+        metrics.record(job.name, 'failed')
+        Task.objects.filter(pk=pk).update(
+            status=Task.FAILED, last_error=traceback.format_exc()
+        )
+        return FAILED
+    error = run_callable(background, args, kwargs)
+    if not error:
+        Task.objects.filter(pk=pk).delete()
+        return DONE
+    if job.attempts < job.max_attempts:
+        delay = retry_delay(job.attempts)
+        metrics.record(job.name, 'retried')
+        Task.objects.filter(pk=pk).update(
+            status=Task.QUEUED, locked_at=None, last_error=error,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+        if settings.TASKS_MODE == 'thread':
+            submit(pk, delay)
+        return RETRIED
+    metrics.record(job.name, 'failed')
+    Task.objects.filter(pk=pk).update(status=Task.FAILED, last_error=error)
+    return FAILED
+
+
+def due_tasks(limit, before=None):
+    return list(
+        Task.objects.filter(
+            status=Task.QUEUED, run_at__lte=before or timezone.now()
+        )
+        .order_by('run_at', 'pk')
+        .values_list('pk', flat=True)[:limit]
+    )
+
+
+def release_stale():
+    """Возвращает в очередь задачи, чей исполнитель пропал (упал процесс)."""
+    stale = timezone.now() - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_at__lt=stale
+    ).update(status=Task.QUEUED, locked_at=None)
@@ -0,0 +1,66 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.background import (DONE, FAILED, RETRIED, SKIPPED, due_tasks,
+                              release_stale, run_in_thread, run_task)
+
+
+class Command(BaseCommand):
+    help = 'Разбирает очередь фоновых задач (таблица Task).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.TASKS_WORKERS,
+            help='Потоков выполнения; 1 — всё в основном потоке'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько задач брать из очереди за один проход'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=settings.TASKS_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать то, что уже пора выполнить, и выйти'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        pool = ThreadPoolExecutor(workers) if workers > 1 else None
+        outcomes = Counter()
+        try:
+            while True:
+                released = release_stale()
+                if released:
+                    self.stderr.write(
+                        f'Возвращено в очередь зависших задач: {released}'
+                    )
+                batch = due_tasks(options['batch_size'])
+                if pool is None:
+                    results = [run_task(pk) for pk in batch]
+                else:
+                    results = list(pool.map(run_in_thread, batch))
+                outcomes.update(results)
+                if options['once'] and len(batch) < options['batch_size']:
+                    break
+                if not batch:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        # задачи, забранные другим исполнителем, и отложенные повторы —
+        # не сбои: «не выполнено» считает только исчерпавшие попытки
+        self.stdout.write(
+            f'Задач выполнено: {outcomes[DONE]}, '
+            f'отложено на повтор: {outcomes[RETRIED]}, '
+            f'забрано другими: {outcomes[SKIPPED]}, '
+            f'не выполнено: {outcomes[FAILED]}'
+        )
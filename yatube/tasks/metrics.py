@@ -0,0 +1,75 @@
+"""Счётчики и время выполнения фоновых задач для `/metrics`.
+
+Как и гистограммы core.perf, живут в памяти процесса; глубина очереди
+читается из таблицы Task при каждом снятии метрик.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count
+
+from core.perf import RollingHistogram
+
+EVENTS = ('enqueued', 'succeeded', 'retried', 'failed')
+
+
+class TaskMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.durations = {}
+
+    def record(self, name, event):
+        with self.lock:
+            counters = self.counters.setdefault(name, dict.fromkeys(EVENTS, 0))
+            counters[event] += 1
+
+    def observe(self, name, duration_ms, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            histogram = self.durations.get(name)
+            if histogram is None:
+                histogram = self.durations[name] = RollingHistogram(
+                    settings.PERF_WINDOW, settings.PERF_WINDOWS
+                )
+            histogram.add(duration_ms, now)
+
+    def render(self, now=None):
+        """Метрики в текстовом формате Prometheus."""
+        from .models import Task
+
+        now = time.time() if now is None else now
+        lines = []
+        with self.lock:
+            for name, counters in sorted(self.counters.items()):
+                for event, value in counters.items():
+                    lines.append(
+                        f'yatube_tasks_total{{task="{name}",'
+                        f'event="{event}"}} {value}'
+                    )
+            for name, histogram in sorted(self.durations.items()):
+                values, total = histogram.quantiles(now)
+                for quantile, value in values.items():
+                    lines.append(
+                        f'yatube_task_ms{{task="{name}",'
+                        f'quantile="{quantile}"}} {value:.3f}'
+                    )
+        depth = dict(
+            Task.objects.order_by().values_list('status')
+            .annotate(total=Count('id'))
+        )
+        for status, _ in Task.STATUSES:
+            lines.append(
+                f'yatube_tasks_queue{{status="{status}"}} '
+                f'{depth.get(status, 0)}'
+            )
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.durations.clear()
+
+
+metrics = TaskMetrics()
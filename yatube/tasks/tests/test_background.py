@@ -0,0 +1,158 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post, SearchPosting
+from tasks.background import (DONE, FAILED, RETRIED, SKIPPED, release_stale,
+                              run_task, sweep, task)
+from tasks.metrics import metrics
+from tasks.models import Task
+
+User = get_user_model()
+
+calls = []
+
+
+@task
+def remember(value, twice=False):
+    calls.append(value)
+    if twice:
+        calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError('сломалось')
+
+
+class BackgroundTaskTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+        metrics.clear()
+
+    @override_settings(TASKS_MODE='eager')
+    def test_eager_mode_runs_inline(self):
+        self.assertIsNone(remember.delay(1, twice=True))
+        self.assertEqual(calls, [1, 1])
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(metrics.counters[remember.name]['succeeded'], 1)
+
+    @override_settings(TASKS_MODE='worker')
+    def test_worker_runs_queued_task(self):
+        job = remember.delay('x')
+        self.assertEqual(calls, [])
+        self.assertEqual(job.status, Task.QUEUED)
+        output = StringIO()
+        call_command('run_worker', once=True, workers=1, stdout=output)
+        self.assertEqual(calls, ['x'])
+        self.assertFalse(Task.objects.exists())
+        self.assertIn('Задач выполнено: 1', output.getvalue())
+
+    @override_settings(TASKS_MODE='worker')
+    def test_worker_reports_retries_apart_from_failures(self):
+        explode.delay()
+        output = StringIO()
+        call_command('run_worker', once=True, workers=1, stdout=output)
+        self.assertIn('отложено на повтор: 1', output.getvalue())
+        self.assertIn('не выполнено: 0', output.getvalue())
+
+    @override_settings(TASKS_MODE='worker')
+    def test_rollback_drops_task(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                remember.delay('x')
+                raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_MODE='worker', TASKS_RETRY_DELAY=60)
+    def test_retries_with_backoff_then_fails(self):
+        job = explode.delay()
+        self.assertEqual(run_task(job.pk), RETRIED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('сломалось', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=50))
+        # задержка ещё не прошла
+        self.assertEqual(run_task(job.pk), SKIPPED)
+        Task.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertEqual(run_task(job.pk), FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(metrics.counters[explode.name]['retried'], 1)
+        self.assertEqual(metrics.counters[explode.name]['failed'], 1)
+
+    @override_settings(TASKS_MODE='worker', TASKS_LOCK_TIMEOUT=60)
+    def test_stale_running_task_is_released(self):
+        job = remember.delay('x')
+        Task.objects.filter(pk=job.pk).update(
+            status=Task.RUNNING,
+            locked_at=timezone.now() - timedelta(seconds=120),
+        )
+        self.assertEqual(release_stale(), 1)
+        self.assertEqual(run_task(job.pk), DONE)
+        self.assertEqual(calls, ['x'])
+
+    @override_settings(
+        TASKS_MODE='thread', TASKS_SWEEP_INTERVAL=30, TASKS_LOCK_TIMEOUT=60
+    )
+    def test_sweep_resubmits_forgotten_tasks(self):
+        with mock.patch('tasks.background.transaction.on_commit'):
+            fresh, lost, stale = (remember.delay(value) for value in 'abc')
+        past = timezone.now() - timedelta(seconds=120)
+        Task.objects.filter(pk__in=[lost.pk, stale.pk]).update(run_at=past)
+        Task.objects.filter(pk=stale.pk).update(
+            status=Task.RUNNING, locked_at=past
+        )
+        with mock.patch('tasks.background.get_executor') as executor:
+            self.assertEqual(sweep(), [lost.pk, stale.pk])
+        self.assertEqual(executor.return_value.submit.call_count, 2)
+
+
+@override_settings(TASKS_MODE='worker')
+class PostSideEffectsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def test_post_create_defers_indexing(self):
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('posts:post_create'), {'text': 'Фоновые задачи'})
+        post = Post.objects.get()
+        self.assertFalse(SearchPosting.objects.filter(post=post).exists())
+        self.assertLessEqual(
+            {'posts.tasks.fan_out_post', 'posts.tasks.index_post'},
+            set(Task.objects.values_list('name', flat=True)),
+        )
+        call_command('run_worker', once=True, workers=1, stdout=StringIO())
+        self.assertTrue(SearchPosting.objects.filter(post=post).exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_metrics_show_queue(self):
+        Post.objects.create(author=self.user, text='Пост')
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(reverse('metrics'))
+        content = response.content.decode()
+        self.assertIn(
+            'yatube_tasks_total{task="posts.tasks.index_post",'
+            'event="enqueued"}',
+            content,
+        )
+        self.assertIn(
+            f'yatube_tasks_queue{{status="queued"}} {Task.objects.count()}',
+            content,
+        )
@@ -0,0 +1,61 @@
+"""Выбор кэш-бэкенда для settings.CACHES.
+
+Бэкенд задаётся переменной окружения YATUBE_CACHE:
+
+* `locmem` — память процесса, для разработки и тестов (по умолчанию);
+* `sqlite` — общий для воркеров файл SQLite с LRU и лимитом размера,
+  когда внешнего сервиса нет;
+* `file` — файловый кэш Django, тоже общий для воркеров;
+* `memcached` — внешний memcached по адресу YATUBE_CACHE_LOCATION.
+
+Рядом всегда есть алиас NO_CACHE — заглушка, которая ничего не хранит:
+через неё фрагменты рендерятся мимо кэша (см. posts/cards.py).
+"""
+import os
+
+LOCMEM = 'locmem'
+SQLITE = 'sqlite'
+FILE = 'file'
+MEMCACHED = 'memcached'
+
+NO_CACHE = 'nocache'
+
+
+def build_caches(base_dir, backend=None, location=None,
+                 max_entries=10000, max_size=64 * 1024 * 1024):
+    backend = backend or os.environ.get('YATUBE_CACHE', LOCMEM)
+    location = location or os.environ.get('YATUBE_CACHE_LOCATION')
+    if backend == LOCMEM:
+        default = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    elif backend == SQLITE:
+        default = {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': location or os.path.join(base_dir, 'cache.sqlite3'),
+            'OPTIONS': {
+                'MAX_ENTRIES': max_entries,
+                'MAX_SIZE': max_size,
+            },
+        }
+    elif backend == FILE:
+        default = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location or os.path.join(base_dir, 'cache'),
+            'OPTIONS': {
+                'MAX_ENTRIES': max_entries,
+            },
+        }
+    elif backend == MEMCACHED:
+        default = {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': location or '127.0.0.1:11211',
+        }
+    else:
+        raise ValueError(f'Неизвестный кэш-бэкенд: {backend}')
+    return {
+        'default': default,
+        NO_CACHE: {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    }
@@ -0,0 +1,74 @@
+"""Профили SQLite для settings.DATABASES.
+
+Профиль задаётся переменной окружения YATUBE_DB:
+
+* `plain` — настройки Django по умолчанию: журнал отката и новое
+  соединение на каждый запрос (по умолчанию, для разработки и тестов);
+* `tuned` — для боевого сервера: WAL (читатели не ждут писателя),
+  synchronous=NORMAL, отображение файла в память, больший кэш страниц,
+  временные таблицы в памяти, ожидание блокировки вместо мгновенной
+  ошибки и постоянные соединения.
+
+Реплики для чтения лент (core.replicas) — файлы через запятую в
+YATUBE_DB_REPLICAS, алиасы replica1, replica2 и т.д. с тем же профилем.
+В тестах они зеркалят основную базу (TEST MIRROR); набор тестов
+рассчитан на запуск без реплик.
+
+PRAGMA выполняет обработчик `connection_created` из core.db: они
+живут в ключе PRAGMAS настроек соединения, а OPTIONS Django целиком
+передаёт в sqlite3.connect.
+"""
+import os
+
+PLAIN = 'plain'
+TUNED = 'tuned'
+REPLICA_PREFIX = 'replica'
+
+TUNED_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # в WAL коммит не ждёт fsync, база при сбое питания не портится —
+    # теряются только последние транзакции
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # отрицательное значение — размер в КиБ, а не в страницах
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def build_databases(base_dir, profile=None, name=None, replicas=None,
+                    timeout=20, conn_max_age=600):
+    profile = profile or os.environ.get('YATUBE_DB', PLAIN)
+    name = name or os.environ.get('YATUBE_DB_NAME') or os.path.join(
+        base_dir, 'db.sqlite3'
+    )
+    if replicas is None:
+        replicas = [
+            replica for replica in
+            os.environ.get('YATUBE_DB_REPLICAS', '').split(',') if replica
+        ]
+    default = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+    }
+    if profile == TUNED:
+        default.update({
+            # сколько секунд ждать занятую базу (busy timeout)
+            'OPTIONS': {'timeout': timeout},
+            'CONN_MAX_AGE': conn_max_age,
+            'PRAGMAS': dict(TUNED_PRAGMAS),
+        })
+    elif profile != PLAIN:
+        raise ValueError(f'Неизвестный профиль базы: {profile}')
+    databases = {'default': default}
+    for number, replica in enumerate(replicas, 1):
+        databases[f'{REPLICA_PREFIX}{number}'] = dict(
+            default,
+            NAME=os.path.join(base_dir, replica),
+            TEST={'MIRROR': 'default'},
+        )
+    return databases
+
+
+def replica_aliases(databases):
+    return [alias for alias in databases if alias.startswith(REPLICA_PREFIX)]
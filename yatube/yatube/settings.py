@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+from .caches import build_caches
+from .databases import build_databases, replica_aliases
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -42,7 +45,9 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
-    'sorl.thumbnail',
+    'api.apps.ApiConfig',
+    'tasks.apps.TasksConfig',
+    'notifications.apps.NotificationsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -53,6 +58,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerfMiddleware',
+    'core.middleware.PinPrimaryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +85,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'notifications.context_processors.unread',
             ],
         },
     },
@@ -90,12 +98,14 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
-}
+# профиль SQLite выбирается переменной окружения YATUBE_DB (на боевом
+# сервере — tuned), см. yatube/databases.py
+DATABASES = build_databases(BASE_DIR)
+# ленты читаются с реплик (если они заданы), запись — в default;
+# после записи пользователь REPLICA_PIN_SECONDS читает из default
+DATABASE_REPLICAS = replica_aliases(DATABASES)
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 15
 
 
 # Password validation
@@ -145,18 +155,114 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 TEN = 10
 THREE = 3
+# 'page' — нумерованные страницы, 'cursor' — keyset-пагинация по
+# (created, id) без COUNT(*) и OFFSET
+POSTS_PAGINATION = 'page'
+# Номерная пагинация: 'exact' — точный COUNT(*), 'estimated' — строки
+# считаются только на PAGINATION_WINDOW страниц вперёд от текущей,
+# 'cached' — число страниц берётся из счётчиков статистики
+POSTS_PAGE_COUNT = 'cached'
+# Ниже этого числа постов лента считается точным COUNT(*)
+PAGINATION_EXACT_COUNT_THRESHOLD = 1000
+# Сколько секунд живёт счётчик постов главной до полного пересчёта
+POSTS_COUNT_TIMEOUT = 60 * 60
+# Сколько номеров страниц показывать по сторонам от текущей и по краям
+PAGINATION_WINDOW = 2
+PAGINATION_ENDS = 1
+
+# Материализованные ленты подписок: длина ленты, размер пачки вставки и
+# число подписчиков, начиная с которого посты автора не раскладываются
+# по лентам, а подмешиваются при чтении
+TIMELINE_SIZE = 800
+TIMELINE_BATCH_SIZE = 500
+TIMELINE_FANOUT_LIMIT = 5000
+
+# Сколько секунд живёт отрендеренная карточка поста в кэше фрагментов
+POST_CARD_TIMEOUT = 60 * 60
+
+# Сколько секунд живут множества подписок и подписчиков (posts/graph.py)
+FOLLOW_GRAPH_TIMEOUT = 24 * 60 * 60
+
+# «Кого почитать» (posts/suggestions.py): сколько рекомендаций хранить
+# на пользователя и сколько показывать, до скольких подписчиков
+# популярного автора обрезать при счёте и веса частей оценки
+SUGGESTIONS_TOP_K = 10
+SUGGESTIONS_SHOWN = 5
+SUGGESTIONS_FANOUT = 200
+SUGGESTIONS_WEIGHTS = {
+    'friends': 1.0,
+    'similar': 1.0,
+    'group': 0.5,
+}
+
+# Комментарии поста: сколько выводить за раз (остальные подгружаются
+# фрагментом) и уровень, глубже которого ответы не вкладываются
+COMMENTS_PAGE_SIZE = 50
+COMMENT_MAX_DEPTH = 5
+
+# Миниатюры картинок постов готовятся заранее фоновой задачей: оригинал
+# перекодируется без EXIF, карточки с пропорциями POST_THUMBNAIL_GEOMETRY
+# режутся в ширинах POST_IMAGE_WIDTHS (JPEG и WebP, если PIL её умеет)
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_WORKERS = 2
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+POST_IMAGE_MAX_SIDE = 2560
+# Ограничения загрузки: размер файла, число пикселей и форматы
+POST_IMAGE_MAX_SIZE = 5 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+POST_IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+# Загрузки крупнее этого пишутся во временный файл, а не в память
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Фоновые задачи (приложение tasks): 'eager' — сразу в запросе, чтобы в
+# отладке не делить SQLite с фоновыми потоками; 'thread' — в пуле потоков
+# после коммита; 'worker' — только очередь, её разбирает run_worker.
+# С DEBUG = True по умолчанию 'eager', и вся «фоновая» работа идёт в
+# запросе: на сервере задайте YATUBE_TASKS_MODE=thread или worker
+TASKS_MODE = os.environ.get(
+    'YATUBE_TASKS_MODE', 'eager' if DEBUG else 'thread'
+)
+TASKS_WORKERS = 2
+TASKS_MAX_ATTEMPTS = 3
+# задержка перед повтором в секундах, удваивается с каждой попыткой
+TASKS_RETRY_DELAY = 10
+# задача в работе дольше этого считается брошенной и снова встаёт в очередь
+TASKS_LOCK_TIMEOUT = 10 * 60
+TASKS_POLL_INTERVAL = 1
+# как часто поток-подметальщик в режиме 'thread' проверяет очередь
+TASKS_SWEEP_INTERVAL = 30
+
+# Уведомления: сколько получателей обрабатывается за одну транзакцию
+# доставки и сколько дней хранятся записи (prune_notifications)
+NOTIFICATIONS_BATCH_SIZE = 500
+NOTIFICATIONS_TTL_DAYS = 30
+
+# Atom/RSS-ленты: число записей, длина заголовка записи и кэш готовых
+# документов (ленты крупнее FEED_CACHE_MAX_SIZE символов не кэшируются)
+FEED_ITEMS = 50
+FEED_TITLE_LENGTH = 60
+FEED_CACHE_MAX_SIZE = 256 * 1024
+FEED_CACHE_TIMEOUT = 60 * 60
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
+# кэш-бэкенд выбирается переменной окружения YATUBE_CACHE,
+# см. yatube/caches.py
+CACHES = build_caches(BASE_DIR)
 
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Размер страницы JSON-API лент (api/v1)
+API_PAGE_SIZE = 20
+
+# Доля запросов, которые замеряет core.middleware.PerfMiddleware
+# (0 — выключено), и скользящее окно гистограмм /metrics: PERF_WINDOWS
+# окон по PERF_WINDOW секунд
+PERF_SAMPLE_RATE = 0.1
+PERF_WINDOW = 60
+PERF_WINDOWS = 5